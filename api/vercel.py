@@ -1,106 +1,86 @@
+"""Serverless webhook entry point.
+
+A serverless function cannot keep the WebhookServer running, so each request
+is validated and processed directly. Long-running deployments should set
+WEBHOOK_URL and run the bot itself, which serves webhooks with backpressure.
+"""
 from http.server import BaseHTTPRequestHandler
-import os
-import sys
+from pathlib import Path
+import asyncio
+import hmac
 import json
-from artist_manager_agent.models import ArtistProfile
-from artist_manager_agent.bot import ArtistManagerBot
-from artist_manager_agent.log import logger, log_event
 
-# Initialize bot as a global variable for reuse
+from telegram import Update
+
+from artist_manager_agent.core import Bot
+from artist_manager_agent.core.webhook import SECRET_HEADER
+from artist_manager_agent.utils.config import BOT_TOKEN, DATA_DIR, WEBHOOK_SECRET
+from artist_manager_agent.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# Initialize bot and its event loop as globals for reuse across invocations
 bot = None
+loop = asyncio.new_event_loop()
+
+
+async def _start_bot() -> Bot:
+    instance = Bot(token=BOT_TOKEN, data_dir=Path(DATA_DIR))
+    await instance.persistence.load()
+    await instance.application.initialize()
+    return instance
+
 
 def init_bot():
     """Initialize the bot if not already initialized."""
     global bot
     if bot is None:
         try:
-            # Check required environment variables
-            required_vars = ["TELEGRAM_BOT_TOKEN", "OPENAI_API_KEY"]
-            missing_vars = [var for var in required_vars if not os.getenv(var)]
-            if missing_vars:
-                logger.error(f"Missing required environment variables: {', '.join(missing_vars)}")
-                return None
-
-            # Initialize bot
-            artist_profile = ArtistProfile(
-                id="default",
-                name="Artist",
-                genre="",
-                career_stage="emerging",
-                goals=[],
-                strengths=[],
-                areas_for_improvement=[],
-                achievements=[],
-                social_media={},
-                streaming_profiles={},
-                brand_guidelines={}
-            )
-            
-            bot = ArtistManagerBot(
-                telegram_token=os.getenv("TELEGRAM_BOT_TOKEN"),
-                artist_profile=artist_profile,
-                openai_api_key=os.getenv("OPENAI_API_KEY"),
-                model=os.getenv("OPENAI_MODEL", "gpt-3.5-turbo"),
-                db_url=os.getenv("DATABASE_URL", "sqlite:///artist_manager.db")
-            )
-            
-            # Log startup
-            log_event("startup", {
-                "config": {
-                    "model": bot.agent.model,
-                    "db_url": bot.agent.db_url,
-                    "log_level": logger.level
-                },
-                "environment": "vercel"
-            })
-            
-            return bot
+            bot = loop.run_until_complete(_start_bot())
         except Exception as e:
             logger.error(f"Failed to initialize bot: {e}")
             return None
     return bot
 
+
 class handler(BaseHTTPRequestHandler):
-    def do_GET(self):
-        """Handle GET requests - health check."""
-        self.send_response(200)
+    def _send_json(self, status: int, body: dict):
+        self.send_response(status)
         self.send_header('Content-type', 'application/json')
         self.end_headers()
-        
-        response = {
+        self.wfile.write(json.dumps(body).encode())
+
+    def do_GET(self):
+        """Handle GET requests - health check."""
+        self._send_json(200, {
             "status": "healthy",
             "bot_initialized": bot is not None
-        }
-        self.wfile.write(json.dumps(response).encode())
-    
+        })
+
     def do_POST(self):
         """Handle POST requests - Telegram webhook."""
         try:
+            token = self.headers.get(SECRET_HEADER, "")
+            if not WEBHOOK_SECRET or not hmac.compare_digest(token.encode(), WEBHOOK_SECRET.encode()):
+                self._send_json(403, {"error": "Invalid secret token"})
+                return
+
             # Initialize bot if needed
             if not init_bot():
-                self.send_response(500)
-                self.send_header('Content-type', 'application/json')
-                self.end_headers()
-                self.wfile.write(json.dumps({"error": "Bot initialization failed"}).encode())
+                self._send_json(500, {"error": "Bot initialization failed"})
                 return
-            
+
             # Read request body
             content_length = int(self.headers['Content-Length'])
             post_data = self.rfile.read(content_length)
-            update = json.loads(post_data.decode())
-            
+            update = Update.de_json(json.loads(post_data.decode()), bot.application.bot)
+
             # Process update
-            bot.process_update(update)
-            
-            # Send response
-            self.send_response(200)
-            self.send_header('Content-type', 'application/json')
-            self.end_headers()
-            self.wfile.write(json.dumps({"status": "ok"}).encode())
-            
+            loop.run_until_complete(bot.application.process_update(update))
+            loop.run_until_complete(bot.application.update_persistence())
+
+            self._send_json(200, {"status": "ok"})
+
         except Exception as e:
             logger.error(f"Error processing update: {e}")
-            self.send_response(500)
-            self.send_header('Content-type', 'application/json')
-            self.end_headers()
-            self.wfile.write(json.dumps({"error": str(e)}).encode()) 
\ No newline at end of file
+            self._send_json(500, {"error": str(e)})
@@ -1,8 +1,15 @@
 """Core bot functionality."""
-from .agent import ArtistManagerAgent
 from .bot import Bot
+from ..utils.lazy import lazy_module_getattr
+
+# The agent pulls in langchain and cryptography; import it only when used
+_LAZY_IMPORTS = {
+    "ArtistManagerAgent": ".agent"
+}
+
+__getattr__ = lazy_module_getattr(__name__, _LAZY_IMPORTS)
 
 __all__ = [
     "ArtistManagerAgent",
     "Bot"
-] 
\ No newline at end of file
+]
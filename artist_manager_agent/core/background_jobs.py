@@ -0,0 +1,207 @@
+"""Event-driven background job queue for the Artist Manager Bot."""
+from typing import Any, Awaitable, Callable, Dict, List, MutableMapping, Optional, Tuple
+import asyncio
+import heapq
+import itertools
+import time
+import uuid
+
+from ..utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+JobCallback = Callable[[Dict[str, Any]], Awaitable[Any]]
+
+
+class BackgroundJobQueue:
+    """Run named background jobs on a pool of workers.
+
+    Jobs are submitted by name with a payload, optionally delayed, repeated
+    every ``interval`` seconds and given a priority (lower runs first among
+    due jobs). A failed job is retried with exponential backoff up to the
+    retry limit of its job type.
+
+    The scheduler sleeps until the next job is due or a job is submitted, so
+    an idle queue uses no CPU. Pending jobs are kept as plain records in a
+    mapping, normally ``bot_data``, so they are persisted with it and picked
+    up again by ``attach`` after a restart. Payloads must be serializable by
+    the persistence backend.
+
+    The owner runs ``run_scheduler`` and ``workers`` copies of ``run_worker``
+    as tasks, e.g. in a task group of the bot. Before stopping them,
+    ``drain`` lets running jobs finish and leaves the others pending for the
+    next process.
+    """
+
+    def __init__(self, workers: int = 4):
+        if workers < 1:
+            raise ValueError("At least one worker is required")
+        self.workers = workers
+        self._handlers: Dict[str, Tuple[JobCallback, int, float]] = {}
+        self._jobs: MutableMapping[str, Dict[str, Any]] = {}
+        self._scheduled: List[Tuple[float, int, str]] = []
+        self._ready: asyncio.PriorityQueue = asyncio.PriorityQueue()
+        self._changed = asyncio.Event()
+        self._seq = itertools.count()
+        self._draining = False
+        self._active = 0
+        self._idle = asyncio.Event()
+        self._idle.set()
+        self.stats: Dict[str, int] = {
+            "completed": 0,
+            "retried": 0,
+            "failed": 0
+        }
+
+    def register(self, name: str, callback: JobCallback, max_retries: int = 3, retry_delay: float = 5.0) -> None:
+        """Register the coroutine function that runs jobs called ``name``."""
+        self._handlers[name] = (callback, max_retries, retry_delay)
+
+    def attach(self, store: MutableMapping[str, Dict[str, Any]]) -> int:
+        """Keep job records in ``store`` and schedule the ones it already holds."""
+        pending = dict(self._jobs)
+        self._jobs = store
+        self._scheduled.clear()
+        restored = 0
+        for job_id, job in list(store.items()):
+            if job["name"] not in self._handlers:
+                logger.warning(f"Dropping pending job {job_id} of unknown type {job['name']}")
+                del store[job_id]
+                continue
+            self._schedule(job)
+            restored += 1
+        # Jobs submitted before the store was available
+        for job_id, job in pending.items():
+            if job_id not in store:
+                store[job_id] = job
+                self._schedule(job)
+        if restored:
+            logger.info(f"Restored {restored} pending background jobs")
+        return restored
+
+    def submit(
+        self,
+        name: str,
+        payload: Optional[Dict[str, Any]] = None,
+        delay: float = 0.0,
+        interval: Optional[float] = None,
+        priority: int = 0,
+        job_id: Optional[str] = None
+    ) -> str:
+        """Schedule a job and return its id.
+
+        A job with an explicit ``job_id`` is only added if no job with that
+        id is pending, so recurring jobs can be submitted on every start.
+        """
+        if name not in self._handlers:
+            raise ValueError(f"Unknown job type: {name}")
+        if job_id is not None and job_id in self._jobs:
+            return job_id
+        job_id = job_id or uuid.uuid4().hex
+        job = {
+            "id": job_id,
+            "name": name,
+            "payload": payload or {},
+            "run_at": time.time() + delay,
+            "interval": interval,
+            "priority": priority,
+            "attempts": 0
+        }
+        self._jobs[job_id] = job
+        self._schedule(job)
+        return job_id
+
+    def cancel(self, job_id: str) -> bool:
+        """Remove a pending job; a job that is already running finishes."""
+        return self._jobs.pop(job_id, None) is not None
+
+    async def drain(self, timeout: float = 30.0) -> int:
+        """Start no more jobs and wait up to ``timeout`` for running ones.
+
+        Returns the number of jobs left pending in the store.
+        """
+        self._draining = True
+        self._changed.set()
+        if self._active:
+            logger.info(f"Waiting for {self._active} running jobs")
+            try:
+                await asyncio.wait_for(self._idle.wait(), timeout)
+            except asyncio.TimeoutError:
+                logger.warning(f"{self._active} jobs still running after {timeout}s, they run again after a restart")
+        logger.info(f"Handing off {len(self._jobs)} pending jobs")
+        return len(self._jobs)
+
+    def __len__(self) -> int:
+        return len(self._jobs)
+
+    def _schedule(self, job: Dict[str, Any]) -> None:
+        heapq.heappush(self._scheduled, (job["run_at"], next(self._seq), job["id"]))
+        self._changed.set()
+
+    async def run_scheduler(self) -> None:
+        """Move jobs to the workers when they become due."""
+        while not self._draining:
+            now = time.time()
+            while self._scheduled and self._scheduled[0][0] <= now:
+                run_at, seq, job_id = heapq.heappop(self._scheduled)
+                job = self._jobs.get(job_id)
+                # Skip cancelled jobs and entries of an earlier schedule
+                if job is None or job["run_at"] != run_at:
+                    continue
+                self._ready.put_nowait((job["priority"], seq, job_id, run_at))
+
+            timeout = self._scheduled[0][0] - now if self._scheduled else None
+            self._changed.clear()
+            try:
+                await asyncio.wait_for(self._changed.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+
+    async def run_worker(self) -> None:
+        """Run due jobs one at a time."""
+        while True:
+            _, _, job_id, run_at = await self._ready.get()
+            job = self._jobs.get(job_id)
+            # While draining, due jobs stay pending in the store
+            if self._draining or job is None or job["run_at"] != run_at:
+                continue
+            self._active += 1
+            self._idle.clear()
+            try:
+                await self._run_job(job)
+            finally:
+                self._active -= 1
+                if not self._active:
+                    self._idle.set()
+
+    async def _run_job(self, job: Dict[str, Any]) -> None:
+        callback, max_retries, retry_delay = self._handlers[job["name"]]
+        try:
+            await callback(job["payload"])
+        except asyncio.CancelledError:
+            # Left pending, so it runs again after a restart
+            raise
+        except Exception as e:
+            if self._jobs.get(job["id"]) is not job:
+                return
+            job["attempts"] += 1
+            if job["attempts"] <= max_retries:
+                delay = retry_delay * 2 ** (job["attempts"] - 1)
+                logger.warning(f"Job {job['name']} failed ({e}), retry {job['attempts']} in {delay:.0f}s")
+                self.stats["retried"] += 1
+                job["run_at"] = time.time() + delay
+                self._schedule(job)
+                return
+            logger.error(f"Job {job['name']} failed after {max_retries} retries: {e}", exc_info=True)
+            self.stats["failed"] += 1
+        else:
+            self.stats["completed"] += 1
+
+        if self._jobs.get(job["id"]) is not job:
+            return
+        if job["interval"]:
+            job["attempts"] = 0
+            job["run_at"] = max(time.time(), job["run_at"] + job["interval"])
+            self._schedule(job)
+        else:
+            del self._jobs[job["id"]]
@@ -13,31 +13,29 @@ from telegram.ext import (
     Application,
     ApplicationBuilder,
     CommandHandler,
-    MessageHandler,
     CallbackQueryHandler,
-    filters,
     ContextTypes,
     ConversationHandler,
-    BaseHandler
+    BaseHandler,
+    TypeHandler
 )
 
-from ..handlers.core.core_handlers import CoreHandlers
-from ..handlers.features.goal_handlers import GoalHandlers
-from ..handlers.features.task_handlers import TaskHandlers
-from ..handlers.features.project_handlers import ProjectHandlers
-from ..handlers.features.music_handlers import MusicHandlers
-from ..handlers.features.blockchain_handlers import BlockchainHandlers
-from ..handlers.features.auto_handlers import AutoHandlers
-from ..handlers.features.team_handlers import TeamHandlers
-from ..handlers.features.onboarding_handlers import OnboardingHandlers
-from ..handlers.features.home_handler import HomeHandlers
-from ..handlers.features.name_change_handler import NameChangeHandlers
+from ..handlers.utils.callback_router import CallbackRouter
+from ..handlers.utils.feature_registry import FeatureRegistry, FeatureSpec
 from ..managers.team_manager import TeamManager
 from ..managers.dashboard import Dashboard
+from ..managers.deadline_index import DeadlineIndex
 from ..managers.project_manager import ProjectManager
 from ..integrations.task_manager_integration import TaskManagerIntegration
-from ..persistence import RobustPersistence
+from ..persistence import RobustPersistence, SQLitePersistence
+from ..services.ai_handler import AIHandler
+from ..services.auto_mode import AutoMode
+from .background_jobs import BackgroundJobQueue
+from .message_queue import MessageQueue
+from .sharding import ShardReceiver
+from .update_processor import PerUserUpdateProcessor
 from ..utils.logger import get_logger
+from ..utils.tracing import UpdateTracer
 
 logger = get_logger(__name__)
 
@@ -51,8 +49,43 @@ class Bot:
     _task_groups: Dict[str, Set[asyncio.Task]] = {}
     _task_group_states: Dict[str, bool] = {}
 
-    def __init__(self, token: str, data_dir: Path):
-        """Initialize the bot."""
+    def __init__(
+        self,
+        token: str,
+        data_dir: Path,
+        persistence_backend: str = "pickle",
+        persistence_options: Optional[Dict[str, Any]] = None,
+        webhook_options: Optional[Dict[str, Any]] = None,
+        max_concurrent_updates: int = 256,
+        message_queue_options: Optional[Dict[str, Any]] = None,
+        job_workers: int = 4,
+        auto_workers: int = 8,
+        auto_catch_up_rate: float = 5.0,
+        ai_concurrency: int = 4,
+        trace_options: Optional[Dict[str, Any]] = None,
+        lazy_features: bool = True,
+        shard_options: Optional[Dict[str, Any]] = None,
+        drain_timeout: float = 30.0,
+        base_url: Optional[str] = None
+    ):
+        """Initialize the bot.
+
+        Updates are fetched by polling unless ``webhook_options`` is given,
+        in which case they are received by a WebhookServer built from it.
+        Up to ``max_concurrent_updates`` updates are handled at once, but
+        never two of the same user. Outgoing messages are rate limited by a
+        MessageQueue built from ``message_queue_options``. Background jobs
+        run on ``job_workers`` workers, auto mode cycles of all users on
+        ``auto_workers`` workers; after a restart, missed cycles are made up
+        at ``auto_catch_up_rate`` users per second. At most ``ai_concurrency``
+        AI requests of auto mode run at once. Sampled updates are traced by an
+        UpdateTracer built from ``trace_options``. Unless ``lazy_features``
+        is False, feature handlers are imported on first use. With
+        ``shard_options`` the bot is a worker of a ShardedFrontend and gets
+        its updates from the front process instead. ``stop`` waits up to
+        ``drain_timeout`` seconds for updates and jobs in progress.
+        ``base_url`` points the bot at a local Bot API server.
+        """
         try:
             if not token:
                 raise ValueError("Bot token cannot be empty")
@@ -60,22 +93,25 @@ class Bot:
             # Set token and data directory
             self.token = token
             self.data_dir = data_dir
+            self.persistence_backend = persistence_backend
+            self.persistence_options = persistence_options or {}
+            self.webhook_options = dict(webhook_options or {})
+            self.webhook_server = None
+            self.max_concurrent_updates = max_concurrent_updates
+            self.message_queue_options = message_queue_options or {}
+            self.job_workers = job_workers
+            self.auto_workers = auto_workers
+            self.auto_catch_up_rate = auto_catch_up_rate
+            self.ai_concurrency = ai_concurrency
+            self.trace_options = trace_options or {}
+            self.lazy_features = lazy_features
+            self.shard_options = dict(shard_options or {})
+            self.shard_receiver = None
+            self.drain_timeout = drain_timeout
+            self.base_url = base_url
             self._running = False
             self._initialized = False
             
-            # Initialize handlers as None first
-            self.onboarding = None
-            self.core = None
-            self.home = None
-            self.name_change = None
-            self.goals = None
-            self.tasks = None
-            self.projects = None
-            self.music = None
-            self.team = None
-            self.auto = None
-            self.blockchain = None
-            
             # Initialize components
             self._init_components()
             
@@ -96,23 +132,40 @@ class Bot:
         """Initialize bot components."""
         try:
             # Initialize persistence
-            persistence_path = self.data_dir / "persistence.pickle"
-            persistence_path.parent.mkdir(parents=True, exist_ok=True)
-            
-            self.persistence = RobustPersistence(
-                filepath=str(persistence_path.resolve())
-            )
+            self.persistence = self._create_persistence()
             
             # Initialize application
             logger.info("Initializing application...")
             builder = ApplicationBuilder()
             builder.token(self.token)
+            if self.base_url:
+                builder.base_url(self.base_url)
             builder.persistence(self.persistence)
-            builder.concurrent_updates(True)
+            # Outgoing messages share Telegram's rate limits; the queue is the
+            # bot's rate limiter, so every message the bot sends passes it
+            self.message_queue = MessageQueue(**self.message_queue_options)
+            builder.rate_limiter(self.message_queue)
+            # Concurrent across users, in order for each user
+            builder.concurrent_updates(PerUserUpdateProcessor(self.max_concurrent_updates))
+            if self.webhook_options:
+                # Bounded so a backlog pushes back on Telegram instead of memory
+                max_queue_size = self.webhook_options.pop("max_queue_size", 1000)
+                builder.update_queue(asyncio.Queue(maxsize=max_queue_size))
+            elif self.shard_options:
+                # Bounded so a backlog pushes back on the front process
+                max_queue_size = self.shard_options.pop("max_queue_size", 1000)
+                builder.update_queue(asyncio.Queue(maxsize=max_queue_size))
             
             # Build application and add error handler
             self.application = builder.build()
             self.application.add_error_handler(self._error_handler)
+            if isinstance(self.persistence, RobustPersistence):
+                self.persistence.set_eviction_callback(self._evict_cached_data)
+            
+            # Tracing of incoming updates, off unless configured
+            self.tracer = UpdateTracer(**self.trace_options)
+            
+            self.message_queue.bot = self.application.bot
             
             # Initialize supporting components
             self._init_supporting_components()
@@ -123,20 +176,71 @@ class Bot:
             logger.error(f"Error initializing components: {e}")
             raise
 
+    def _create_persistence(self):
+        """Create the persistence backend selected in the configuration."""
+        if self.persistence_backend == "sqlite":
+            database_path = self.data_dir / "persistence.db"
+            database_path.parent.mkdir(parents=True, exist_ok=True)
+            logger.info(f"Using SQLite persistence at {database_path}")
+            return SQLitePersistence(
+                database=str(database_path.resolve()),
+                **self.persistence_options
+            )
+            
+        if self.persistence_backend == "pickle":
+            persistence_path = self.data_dir / "persistence.pickle"
+            persistence_path.parent.mkdir(parents=True, exist_ok=True)
+            return RobustPersistence(
+                filepath=str(persistence_path.resolve()),
+                **self.persistence_options
+            )
+            
+        raise ValueError(f"Unknown persistence backend: {self.persistence_backend}")
+
+    def _evict_cached_data(self, kind: str, key: int) -> bool:
+        """Drop an idle user's or chat's data from the application's memory.
+
+        The persistence only offers records whose changes it has received,
+        so PTB has nothing left to write for them. drop_user_data and
+        drop_chat_data would also delete the stored record, so the entry is
+        removed from PTB's dict directly.
+        """
+        if kind == "user_data":
+            self.application._user_data.pop(key, None)
+        else:
+            self.application._chat_data.pop(key, None)
+        return True
+
     def _init_supporting_components(self):
         """Initialize supporting components."""
         try:
             # Initialize team manager
             self.team_manager = TeamManager(team_id="default")
             
+            # Initialize callback router, handlers add their routes to it
+            self.callback_router = CallbackRouter()
+            
             # Initialize dashboard
             self.dashboard = Dashboard(self)
+            self.dashboard.register_callbacks(self.callback_router)
+            
+            # Due dates of tasks and projects, kept up to date by their managers
+            self.deadlines = DeadlineIndex()
             
             # Initialize project manager
             self.project_manager = ProjectManager(self)
             
             # Initialize task manager integration
-            self.task_manager_integration = TaskManagerIntegration(self.persistence)
+            self.task_manager_integration = TaskManagerIntegration(self.persistence, deadlines=self.deadlines)
+            
+            # Initialize background jobs
+            self.jobs = BackgroundJobQueue(workers=self.job_workers)
+            self.jobs.register("cleanup", self._run_cleanup)
+            self.jobs.register("analytics", self._run_analytics)
+            
+            # Initialize auto mode, one scheduler for every enrolled user
+            self.ai_handler = AIHandler()
+            self.auto_mode = AutoMode(self, workers=self.auto_workers, ai_concurrency=self.ai_concurrency)
             
             logger.info("Supporting components initialized successfully")
             
@@ -145,115 +249,99 @@ class Bot:
             raise
 
     def _init_handlers(self):
-        """Initialize all handlers."""
+        """Register the feature handlers, most are imported on first use."""
         try:
-            # Initialize handlers in order of priority
-            handlers = [
-                ('onboarding', OnboardingHandlers),
-                ('core', CoreHandlers),
-                ('home', HomeHandlers),
-                ('name_change', NameChangeHandlers),
-                ('goals', GoalHandlers),
-                ('tasks', TaskHandlers),
-                ('projects', ProjectHandlers),
-                ('music', MusicHandlers),
-                ('team', TeamHandlers),
-                ('auto', AutoHandlers),
-                ('blockchain', BlockchainHandlers)
+            self.features = FeatureRegistry(self, self.callback_router, lazy=self.lazy_features)
+            
+            # Groups in order of priority; stubs match the commands and the
+            # callbacks that start a feature, including conversation entries
+            features = [
+                FeatureSpec("onboarding", ".features.onboarding_handlers", "OnboardingHandlers", 0, lazy=False),
+                FeatureSpec("core", ".core.core_handlers", "CoreHandlers", 1, lazy=False),
+                FeatureSpec(
+                    "home", ".features.home_handler", "HomeHandlers", 2,
+                    commands=("home",),
+                    callback_pattern="^(home_.*|menu_.*|dashboard_view)$"
+                ),
+                FeatureSpec(
+                    "name_change", ".features.name_change_handler", "NameChangeHandlers", 3,
+                    commands=("change_name",),
+                    callback_pattern="^(name_.*|change_manager_name)$",
+                    conversations=("name_change_conversation",)
+                ),
+                FeatureSpec(
+                    "goals", ".features.goal_handlers", "GoalHandlers", 4,
+                    commands=("goals",),
+                    callback_pattern="^goal_",
+                    conversations=("goal_creation",)
+                ),
+                FeatureSpec(
+                    "tasks", ".features.task_handlers", "TaskHandlers", 5,
+                    commands=("tasks", "task"),
+                    callback_pattern="^task_",
+                    conversations=("task_creation",)
+                ),
+                FeatureSpec(
+                    "projects", ".features.project_handlers", "ProjectHandlers", 6,
+                    commands=("projects",),
+                    callback_pattern="^(menu_projects|project_.*)$"
+                ),
+                FeatureSpec(
+                    "music", ".features.music_handlers", "MusicHandlers", 7,
+                    commands=("music",),
+                    callback_pattern="^(menu_music|music_.*)$"
+                ),
+                FeatureSpec(
+                    "team", ".features.team_handlers", "TeamHandlers", 8,
+                    commands=("team", "addmember", "payment"),
+                    callback_pattern="^(menu_team|team_.*)$",
+                    conversations=("team_member_addition", "team_payment_request")
+                ),
+                FeatureSpec(
+                    "auto", ".features.auto_handlers", "AutoHandlers", 9,
+                    commands=("auto", "autosetup"),
+                    callback_pattern="^(menu_auto|auto_.*)$",
+                    conversations=("auto_mode_settings",)
+                ),
+                FeatureSpec(
+                    "blockchain", ".features.blockchain_handlers", "BlockchainHandlers", 10,
+                    commands=("blockchain", "swap"),
+                    callback_pattern="^(menu_blockchain|blockchain_.*|swap_start)$",
+                    conversations=("token_swap",)
+                )
             ]
-            
-            # Initialize each handler with proper error handling
-            for attr_name, handler_class in handlers:
-                try:
-                    handler = handler_class(self)
-                    if not hasattr(handler, 'get_handlers'):
-                        raise AttributeError(f"{attr_name} handler missing get_handlers method")
-                    setattr(self, attr_name, handler)
-                    logger.debug(f"Initialized {attr_name} handler")
-                except Exception as e:
-                    logger.error(f"Error initializing {attr_name} handler: {e}")
-                    raise RuntimeError(f"Failed to initialize {attr_name} handler") from e
-                    
+            for spec in features:
+                self.features.register(spec)
+                
             logger.info("All handlers initialized successfully")
             
         except Exception as e:
             logger.error(f"Error in _init_handlers: {e}")
             raise
 
+    def __getattr__(self, name: str) -> Any:
+        """Load a feature handler, e.g. ``bot.goals``, when it is first used."""
+        features = self.__dict__.get("features")
+        if features is not None and name in features:
+            return features.load(name)
+        raise AttributeError(f"{type(self).__name__!r} object has no attribute {name!r}")
+
     def _register_handlers(self):
         """Register handlers with the application."""
         try:
-            # Verify all handlers are initialized
-            required_handlers = [
-                'onboarding', 'core', 'home', 'name_change', 'goals',
-                'tasks', 'projects', 'music', 'team', 'auto', 'blockchain'
-            ]
-            
-            for handler_name in required_handlers:
-                if not hasattr(self, handler_name):
-                    raise RuntimeError(f"Required handler {handler_name} is not initialized")
-                if not getattr(self, handler_name):
-                    raise RuntimeError(f"Handler {handler_name} is None")
-                if not hasattr(getattr(self, handler_name), 'get_handlers'):
-                    raise RuntimeError(f"Handler {handler_name} missing get_handlers method")
-            
             # Clear existing handlers
             if hasattr(self.application, 'handlers'):
                 self.application.handlers.clear()
                 logger.info("Cleared existing handlers")
             
-            # Add enhanced debug handler
-            self.application.add_handler(
-                MessageHandler(
-                    filters.TEXT & ~filters.COMMAND & ~filters.Regex("^(c|y|n|continue|yes|no|skip)$"),
-                    self._debug_command
-                ),
-                group=10  # Lower priority than all other handlers
-            )
-            logger.info("Added enhanced debug handler")
-            
-            # Register handlers in priority order
-            handlers_to_register = [
-                (0, self.onboarding.get_handlers(), "Onboarding handlers"),
-                (1, self.core.get_handlers(), "Core handlers"),
-                (2, self.home.get_handlers(), "Home handlers"),
-                (3, self.name_change.get_handlers(), "Name change handlers"),
-                (4, self.goals.get_handlers(), "Goal handlers"),
-                (5, self.tasks.get_handlers(), "Task handlers"),
-                (6, self.projects.get_handlers(), "Project handlers"),
-                (7, self.music.get_handlers(), "Music handlers"),
-                (8, self.team.get_handlers(), "Team handlers"),
-                (9, self.auto.get_handlers(), "Auto mode handlers"),
-                (10, self.blockchain.get_handlers(), "Blockchain handlers")
-            ]
-            
-            # Track registered handlers to prevent duplicates
-            registered = set()
+            # Trace updates before any other handler sees them; not added
+            # at all when tracing is off, so it costs nothing then
+            if self.tracer.enabled:
+                self.application.add_handler(TypeHandler(Update, self.tracer.handle), group=-1)
+                logger.info("Added update tracing handler")
             
-            for group, handlers, description in handlers_to_register:
-                if not handlers:
-                    logger.warning(f"No {description} to register")
-                    continue
-                    
-                if not isinstance(handlers, (list, tuple)):
-                    handlers = [handlers]
-                    
-                for handler in handlers:
-                    if handler is None:
-                        logger.warning(f"Skipping None handler in {description}")
-                        continue
-                        
-                    # Generate unique identifier for handler
-                    handler_id = id(handler)
-                    
-                    if handler_id not in registered:
-                        self.application.add_handler(handler, group=group)
-                        registered.add(handler_id)
-                        logger.debug(f"Registered {type(handler).__name__} in group {group}")
-                    else:
-                        logger.warning(f"Skipping duplicate handler {type(handler).__name__}")
-                        
-                logger.info(f"Registered {len(handlers)} {description}")
+            # Loaded features add their handlers, the others stubs
+            self.features.install(self.application)
             
             # Add error handler
             self.application.add_error_handler(self._error_handler)
@@ -296,27 +384,55 @@ class Bot:
             
             # Start application
             logger.info("Starting application...")
+            # Features with conversations in progress must be present when
+            # the application restores conversations from persistence
+            await self.features.load_pending_conversations(self.persistence)
             await self.application.initialize()
             await self.application.start()
+            await self.message_queue.start()
+            self.tracer.start()
             
             # Initialize task groups
             logger.info("Initializing task groups...")
-            self._task_group_states["maintenance"] = True
-            self._task_group_states["tasks"] = True
-            self._task_group_states["analytics"] = True
+            self._task_group_states["jobs"] = True
             
-            # Start background tasks
-            logger.info("Starting background tasks...")
+            # Start background jobs, pending ones are kept in bot_data
+            logger.info("Starting background jobs...")
             try:
-                await self.create_task(self._run_periodic_cleanup(), group="maintenance")
-                await self.create_task(self._monitor_task_queue(), group="tasks")
-                await self.create_task(self._update_analytics(), group="analytics")
+                self.jobs.attach(self.application.bot_data.setdefault("pending_jobs", {}))
+                self.jobs.submit("cleanup", delay=3600, interval=3600, job_id="cleanup")
+                self.jobs.submit("analytics", delay=300, interval=300, job_id="analytics")
+                await self.create_task(self.jobs.run_scheduler(), group="jobs")
+                for _ in range(self.jobs.workers):
+                    await self.create_task(self.jobs.run_worker(), group="jobs")
             except Exception as e:
-                logger.error(f"Error starting background tasks: {e}")
+                logger.error(f"Error starting background jobs: {e}")
             
-            # Start polling
-            logger.info("Starting polling...")
-            await self.application.updater.start_polling(drop_pending_updates=True)
+            # Resume auto mode for the users enrolled before the restart
+            logger.info("Starting auto mode scheduler...")
+            self.auto_mode.scheduler.attach(
+                self.application.bot_data.setdefault("auto_mode", {}),
+                catch_up_rate=self.auto_catch_up_rate
+            )
+            self._task_group_states["auto"] = True
+            await self.create_task(self.auto_mode.scheduler.run_scheduler(), group="auto")
+            for _ in range(self.auto_mode.scheduler.workers):
+                await self.create_task(self.auto_mode.scheduler.run_worker(), group="auto")
+            
+            if self.shard_options:
+                logger.info("Starting shard receiver...")
+                self.shard_receiver = ShardReceiver(self.application, **self.shard_options)
+                self.shard_receiver.start()
+            elif self.webhook_options:
+                logger.info("Starting webhook server...")
+                # aiohttp is only imported in webhook mode
+                from .webhook import WebhookServer
+                self.webhook_server = WebhookServer(self.application, **self.webhook_options)
+                # Updates the previous instance left to us are handled, not dropped
+                await self.webhook_server.start(drop_pending_updates=False)
+            else:
+                logger.info("Starting polling...")
+                await self.application.updater.start_polling(drop_pending_updates=False)
             
             self._running = True
             logger.info("Bot started successfully")
@@ -327,7 +443,13 @@ class Bot:
             raise
 
     async def stop(self):
-        """Stop the bot."""
+        """Drain and stop the bot.
+
+        New updates are no longer fetched, but the ones already received are
+        handled and running jobs finish, within ``drain_timeout`` seconds.
+        Pending jobs and auto mode schedules stay in ``bot_data``, so once persistence is flushed the
+        next process picks up where this one stopped.
+        """
         try:
             if not self._running:
                 logger.warning("Bot is not running")
@@ -335,32 +457,63 @@ class Bot:
                 
             logger.info("Starting bot shutdown sequence...")
             
-            # Stop accepting new updates first
-            logger.info("Stopping polling...")
-            if hasattr(self.application, 'updater') and self.application.updater:
+            # Stop accepting new updates first; Telegram keeps the rest
+            if self.webhook_server:
+                logger.info("Stopping webhook server...")
+                await self.webhook_server.stop()
+            elif hasattr(self.application, 'updater') and self.application.updater and self.application.updater.running:
+                logger.info("Stopping polling...")
                 await self.application.updater.stop()
             
-            # Cancel all tasks by group with proper cleanup
+            # Let running jobs and auto mode cycles finish, the others are
+            # handed off
+            logger.info("Draining background jobs...")
+            try:
+                await asyncio.gather(
+                    self.jobs.drain(timeout=self.drain_timeout),
+                    self.auto_mode.scheduler.drain(timeout=self.drain_timeout)
+                )
+            except Exception as e:
+                logger.error(f"Error draining background jobs: {e}")
+            
+            # Handle the updates already received; replies still go through
+            # the message queue
+            logger.info(f"Draining {self.application.update_queue.qsize()} queued updates...")
+            try:
+                await asyncio.wait_for(self.application.stop(), self.drain_timeout)
+            except asyncio.TimeoutError:
+                logger.warning(f"Updates still in flight after {self.drain_timeout}s, they are dropped")
+            except Exception as e:
+                logger.error(f"Error stopping application: {e}")
+            
+            # Stop the idle job loops and other tasks
             logger.info("Stopping background tasks...")
             try:
-                await self.cancel_tasks(timeout=10.0)  # Give tasks more time to cleanup
+                await self.cancel_tasks(timeout=10.0)
             except Exception as e:
                 logger.error(f"Error cancelling tasks: {e}")
             
-            # Save state before shutting down
+            # Deliver queued messages
+            logger.info("Stopping message queue...")
+            try:
+                await self.message_queue.stop()
+            except Exception as e:
+                logger.error(f"Error stopping message queue: {e}")
+            
+            self.tracer.stop()
+            
+            # Save state, including the pending jobs, for the next process
             logger.info("Saving state...")
             try:
                 await self.persistence.flush()
             except Exception as e:
                 logger.error(f"Error saving state: {e}")
             
-            # Stop application
-            logger.info("Stopping application...")
+            logger.info("Shutting down application...")
             try:
-                await self.application.stop()
                 await self.application.shutdown()
             except Exception as e:
-                logger.error(f"Error stopping application: {e}")
+                logger.error(f"Error shutting down application: {e}")
             
             # Clear state
             self._running = False
@@ -476,67 +629,29 @@ class Bot:
                     self._task_groups[g].clear()
                     logger.info(f"Cleared task group {g}")
 
-    async def _run_periodic_cleanup(self):
-        """Run periodic cleanup tasks."""
-        while True:
-            try:
-                await asyncio.sleep(3600)  # Every hour
-                logger.debug("Running periodic cleanup")
-                # Add actual cleanup logic here
-                await self._cleanup_old_data()
-                await self._cleanup_temp_files()
-            except asyncio.CancelledError:
-                logger.info("Periodic cleanup task cancelled")
-                break
-            except Exception as e:
-                logger.error(f"Error in periodic cleanup: {e}")
-                await asyncio.sleep(60)  # Wait before retrying
+    async def _run_cleanup(self, payload: Dict[str, Any]) -> None:
+        """Background job: clean up old data and temporary files."""
+        logger.debug("Running periodic cleanup")
+        await self._cleanup_old_data()
+        await self._cleanup_temp_files()
 
-    async def _monitor_task_queue(self):
-        """Monitor and process task queue."""
-        while True:
-            try:
-                await asyncio.sleep(1)  # Check every second
-                # Add actual task processing logic here
-                await self._process_pending_tasks()
-            except asyncio.CancelledError:
-                logger.info("Task queue monitoring cancelled")
-                break
-            except Exception as e:
-                logger.error(f"Error monitoring task queue: {e}")
-                await asyncio.sleep(5)  # Wait before retrying
-
-    async def _update_analytics(self):
-        """Update analytics data periodically."""
-        while True:
-            try:
-                await asyncio.sleep(300)  # Every 5 minutes
-                logger.debug("Updating analytics")
-                # Add actual analytics update logic here
-                await self._gather_analytics()
-                await self._update_metrics()
-            except asyncio.CancelledError:
-                logger.info("Analytics update task cancelled")
-                break
-            except Exception as e:
-                logger.error(f"Error updating analytics: {e}")
-                await asyncio.sleep(60)  # Wait before retrying
+    async def _run_analytics(self, payload: Dict[str, Any]) -> None:
+        """Background job: update analytics data."""
+        logger.debug("Updating analytics")
+        await self._gather_analytics()
+        await self._update_metrics()
 
     async def _cleanup_old_data(self):
         """Clean up old data."""
-        # Implementation here
-        pass
+        # Evict users idle past the cache TTL even when no updates arrive
+        if isinstance(self.persistence, RobustPersistence):
+            self.persistence.evict_idle()
 
     async def _cleanup_temp_files(self):
         """Clean up temporary files."""
         # Implementation here
         pass
 
-    async def _process_pending_tasks(self):
-        """Process pending tasks."""
-        # Implementation here
-        pass
-
     async def _gather_analytics(self):
         """Gather analytics data."""
         # Implementation here
@@ -544,35 +659,16 @@ class Bot:
 
     async def _update_metrics(self):
         """Update metrics."""
-        # Implementation here
-        pass
-
-    async def _debug_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
-        """Debug handler for logging command updates."""
-        try:
-            logger.debug("=== Debug Handler Start ===")
-            logger.debug(f"Raw update: {update.to_dict()}")
-            logger.debug(f"Update type: {type(update)}")
-            
-            if update.effective_message:
-                logger.debug(f"Message type: {type(update.effective_message)}")
-                logger.debug(f"Message content: {update.effective_message.to_dict()}")
-                
-                if update.effective_message.text:
-                    logger.debug(f"Message text: {update.effective_message.text}")
-                    if update.effective_message.text.startswith('/'):
-                        command = update.effective_message.text.split()[0]
-                        logger.debug(f"Command detected: {command}")
-                        
-            if context.user_data:
-                logger.debug(f"User data: {context.user_data}")
-            if context.chat_data:
-                logger.debug(f"Chat data: {context.chat_data}")
-                
-            logger.debug("=== Debug Handler End ===")
-            
-        except Exception as e:
-            logger.error(f"Error in debug handler: {e}")
+        # Report the slowest menus
+        for route, stats in list(self.callback_router.stats().items())[:5]:
+            logger.debug(
+                f"Callback route {route}: {stats['calls']} calls, {stats['errors']} errors, "
+                f"avg {stats['avg_time'] * 1000:.1f}ms, max {stats['max_time'] * 1000:.1f}ms"
+            )
+        logger.debug(
+            f"Auto mode: {len(self.auto_mode.scheduler)} users, {self.auto_mode.stats['digests']} digests sent, "
+            f"{self.auto_mode.stats['messages_saved']} messages saved"
+        )
 
     async def _error_handler(self, update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
         """Error handler for handling errors."""
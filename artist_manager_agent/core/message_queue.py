@@ -0,0 +1,351 @@
+"""Rate-limited outbound message queue for the Artist Manager Bot."""
+from typing import Any, Callable, Coroutine, Dict, Hashable, List, Optional, Tuple
+import asyncio
+import heapq
+import itertools
+
+from telegram.error import RetryAfter
+from telegram.ext import BaseRateLimiter, ExtBot
+
+from ..utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# Priority lanes, lower is sent first
+INTERACTIVE = 0
+NOTIFICATION = 1
+
+# Bot API methods that are not messages and are never held back
+_UNQUEUED = {"sendChatAction"}
+_QUEUED_PREFIXES = ("send", "edit", "copyMessage", "forwardMessage")
+
+
+def is_queued(endpoint: str) -> bool:
+    """Return whether calls of a Bot API method count against the message limits."""
+    return endpoint.startswith(_QUEUED_PREFIXES) and endpoint not in _UNQUEUED
+
+
+class TokenBucket:
+    """Token bucket refilled at ``rate`` tokens per second up to ``capacity``."""
+
+    def __init__(self, rate: float, capacity: float, now: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = now
+
+    def _refill(self, now: float) -> None:
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def delay(self, now: float) -> float:
+        """Seconds until a token is available."""
+        self._refill(now)
+        return 0.0 if self.tokens >= 1 else (1 - self.tokens) / self.rate
+
+    def take(self, now: float) -> None:
+        self._refill(now)
+        self.tokens -= 1
+
+
+class _Job:
+    """A pending Bot API request and the futures waiting for its result."""
+
+    __slots__ = ("callback", "args", "kwargs", "priority", "seq", "futures", "attempts", "edit_key")
+
+    def __init__(self, callback: Callable[..., Coroutine], args: Any, kwargs: Dict[str, Any],
+                 priority: int, seq: int, edit_key: Optional[Tuple[Hashable, ...]] = None):
+        self.callback = callback
+        self.args = args
+        self.kwargs = kwargs
+        self.priority = priority
+        self.seq = seq
+        self.futures: List[asyncio.Future] = []
+        self.attempts = 0
+        self.edit_key = edit_key
+
+    def __lt__(self, other: "_Job") -> bool:
+        return (self.priority, self.seq) < (other.priority, other.seq)
+
+
+class _ChatLane:
+    """Jobs of one chat; at most one of them is being sent at a time."""
+
+    __slots__ = ("jobs", "bucket", "busy", "paused_until", "version")
+
+    def __init__(self, bucket: TokenBucket):
+        self.jobs: List[_Job] = []
+        self.bucket = bucket
+        self.busy = False
+        self.paused_until = 0.0
+        self.version = 0
+
+
+class MessageQueue(BaseRateLimiter):
+    """Send and edit messages through one queue that respects Telegram's limits.
+
+    The queue is the rate limiter of the application's bot, so every
+    message the bot sends or edits passes it, whether through ``send`` and
+    ``edit`` or through ``reply_text``, ``edit_message_text`` and the like.
+    Every message passes a global token bucket (``global_rate`` per second)
+    and a bucket of its chat (``chat_rate`` per second, bursts of
+    ``chat_burst``). Ready chats are served by priority, taken from
+    ``rate_limit_args={"priority": ...}``, so interactive replies go out
+    before auto-mode notifications; within a chat, calls keep their order.
+    A 429 pauses the chat for the ``retry_after`` Telegram asks for and the
+    call is retried. An edit of a message that still has an edit waiting
+    replaces that edit, so only the latest text is sent. Other Bot API
+    calls, such as answering callback queries, are not held back.
+
+    When the queue is not running, calls go straight to the Bot API.
+    """
+
+    def __init__(
+        self,
+        bot: Optional[ExtBot] = None,
+        global_rate: float = 30.0,
+        chat_rate: float = 1.0,
+        chat_burst: int = 3,
+        max_in_flight: int = 30,
+        max_retries: int = 3
+    ):
+        self.bot = bot
+        self.chat_rate = chat_rate
+        self.chat_burst = chat_burst
+        self.max_in_flight = max_in_flight
+        self.max_retries = max_retries
+        self._global_rate = global_rate
+        self._global: Optional[TokenBucket] = None
+        self._lanes: Dict[Hashable, _ChatLane] = {}
+        self._pending_edits: Dict[Tuple[Hashable, ...], _Job] = {}
+        self._ready: List[Tuple[int, int, int, Hashable]] = []
+        self._delayed: List[Tuple[float, int, Hashable]] = []
+        self._seq = itertools.count()
+        self._unfinished = 0
+        self._idle: Optional[asyncio.Event] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._in_flight: Optional[asyncio.Semaphore] = None
+        self._worker: Optional[asyncio.Task] = None
+        self.stats: Dict[str, int] = {
+            "sent": 0,
+            "coalesced": 0,
+            "retried": 0,
+            "failed": 0
+        }
+
+    @property
+    def running(self) -> bool:
+        return self._worker is not None and not self._worker.done()
+
+    async def start(self) -> None:
+        """Start delivering queued calls."""
+        if self.running:
+            logger.warning("Message queue is already running")
+            return
+        loop = asyncio.get_running_loop()
+        self._global = TokenBucket(self._global_rate, self._global_rate, loop.time())
+        self._idle = asyncio.Event()
+        self._idle.set()
+        self._wakeup = asyncio.Event()
+        self._in_flight = asyncio.Semaphore(self.max_in_flight)
+        self._worker = asyncio.create_task(self._run())
+        logger.info("Message queue started")
+
+    async def stop(self, timeout: float = 10.0) -> None:
+        """Deliver what is queued within ``timeout`` seconds, then stop."""
+        if not self.running:
+            return
+        try:
+            await asyncio.wait_for(self._idle.wait(), timeout)
+        except asyncio.TimeoutError:
+            logger.warning(f"{self._unfinished} queued messages not delivered before shutdown")
+
+        worker, self._worker = self._worker, None
+        worker.cancel()
+        try:
+            await worker
+        except asyncio.CancelledError:
+            pass
+
+        for lane in self._lanes.values():
+            for job in lane.jobs:
+                self._fail(job, RuntimeError("Message queue stopped"))
+        self._lanes.clear()
+        self._pending_edits.clear()
+        self._ready.clear()
+        self._delayed.clear()
+        self._unfinished = 0
+        logger.info("Message queue stopped")
+
+    async def initialize(self) -> None:
+        # Started and stopped with the bot's other services, see start and stop
+        pass
+
+    async def shutdown(self) -> None:
+        pass
+
+    async def send(self, chat_id: Hashable, text: str, priority: int = INTERACTIVE, **kwargs) -> Any:
+        """Send a message and return it once it was delivered."""
+        return await self.bot.send_message(chat_id, text, rate_limit_args={"priority": priority}, **kwargs)
+
+    async def edit(self, chat_id: Hashable, message_id: int, text: str,
+                   priority: int = INTERACTIVE, **kwargs) -> Any:
+        """Edit a message; edits still waiting for the same message are replaced."""
+        return await self.bot.edit_message_text(
+            text, chat_id=chat_id, message_id=message_id, rate_limit_args={"priority": priority}, **kwargs
+        )
+
+    async def process_request(
+        self,
+        callback: Callable[..., Coroutine[Any, Any, Any]],
+        args: Any,
+        kwargs: Dict[str, Any],
+        endpoint: str,
+        data: Dict[str, Any],
+        rate_limit_args: Optional[Dict[str, Any]]
+    ) -> Any:
+        """Queue a Bot API request of the bot; called by ExtBot for every request."""
+        if not self.running or not is_queued(endpoint):
+            return await callback(*args, **kwargs)
+
+        priority = (rate_limit_args or {}).get("priority", INTERACTIVE)
+        chat_id = data.get("chat_id", data.get("inline_message_id"))
+        edit_key = None
+        if endpoint.startswith("edit"):
+            edit_key = (endpoint, chat_id, data.get("message_id"))
+            job = self._pending_edits.get(edit_key)
+            if job is not None:
+                # Superseded text is never sent; everyone waiting gets the final result
+                job.callback, job.args, job.kwargs = callback, args, kwargs
+                future = asyncio.get_running_loop().create_future()
+                job.futures.append(future)
+                self.stats["coalesced"] += 1
+                if priority < job.priority:
+                    job.priority = priority
+                    lane = self._lanes[chat_id]
+                    heapq.heapify(lane.jobs)
+                    self._reschedule(lane, chat_id)
+                return await future
+
+        job = _Job(callback, args, kwargs, priority, next(self._seq), edit_key=edit_key)
+        if edit_key is not None:
+            self._pending_edits[edit_key] = job
+        return await self._submit(chat_id, job)
+
+    async def _submit(self, chat_id: Hashable, job: _Job) -> Any:
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        job.futures.append(future)
+
+        lane = self._lanes.get(chat_id)
+        if lane is None:
+            lane = self._lanes[chat_id] = _ChatLane(TokenBucket(self.chat_rate, self.chat_burst, loop.time()))
+        heapq.heappush(lane.jobs, job)
+        self._unfinished += 1
+        self._idle.clear()
+        self._reschedule(lane, chat_id)
+        return await future
+
+    def _reschedule(self, lane: _ChatLane, chat_id: Hashable) -> None:
+        """Put the chat on the ready or delayed heap for its next job."""
+        if lane.busy or not lane.jobs:
+            return
+        # Older heap entries of this chat are now stale
+        lane.version += 1
+        now = asyncio.get_running_loop().time()
+        delay = max(lane.bucket.delay(now), lane.paused_until - now)
+        if delay > 0:
+            heapq.heappush(self._delayed, (now + delay, lane.version, chat_id))
+        else:
+            head = lane.jobs[0]
+            heapq.heappush(self._ready, (head.priority, head.seq, lane.version, chat_id))
+        self._wakeup.set()
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            now = loop.time()
+            while self._delayed and self._delayed[0][0] <= now:
+                _, version, chat_id = heapq.heappop(self._delayed)
+                lane = self._lanes.get(chat_id)
+                if lane is not None and lane.version == version:
+                    self._reschedule(lane, chat_id)
+
+            if not self._ready:
+                timeout = self._delayed[0][0] - now if self._delayed else None
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            delay = self._global.delay(now)
+            if delay > 0:
+                await asyncio.sleep(delay)
+                continue
+
+            await self._in_flight.acquire()
+            _, _, version, chat_id = heapq.heappop(self._ready)
+            lane = self._lanes.get(chat_id)
+            if lane is None or lane.version != version or lane.busy or not lane.jobs:
+                self._in_flight.release()
+                continue
+
+            job = heapq.heappop(lane.jobs)
+            if job.edit_key is not None and self._pending_edits.get(job.edit_key) is job:
+                del self._pending_edits[job.edit_key]
+            lane.busy = True
+            now = loop.time()
+            self._global.take(now)
+            lane.bucket.take(now)
+            asyncio.create_task(self._deliver(chat_id, lane, job))
+
+    async def _deliver(self, chat_id: Hashable, lane: _ChatLane, job: _Job) -> None:
+        finished = True
+        try:
+            result = await job.callback(*job.args, **job.kwargs)
+            self.stats["sent"] += 1
+            for future in job.futures:
+                if not future.done():
+                    future.set_result(result)
+        except RetryAfter as e:
+            retry_after = e.retry_after
+            retry_after = retry_after.total_seconds() if hasattr(retry_after, "total_seconds") else float(retry_after)
+            if job.attempts < self.max_retries:
+                job.attempts += 1
+                finished = False
+                self.stats["retried"] += 1
+                logger.warning(f"Flood limit hit in chat {chat_id}, retrying in {retry_after}s")
+                lane.paused_until = asyncio.get_running_loop().time() + retry_after
+                heapq.heappush(lane.jobs, job)
+                if job.edit_key is not None:
+                    self._pending_edits.setdefault(job.edit_key, job)
+            else:
+                self._fail(job, e)
+        except Exception as e:
+            self._fail(job, e)
+        finally:
+            lane.busy = False
+            self._in_flight.release()
+            if finished:
+                self._unfinished -= 1
+                if self._unfinished == 0:
+                    self._idle.set()
+            if lane.jobs:
+                self._reschedule(lane, chat_id)
+            else:
+                # Keep the bucket until it refilled, so an idle chat can't burst early
+                refill = (lane.bucket.capacity - lane.bucket.tokens) / lane.bucket.rate
+                asyncio.get_running_loop().call_later(refill, self._drop_idle_lane, chat_id)
+
+    def _drop_idle_lane(self, chat_id: Hashable) -> None:
+        lane = self._lanes.get(chat_id)
+        if lane is not None and not lane.busy and not lane.jobs:
+            del self._lanes[chat_id]
+
+    def _fail(self, job: _Job, error: Exception) -> None:
+        self.stats["failed"] += 1
+        for future in job.futures:
+            if not future.done():
+                future.set_exception(error)
@@ -0,0 +1,292 @@
+"""Multi-process sharding of users for the Artist Manager Bot."""
+from typing import Any, Dict, List, Optional
+import asyncio
+import json
+import multiprocessing
+import queue
+import signal
+import threading
+from pathlib import Path
+
+from telegram import Update
+from telegram.ext import Application, ApplicationBuilder
+
+from .update_processor import PerUserUpdateProcessor
+from ..utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# Put on a worker's queue to tell it to shut down
+STOP = None
+
+
+def shard_for(update: Update, shards: int) -> int:
+    """Return the shard owning an update; a user's updates always go to the same one."""
+    key = PerUserUpdateProcessor.ordering_key(update)
+    if key is None:
+        return 0
+    return key[1] % shards
+
+
+def shard_directory(data_dir: Path, shard: int) -> Path:
+    """Return the data directory of a worker."""
+    return Path(data_dir) / f"shard-{shard}"
+
+
+def check_shard_layout(data_dir: Path, shards: int) -> None:
+    """Make sure ``data_dir`` was written with ``shards`` workers, and record it.
+
+    Users are assigned to workers by ``user_id % shards`` and each worker
+    keeps its own persistence, so with another count users would find
+    their data missing. Directories written before the count was recorded
+    are recognised by their files: persistence files directly in
+    ``data_dir`` mean one process, ``shard-<n>`` directories mean workers.
+    """
+    data_dir = Path(data_dir)
+    layout_path = data_dir / "worker_shards"
+    if layout_path.exists():
+        recorded = int(layout_path.read_text().strip())
+    else:
+        numbers = [path.name[len("shard-"):] for path in data_dir.glob("shard-*")]
+        shard_numbers = [int(number) for number in numbers if number.isdigit()]
+        if shard_numbers:
+            recorded = max(shard_numbers) + 1
+        elif any(data_dir.glob("persistence*")):
+            recorded = 1
+        else:
+            recorded = shards
+
+    if recorded != shards:
+        raise ValueError(
+            f"{data_dir} holds the data of {recorded} worker shard(s), not {shards}; "
+            f"with another count users would lose their data. Set WORKER_SHARDS to {recorded}."
+        )
+    if not layout_path.exists():
+        data_dir.mkdir(parents=True, exist_ok=True)
+        temp_path = layout_path.with_suffix(".tmp")
+        temp_path.write_text(str(shards))
+        temp_path.replace(layout_path)
+
+
+class ShardReceiver:
+    """Feed updates routed by the front process into a worker's application.
+
+    A thread reads JSON updates from ``source`` and puts them on
+    ``Application.update_queue``, waiting while that queue is full, so a
+    slow worker fills its ``source`` queue and the front stops sending.
+    ``finished`` is set when the front sends ``STOP``.
+    """
+
+    def __init__(self, application: Application, source: Any, shard: int = 0):
+        self.application = application
+        self.source = source
+        self.shard = shard
+        self.finished = asyncio.Event()
+        self.received = 0
+        self._thread: Optional[threading.Thread] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self) -> None:
+        if self.running:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._thread = threading.Thread(target=self._read, name=f"shard-{self.shard}-receiver", daemon=True)
+        self._thread.start()
+        logger.info(f"Shard {self.shard} receiving updates from the front process")
+
+    def _read(self) -> None:
+        while True:
+            raw = self.source.get()
+            if raw is STOP:
+                break
+            try:
+                asyncio.run_coroutine_threadsafe(self._enqueue(raw), self._loop).result()
+            except RuntimeError:
+                # The event loop is gone, the worker is shutting down
+                return
+            except Exception as e:
+                logger.error(f"Shard {self.shard} could not queue an update: {e}")
+        self._loop.call_soon_threadsafe(self.finished.set)
+
+    async def _enqueue(self, raw: str) -> None:
+        update = Update.de_json(json.loads(raw), self.application.bot)
+        await self.application.update_queue.put(update)
+        self.received += 1
+
+
+def run_shard(shard: int, source: Any, bot_options: Dict[str, Any]) -> None:
+    """Entry point of a worker process, runs a Bot on one shard of the users."""
+    from ..utils.config import LOG_FORMAT, LOG_LEVEL
+    from ..utils.logger import setup_logging
+
+    setup_logging(level=LOG_LEVEL, format_str=LOG_FORMAT)
+    # The front process coordinates shutdown through the queue
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    signal.signal(signal.SIGTERM, signal.SIG_IGN)
+    asyncio.run(_run_shard(shard, source, bot_options))
+
+
+async def _run_shard(shard: int, source: Any, bot_options: Dict[str, Any]) -> None:
+    from .bot import Bot
+
+    bot = Bot(**bot_options, shard_options={"shard": shard, "source": source})
+    await bot.start()
+    try:
+        await bot.shard_receiver.finished.wait()
+        logger.info(f"Shard {shard} stopping after {bot.shard_receiver.received} updates")
+    finally:
+        await bot.stop()
+
+
+class ShardedFrontend:
+    """Receive updates in one process and handle them in ``shards`` worker processes.
+
+    The front process only polls or serves the webhook and routes every
+    update by user id to its worker. Each worker runs a full Bot with its
+    own persistence in ``data_dir/shard-<n>``, so a user's data, state and
+    update order live in exactly one process. Data of group chats is kept
+    separately by each shard whose users write there.
+
+    The shard count is part of the data, see ``check_shard_layout``.
+    ``bot_options`` are passed to every worker's Bot; they must be
+    picklable. Outgoing rate limits apply per process, so callers should
+    divide the global send rate by the number of shards.
+    """
+
+    def __init__(
+        self,
+        token: str,
+        data_dir: Path,
+        shards: int,
+        bot_options: Optional[Dict[str, Any]] = None,
+        webhook_options: Optional[Dict[str, Any]] = None,
+        max_queue_size: int = 1000
+    ):
+        if shards < 1:
+            raise ValueError("At least one shard is required")
+        self.token = token
+        self.data_dir = Path(data_dir)
+        self.shards = shards
+        self.bot_options = dict(bot_options or {})
+        self.webhook_options = dict(webhook_options or {})
+        self.max_queue_size = max_queue_size
+        self.webhook_server = None
+        self._context = multiprocessing.get_context("spawn")
+        self._queues: List[Any] = []
+        self._processes: List[Any] = []
+        self._router: Optional[asyncio.Task] = None
+        self._monitor: Optional[asyncio.Task] = None
+        self.stats: Dict[str, int] = {"routed": 0, "restarts": 0}
+
+        builder = ApplicationBuilder().token(token)
+        if self.bot_options.get("base_url"):
+            builder.base_url(self.bot_options["base_url"])
+        # Bounded so a backlog in the workers pushes back on Telegram
+        builder.update_queue(asyncio.Queue(maxsize=self.webhook_options.pop("max_queue_size", max_queue_size)))
+        self.application = builder.build()
+
+    def _spawn(self, shard: int):
+        options = {**self.bot_options, "token": self.token, "data_dir": shard_directory(self.data_dir, shard)}
+        trace_options = options.get("trace_options")
+        if trace_options and trace_options.get("path"):
+            # One trace file per process, rotation is not safe across processes
+            path = Path(trace_options["path"])
+            options["trace_options"] = {**trace_options, "path": str(path.with_name(f"{path.stem}-shard{shard}{path.suffix}"))}
+        process = self._context.Process(
+            target=run_shard,
+            args=(shard, self._queues[shard], options),
+            name=f"bot-shard-{shard}",
+            daemon=False
+        )
+        process.start()
+        logger.info(f"Started shard {shard} worker (pid {process.pid})")
+        return process
+
+    async def start(self) -> None:
+        """Start the workers, then receive updates."""
+        self._queues = [self._context.Queue(maxsize=self.max_queue_size) for _ in range(self.shards)]
+        self._processes = [self._spawn(shard) for shard in range(self.shards)]
+
+        # Only the bot is needed here; the application does not process updates
+        await self.application.initialize()
+        self._router = asyncio.create_task(self._route_updates())
+        self._monitor = asyncio.create_task(self._watch_workers())
+
+        if self.webhook_options:
+            from .webhook import WebhookServer
+            self.webhook_server = WebhookServer(self.application, **self.webhook_options)
+            # Updates the previous instance left to us are handled, not dropped
+            await self.webhook_server.start(drop_pending_updates=False)
+        else:
+            await self.application.updater.start_polling(drop_pending_updates=False)
+        logger.info(f"Routing updates to {self.shards} shards")
+
+    async def _route_updates(self) -> None:
+        update_queue = self.application.update_queue
+        while True:
+            update = await update_queue.get()
+            try:
+                await self._send(shard_for(update, self.shards), update.to_json())
+                self.stats["routed"] += 1
+            except Exception as e:
+                logger.error(f"Error routing update {update.update_id}: {e}", exc_info=True)
+            finally:
+                update_queue.task_done()
+
+    async def _send(self, shard: int, raw: Optional[str]) -> None:
+        worker_queue = self._queues[shard]
+        try:
+            worker_queue.put_nowait(raw)
+        except queue.Full:
+            # The worker is behind; wait in a thread so other shards keep flowing
+            await asyncio.to_thread(worker_queue.put, raw)
+
+    async def _watch_workers(self, interval: float = 5.0) -> None:
+        """Restart workers that died; they reload their shard from persistence."""
+        while True:
+            await asyncio.sleep(interval)
+            for shard, process in enumerate(self._processes):
+                if not process.is_alive():
+                    logger.error(f"Shard {shard} worker exited with code {process.exitcode}, restarting")
+                    self.stats["restarts"] += 1
+                    self._processes[shard] = self._spawn(shard)
+
+    async def stop(self, timeout: Optional[float] = None) -> None:
+        """Stop receiving, hand the queued updates to the workers and stop them.
+
+        Workers drain like a single bot does; one still running ``timeout``
+        seconds after it was told to stop is terminated.
+        """
+        if timeout is None:
+            timeout = self.bot_options.get("drain_timeout", 30.0) + 30.0
+        if self.webhook_server:
+            await self.webhook_server.stop()
+        elif self.application.updater and self.application.updater.running:
+            await self.application.updater.stop()
+
+        if self._monitor:
+            self._monitor.cancel()
+        if self._router:
+            try:
+                await asyncio.wait_for(self.application.update_queue.join(), timeout)
+            except asyncio.TimeoutError:
+                logger.warning(f"{self.application.update_queue.qsize()} updates were not routed")
+            self._router.cancel()
+            await asyncio.gather(self._router, self._monitor, return_exceptions=True)
+            self._router = self._monitor = None
+
+        for shard in range(len(self._processes)):
+            await self._send(shard, STOP)
+        for shard, process in enumerate(self._processes):
+            await asyncio.to_thread(process.join, timeout)
+            if process.is_alive():
+                logger.warning(f"Shard {shard} did not stop in {timeout}s, terminating")
+                process.terminate()
+        self._processes = []
+
+        await self.application.shutdown()
+        logger.info(f"Sharded front end stopped after routing {self.stats['routed']} updates")
@@ -0,0 +1,76 @@
+"""Update processor that keeps each user's updates in order."""
+from typing import Any, Awaitable, Dict, Hashable, Optional
+import asyncio
+
+from telegram import Update
+from telegram.ext import BaseUpdateProcessor
+
+from ..utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+class PerUserUpdateProcessor(BaseUpdateProcessor):
+    """Process updates of different users concurrently, each user's in order.
+
+    Up to ``max_concurrent_updates`` updates are handled at once. An update
+    from a user whose previous update is still being handled waits for it,
+    so conversation steps that change ``user_data`` never interleave.
+    Updates without a user fall back to the chat; updates with neither are
+    not ordered.
+    """
+
+    def __init__(self, max_concurrent_updates: int = 256):
+        super().__init__(max_concurrent_updates)
+        # Last queued update per user, done when that update was handled
+        self._tails: Dict[Hashable, asyncio.Future] = {}
+
+    @staticmethod
+    def ordering_key(update: Any) -> Optional[Hashable]:
+        """Return the key whose updates must be processed in order."""
+        if not isinstance(update, Update):
+            return None
+        if update.effective_user:
+            return ("user", update.effective_user.id)
+        if update.effective_chat:
+            return ("chat", update.effective_chat.id)
+        return None
+
+    @property
+    def pending_keys(self) -> int:
+        """Number of users with updates in flight."""
+        return len(self._tails)
+
+    async def do_process_update(self, update: object, coroutine: Awaitable[Any]) -> None:
+        # Called by process_update in a concurrency slot; slots are granted
+        # in arrival order, so this is also where the user's sequence is
+        # joined.
+        key = self.ordering_key(update)
+        if key is None:
+            await coroutine
+            return
+
+        previous = self._tails.get(key)
+        done = asyncio.get_running_loop().create_future()
+        self._tails[key] = done
+        try:
+            if previous is not None and not previous.done():
+                # Updates waiting behind the same user don't hold slots
+                # that other users could use
+                self._semaphore.release()
+                try:
+                    await asyncio.wait([previous])
+                finally:
+                    await self._semaphore.acquire()
+            await coroutine
+        finally:
+            done.set_result(None)
+            if self._tails.get(key) is done:
+                del self._tails[key]
+
+    async def initialize(self) -> None:
+        pass
+
+    async def shutdown(self) -> None:
+        if self._tails:
+            logger.warning(f"Shutting down with updates of {len(self._tails)} users in flight")
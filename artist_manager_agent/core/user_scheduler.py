@@ -0,0 +1,226 @@
+"""Per-user recurring work, such as auto mode, for the Artist Manager Bot."""
+from typing import Any, Awaitable, Callable, Dict, List, MutableMapping, Optional, Set, Tuple
+import asyncio
+import heapq
+import itertools
+import time
+
+from ..utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+UserCallback = Callable[[Dict[str, Any]], Awaitable[Any]]
+
+
+class UserScheduler:
+    """Run a callback for every enrolled user, each at the user's own interval.
+
+    All users share one heap of next-run times, so enrolling a user,
+    changing the interval or removing the user is O(log n). The scheduler
+    sleeps until the earliest run is due or the schedule changes, so many
+    idle users cost no CPU. Due users are handed to ``workers`` worker
+    tasks through a queue of the same size; when all workers are busy,
+    due users wait in the heap. A user's runs never overlap, and the next
+    run is due ``interval`` seconds after the previous one was, or right
+    away when the scheduler has fallen behind.
+
+    Users are plain records in a mapping, keyed by user id, with the chat
+    to report to and a ``data`` dict the callback may keep state in. The
+    callback gets the record. Like pending background jobs, the records
+    are normally kept in ``bot_data`` and scheduled again by ``attach``
+    after a restart. As with BackgroundJobQueue, the owner runs
+    ``run_scheduler`` and ``workers`` copies of ``run_worker`` as tasks and
+    calls ``drain`` before stopping them.
+    """
+
+    def __init__(self, callback: UserCallback, workers: int = 8):
+        if workers < 1:
+            raise ValueError("At least one worker is required")
+        self.callback = callback
+        self.workers = workers
+        self._users: MutableMapping[int, Dict[str, Any]] = {}
+        self._scheduled: List[Tuple[float, int, int]] = []
+        self._ready: asyncio.Queue = asyncio.Queue(maxsize=workers)
+        self._changed = asyncio.Event()
+        self._seq = itertools.count()
+        self._running: Set[int] = set()
+        self._draining = False
+        self._idle = asyncio.Event()
+        self._idle.set()
+        self.stats: Dict[str, int] = {
+            "runs": 0,
+            "failed": 0
+        }
+
+    def attach(self, store: MutableMapping[int, Dict[str, Any]], catch_up_rate: float = 5.0) -> int:
+        """Keep user records in ``store`` and schedule the ones it already holds.
+
+        Runs missed while the bot was down are made up once per user, not
+        all at once: overdue users start in the order they were due,
+        ``catch_up_rate`` per second.
+        """
+        pending = dict(self._users)
+        self._users = store
+        restored = len(store)
+        # Users enrolled before the store was available
+        for user_id, record in pending.items():
+            store.setdefault(user_id, record)
+
+        now = time.time()
+        overdue = sorted((record for record in store.values() if record["next_run"] < now), key=lambda record: record["next_run"])
+        for index, record in enumerate(overdue):
+            record["next_run"] = now + index / catch_up_rate
+        self._scheduled = [(record["next_run"], next(self._seq), user_id) for user_id, record in store.items()]
+        heapq.heapify(self._scheduled)
+        self._changed.set()
+
+        if restored:
+            logger.info(f"Restored {restored} scheduled users, {len(overdue)} overdue")
+        return restored
+
+    def enable(
+        self,
+        user_id: int,
+        chat_id: int,
+        interval: float,
+        delay: Optional[float] = None,
+        data: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
+        """Enroll a user, first run after ``delay`` seconds (default: now).
+
+        Enabling an enrolled user updates the chat, interval and data but
+        keeps the user's place in the schedule.
+        """
+        record = self._users.get(user_id)
+        if record is not None:
+            record["chat_id"] = chat_id
+            if data is not None:
+                record["data"] = data
+            self.set_interval(user_id, interval)
+            return record
+        record = {
+            "user_id": user_id,
+            "chat_id": chat_id,
+            "interval": interval,
+            "next_run": time.time() + (delay or 0.0),
+            "last_run": None,
+            "data": data or {}
+        }
+        self._users[user_id] = record
+        self._schedule(record)
+        return record
+
+    def disable(self, user_id: int) -> bool:
+        """Remove a user; a run in progress finishes but is not repeated."""
+        return self._users.pop(user_id, None) is not None
+
+    def set_interval(self, user_id: int, interval: float) -> None:
+        """Change a user's interval, counted from the last run."""
+        record = self._users.get(user_id)
+        if record is None or record["interval"] == interval:
+            return
+        record["interval"] = interval
+        # A running user is rescheduled when the run ends
+        if record["last_run"] is None or user_id in self._running:
+            return
+        record["next_run"] = max(time.time(), record["last_run"] + interval)
+        self._schedule(record)
+
+    def get(self, user_id: int) -> Optional[Dict[str, Any]]:
+        return self._users.get(user_id)
+
+    def __contains__(self, user_id: int) -> bool:
+        return user_id in self._users
+
+    def __len__(self) -> int:
+        return len(self._users)
+
+    async def drain(self, timeout: float = 30.0) -> int:
+        """Start no more runs and wait up to ``timeout`` for running ones.
+
+        Returns the number of enrolled users.
+        """
+        self._draining = True
+        self._changed.set()
+        if self._running:
+            logger.info(f"Waiting for {len(self._running)} running user cycles")
+            try:
+                await asyncio.wait_for(self._idle.wait(), timeout)
+            except asyncio.TimeoutError:
+                logger.warning(f"{len(self._running)} user cycles still running after {timeout}s")
+        return len(self._users)
+
+    def _schedule(self, record: Dict[str, Any]) -> None:
+        # Superseded entries are skipped when popped; drop them once they
+        # outnumber the live ones, e.g. after many interval changes
+        if len(self._scheduled) > 2 * len(self._users) + 1024:
+            self._compact()
+        heapq.heappush(self._scheduled, (record["next_run"], next(self._seq), record["user_id"]))
+        self._changed.set()
+
+    def _compact(self) -> None:
+        live = []
+        for entry in self._scheduled:
+            record = self._users.get(entry[2])
+            if record is not None and record["next_run"] == entry[0]:
+                live.append(entry)
+        heapq.heapify(live)
+        self._scheduled = live
+
+    async def run_scheduler(self) -> None:
+        """Hand users to the workers when their run becomes due."""
+        while not self._draining:
+            now = time.time()
+            while self._scheduled and self._scheduled[0][0] <= now and not self._draining:
+                next_run, _, user_id = heapq.heappop(self._scheduled)
+                record = self._users.get(user_id)
+                # Skip removed users and entries of an earlier schedule
+                if record is None or record["next_run"] != next_run:
+                    continue
+                # Blocks while all workers are busy
+                await self._ready.put((user_id, next_run))
+                now = time.time()
+
+            timeout = self._scheduled[0][0] - now if self._scheduled else None
+            self._changed.clear()
+            try:
+                await asyncio.wait_for(self._changed.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+
+    async def run_worker(self) -> None:
+        """Run due users one at a time."""
+        while True:
+            user_id, next_run = await self._ready.get()
+            record = self._users.get(user_id)
+            if self._draining or record is None or record["next_run"] != next_run:
+                continue
+            if user_id in self._running:
+                # Re-enabled while the previous run is still going
+                record["next_run"] = time.time() + record["interval"]
+                self._schedule(record)
+                continue
+            self._running.add(user_id)
+            self._idle.clear()
+            try:
+                await self._run(record)
+            finally:
+                self._running.discard(user_id)
+                if not self._running:
+                    self._idle.set()
+
+    async def _run(self, record: Dict[str, Any]) -> None:
+        record["last_run"] = time.time()
+        try:
+            await self.callback(record)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"Scheduled run for user {record['user_id']} failed: {e}", exc_info=True)
+            self.stats["failed"] += 1
+        else:
+            self.stats["runs"] += 1
+
+        if self._users.get(record["user_id"]) is record:
+            record["next_run"] = max(time.time(), record["next_run"] + record["interval"])
+            self._schedule(record)
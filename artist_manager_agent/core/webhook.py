@@ -0,0 +1,155 @@
+"""Webhook front end for the Artist Manager Bot."""
+from typing import Any, Dict, Optional
+import asyncio
+import hmac
+import json
+import secrets
+
+from aiohttp import web
+from telegram import Update
+from telegram.ext import Application
+
+from ..utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+SECRET_HEADER = "X-Telegram-Bot-Api-Secret-Token"
+
+
+class WebhookServer:
+    """Receive Telegram updates over HTTP and queue them for the application.
+
+    Each POST to ``url_path`` is checked against the secret token, parsed
+    and put on ``Application.update_queue``; the response is sent as soon as
+    the update is queued, not after it was handled. When the queue is
+    bounded and stays full for ``enqueue_timeout`` seconds, the request is
+    answered with 503 so Telegram delivers the update again later.
+    """
+
+    def __init__(
+        self,
+        application: Application,
+        webhook_url: Optional[str] = None,
+        listen: str = "0.0.0.0",
+        port: int = 8443,
+        url_path: str = "telegram",
+        secret_token: Optional[str] = None,
+        enqueue_timeout: float = 5.0
+    ):
+        self.application = application
+        self.webhook_url = webhook_url
+        self.listen = listen
+        self.port = port
+        self.url_path = "/" + url_path.strip("/")
+        # Telegram sends the secret with every update; never run without one
+        self.secret_token = secret_token or secrets.token_urlsafe(32)
+        self.enqueue_timeout = enqueue_timeout
+        self._runner: Optional[web.AppRunner] = None
+        self.stats: Dict[str, int] = {
+            "received": 0,
+            "queued": 0,
+            "rejected": 0,
+            "invalid": 0,
+            "overloaded": 0
+        }
+
+    @property
+    def running(self) -> bool:
+        return self._runner is not None
+
+    def _build_app(self) -> web.Application:
+        app = web.Application()
+        app.router.add_post(self.url_path, self._handle_update)
+        app.router.add_get("/healthz", self._handle_health)
+        return app
+
+    async def start(self, drop_pending_updates: bool = False, max_connections: int = 40) -> None:
+        """Start listening and, if a public URL is set, register it with Telegram.
+
+        Updates Telegram still holds, e.g. ones a previous instance did not
+        fetch, are delivered unless ``drop_pending_updates`` is set.
+        """
+        if self.running:
+            logger.warning("Webhook server is already running")
+            return
+
+        runner = web.AppRunner(self._build_app(), access_log=None)
+        await runner.setup()
+        site = web.TCPSite(runner, self.listen, self.port)
+        try:
+            await site.start()
+        except Exception:
+            await runner.cleanup()
+            raise
+        self._runner = runner
+
+        # Report the actual port when an ephemeral one was requested
+        self.port = runner.addresses[0][1]
+        logger.info(f"Webhook server listening on {self.listen}:{self.port}{self.url_path}")
+
+        if self.webhook_url:
+            url = self.webhook_url.rstrip("/") + self.url_path
+            await self.application.bot.set_webhook(
+                url=url,
+                secret_token=self.secret_token,
+                drop_pending_updates=drop_pending_updates,
+                max_connections=max_connections,
+                allowed_updates=Update.ALL_TYPES
+            )
+            logger.info(f"Registered webhook {url}")
+
+    async def stop(self) -> None:
+        """Stop accepting updates; updates already queued are left to the application."""
+        if not self.running:
+            return
+        runner, self._runner = self._runner, None
+        try:
+            await runner.cleanup()
+            logger.info("Webhook server stopped")
+        except Exception as e:
+            logger.error(f"Error stopping webhook server: {str(e)}")
+
+    async def _handle_update(self, request: web.Request) -> web.Response:
+        self.stats["received"] += 1
+        token = request.headers.get(SECRET_HEADER, "")
+        if not hmac.compare_digest(token.encode(), self.secret_token.encode()):
+            self.stats["rejected"] += 1
+            return web.Response(status=403)
+
+        try:
+            data = json.loads(await request.read())
+            update = Update.de_json(data, self.application.bot)
+        except Exception as e:
+            self.stats["invalid"] += 1
+            logger.error(f"Invalid update received on webhook: {str(e)}")
+            return web.Response(status=400)
+
+        if not await self._enqueue(update):
+            self.stats["overloaded"] += 1
+            return web.Response(status=503, headers={"Retry-After": str(max(1, int(self.enqueue_timeout)))})
+
+        self.stats["queued"] += 1
+        return web.Response()
+
+    async def _enqueue(self, update: Update) -> bool:
+        """Queue an update, waiting up to enqueue_timeout while the queue is full."""
+        queue = self.application.update_queue
+        try:
+            queue.put_nowait(update)
+            return True
+        except asyncio.QueueFull:
+            pass
+        try:
+            await asyncio.wait_for(queue.put(update), self.enqueue_timeout)
+            return True
+        except asyncio.TimeoutError:
+            logger.warning(f"Update queue full for {self.enqueue_timeout}s, asking Telegram to retry")
+            return False
+
+    async def _handle_health(self, request: web.Request) -> web.Response:
+        body: Dict[str, Any] = {
+            "status": "ok",
+            "queue_size": self.application.update_queue.qsize(),
+            **self.stats
+        }
+        return web.json_response(body)
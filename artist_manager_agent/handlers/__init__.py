@@ -1,28 +1,26 @@
 """Handler package for the Artist Manager Bot."""
 from .core.base_handler import BaseBotHandler
 from .utils.handler_registry import HandlerRegistry
-from .features.goal_handlers import GoalHandlers
-from .features.task_handlers import TaskHandlers
-from .features.onboarding_handlers import OnboardingHandlers
-from .features.project_handlers import ProjectHandlers
-from .features.team_handlers import TeamHandlers
-from .features.music_handlers import MusicHandlers
-from .features.blockchain_handlers import BlockchainHandlers
-from .features.auto_handlers import AutoHandlers
-from .features.home_handler import HomeHandlers
-from .features.name_change_handler import NameChangeHandlers
+from ..utils.lazy import lazy_module_getattr
+
+# Feature handlers are imported when first accessed, see FeatureRegistry
+_LAZY_IMPORTS = {
+    "GoalHandlers": ".features.goal_handlers",
+    "TaskHandlers": ".features.task_handlers",
+    "OnboardingHandlers": ".features.onboarding_handlers",
+    "ProjectHandlers": ".features.project_handlers",
+    "TeamHandlers": ".features.team_handlers",
+    "MusicHandlers": ".features.music_handlers",
+    "BlockchainHandlers": ".features.blockchain_handlers",
+    "AutoHandlers": ".features.auto_handlers",
+    "HomeHandlers": ".features.home_handler",
+    "NameChangeHandlers": ".features.name_change_handler"
+}
+
+__getattr__ = lazy_module_getattr(__name__, _LAZY_IMPORTS)
 
 __all__ = [
     "BaseBotHandler",
     "HandlerRegistry",
-    "GoalHandlers",
-    "TaskHandlers",
-    "OnboardingHandlers",
-    "ProjectHandlers",
-    "TeamHandlers",
-    "MusicHandlers",
-    "BlockchainHandlers",
-    "AutoHandlers",
-    "HomeHandlers",
-    "NameChangeHandlers"
-] 
\ No newline at end of file
+    *_LAZY_IMPORTS
+]
@@ -21,6 +21,10 @@ class BaseBotHandler(ABC):
         """Get all handlers for this module."""
         pass
 
+    def register_callbacks(self, router) -> None:
+        """Register this module's callback routes with the bot's CallbackRouter."""
+        pass
+
     @abstractmethod
     async def handle_callback(self, update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
         """Handle callback queries."""
@@ -32,7 +36,8 @@ class BaseBotHandler(ABC):
         pass
 
     async def _send_or_edit_message(self, update: Update, text: str, reply_markup=None, parse_mode=None) -> None:
-        """Helper to consistently send or edit messages."""
+        """Helper to consistently send or edit messages through the bot's message queue."""
+        queue = self.bot.message_queue
         try:
             handler_name = self.__class__.__name__
             logger.info(f"{handler_name}: Processing message operation")
@@ -46,7 +51,8 @@ class BaseBotHandler(ABC):
                 )
             else:
                 logger.debug(f"{handler_name}: Sending new message")
-                await update.effective_message.reply_text(
+                await queue.send(
+                    update.effective_chat.id,
                     text,
                     reply_markup=reply_markup,
                     parse_mode=parse_mode
@@ -59,7 +65,8 @@ class BaseBotHandler(ABC):
             try:
                 # Try to send a new message if edit fails
                 logger.info(f"{handler_name}: Attempting fallback message send")
-                await update.effective_message.reply_text(
+                await queue.send(
+                    update.effective_chat.id,
                     text,
                     reply_markup=reply_markup,
                     parse_mode=parse_mode
@@ -68,7 +75,8 @@ class BaseBotHandler(ABC):
                 logger.error(f"{handler_name}: Fallback message also failed: {str(e2)}")
                 # If both attempts fail, try to send a simple error message
                 try:
-                    await update.effective_message.reply_text(
+                    await queue.send(
+                        update.effective_chat.id,
                         "Sorry, something went wrong. Please try again."
                     )
                 except:
@@ -36,7 +36,8 @@ class CoreHandlers(BaseBotHandler):
             # Check bot status
             status = {
                 "bot_running": self.bot._running,
-                "handlers_initialized": all(hasattr(self.bot, h) for h in [
+                # Registered is enough, lazy features are loaded on first use
+                "handlers_initialized": all(h in self.bot.features for h in [
                     'onboarding', 'core', 'home', 'goals', 'tasks', 'projects', 'music', 'team'
                 ]),
                 "persistence_available": hasattr(self.bot, 'persistence'),
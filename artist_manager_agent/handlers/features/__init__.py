@@ -1,24 +1,23 @@
-"""Feature-specific handlers for the Artist Manager Bot."""
-from .goal_handlers import GoalHandlers
-from .task_handlers import TaskHandlers
-from .project_handlers import ProjectHandlers
-from .music_handlers import MusicHandlers
-from .blockchain_handlers import BlockchainHandlers
-from .auto_handlers import AutoHandlers
-from .team_handlers import TeamHandlers
-from .name_change_handler import NameChangeHandlers
-from .onboarding_handlers import OnboardingHandlers
-from .home_handler import HomeHandlers
+"""Feature-specific handlers for the Artist Manager Bot.
 
-__all__ = [
-    "GoalHandlers",
-    "TaskHandlers",
-    "ProjectHandlers",
-    "MusicHandlers",
-    "BlockchainHandlers",
-    "AutoHandlers",
-    "TeamHandlers",
-    "NameChangeHandlers",
-    "OnboardingHandlers",
-    "HomeHandlers"
-] 
\ No newline at end of file
+Handler modules are imported when first accessed, so importing one
+feature does not import all of them.
+"""
+from ...utils.lazy import lazy_module_getattr
+
+_LAZY_IMPORTS = {
+    "GoalHandlers": ".goal_handlers",
+    "TaskHandlers": ".task_handlers",
+    "ProjectHandlers": ".project_handlers",
+    "MusicHandlers": ".music_handlers",
+    "BlockchainHandlers": ".blockchain_handlers",
+    "AutoHandlers": ".auto_handlers",
+    "TeamHandlers": ".team_handlers",
+    "NameChangeHandlers": ".name_change_handler",
+    "OnboardingHandlers": ".onboarding_handlers",
+    "HomeHandlers": ".home_handler"
+}
+
+__getattr__ = lazy_module_getattr(__name__, _LAZY_IMPORTS)
+
+__all__ = list(_LAZY_IMPORTS)
@@ -2,7 +2,6 @@
 from datetime import datetime
 import uuid
 import logging
-import asyncio
 from typing import Dict, Optional, List
 from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup, Message, ForceReply
 from telegram.ext import (
@@ -31,8 +30,6 @@ class AutoHandlers(BaseBotHandler):
     def __init__(self, bot):
         super().__init__(bot)
         self.group = 7  # Set handler group
-        self._auto_mode = False
-        self._auto_task = None
         self._default_settings = {
             "frequency": 3600,  # 1 hour
             "ai_level": "balanced",
@@ -80,29 +77,23 @@ class AutoHandlers(BaseBotHandler):
             allow_reentry=True
         )
 
+    def register_callbacks(self, router) -> None:
+        """Register auto mode callback routes."""
+        router.add_route("auto", "menu", self.show_menu)
+        router.add_route("auto", "enable", self._enable_auto_mode)
+        router.add_route("auto", "disable", self._disable_auto_mode)
+        router.add_route("auto", "configure", self._show_configure_options)
+        router.add_route("auto", "status", self._show_status)
+        router.set_fallback("auto", self.show_menu)
+
     async def handle_callback(self, update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
         """Handle auto mode-related callbacks."""
         query = update.callback_query
         await query.answer()
         
         try:
-            # Handle both auto_ and menu_auto patterns
-            action = query.data.replace("menu_auto", "menu").replace("auto_", "").strip("_")
-            logger.info(f"Auto mode handler processing callback: {query.data} -> {action}")
-            
-            if action == "menu" or action == "":
-                await self.show_menu(update, context)
-            elif action == "enable":
-                await self._enable_auto_mode(update, context)
-            elif action == "disable":
-                await self._disable_auto_mode(update, context)
-            elif action == "configure":
-                await self._show_configure_options(update, context)
-            elif action == "status":
-                await self._show_status(update, context)
-            else:
-                logger.warning(f"Unknown auto mode action: {action}")
-                await self.show_menu(update, context)
+            logger.info(f"Auto mode handler processing callback: {query.data}")
+            await self.bot.callback_router.dispatch(update, context)
                 
         except Exception as e:
             logger.error(f"Error in auto mode callback handler: {str(e)}", exc_info=True)
@@ -138,6 +129,8 @@ class AutoHandlers(BaseBotHandler):
 
     async def _enable_auto_mode(self, update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
         """Enable auto mode."""
+        self.bot.auto_mode.enable(update.effective_user.id, update.effective_chat.id, context.user_data)
+        
         keyboard = [
             [
                 InlineKeyboardButton("Configure", callback_data="auto_configure"),
@@ -159,6 +152,8 @@ class AutoHandlers(BaseBotHandler):
 
     async def _disable_auto_mode(self, update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
         """Disable auto mode."""
+        self.bot.auto_mode.disable(update.effective_user.id)
+        
         keyboard = [[InlineKeyboardButton("« Back", callback_data="auto_menu")]]
         
         await self._send_or_edit_message(
@@ -192,10 +187,12 @@ class AutoHandlers(BaseBotHandler):
         """Show current auto mode status."""
         try:
             settings = context.user_data.get("auto_settings", self._default_settings)
+            record = self.bot.auto_mode.scheduler.get(update.effective_user.id)
+            enabled = record is not None
             
-            status = "🟢 Enabled" if self._auto_mode else "🔴 Disabled"
-            last_check = getattr(self, "_last_check", None)
-            last_check_str = last_check.strftime("%Y-%m-%d %H:%M:%S") if last_check else "Never"
+            status = "🟢 Enabled" if enabled else "🔴 Disabled"
+            last_check = record["last_run"] if record else None
+            last_check_str = datetime.fromtimestamp(last_check).strftime("%Y-%m-%d %H:%M:%S") if last_check else "Never"
             
             message = (
                 f"🤖 Auto Mode Status: {status}\n\n"
@@ -211,8 +208,8 @@ class AutoHandlers(BaseBotHandler):
             
             keyboard = [
                 [
-                    InlineKeyboardButton("Enable" if not self._auto_mode else "Disable",
-                                       callback_data="auto_enable" if not self._auto_mode else "auto_disable")
+                    InlineKeyboardButton("Enable" if not enabled else "Disable",
+                                       callback_data="auto_enable" if not enabled else "auto_disable")
                 ],
                 [InlineKeyboardButton("Configure Settings", callback_data="auto_configure")],
                 [InlineKeyboardButton("« Back", callback_data="auto_menu")]
@@ -228,40 +225,6 @@ class AutoHandlers(BaseBotHandler):
             logger.error(f"Error showing auto mode status: {str(e)}")
             await self._handle_error(update)
 
-    async def _process_tasks(self, update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
-        """Background task for auto mode processing."""
-        user_id = update.effective_user.id
-        
-        while self._auto_mode:
-            try:
-                # Get user profile and settings
-                profile = self.bot.profiles.get(user_id)
-                settings = context.user_data.get("auto_settings", self._default_settings)
-                
-                if profile:
-                    # Process goals and create tasks
-                    await self._process_goals(update, context, profile)
-                    
-                    # Check project deadlines
-                    await self._check_deadlines(update, context)
-                    
-                    # Analyze performance metrics
-                    await self._analyze_metrics(update, context, profile)
-                    
-                    # Generate insights and suggestions
-                    await self._generate_insights(update, context, profile)
-                    
-                    # Update last check time
-                    self._last_check = datetime.now()
-                
-                # Wait before next check based on settings
-                freq = settings.get("frequency", self._default_settings["frequency"])
-                await asyncio.sleep(freq)
-                
-            except Exception as e:
-                logger.error(f"Error in auto mode processing: {str(e)}")
-                await asyncio.sleep(300)  # Wait 5 minutes on error
-
     async def cancel_auto_setup(self, update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
         """Cancel auto mode setup."""
         context.user_data.clear()
@@ -278,6 +241,7 @@ class AutoHandlers(BaseBotHandler):
                 hours = int(text)
                 if 1 <= hours <= 24:
                     context.user_data["auto_settings"]["frequency"] = hours * 3600
+                    self.bot.auto_mode.update_settings(update.effective_user.id, context.user_data["auto_settings"])
                     
                     keyboard = [
                         [
@@ -311,6 +275,7 @@ class AutoHandlers(BaseBotHandler):
             level = update.message.text.lower()
             if level in ["conservative", "balanced", "proactive"]:
                 context.user_data["auto_settings"]["ai_level"] = level
+                self.bot.auto_mode.update_settings(update.effective_user.id, context.user_data["auto_settings"])
                 
                 keyboard = [
                     [
@@ -344,6 +309,7 @@ class AutoHandlers(BaseBotHandler):
             level = update.message.text.lower()
             if level in ["all", "important", "minimal"]:
                 context.user_data["auto_settings"]["notifications"] = level
+                self.bot.auto_mode.update_settings(update.effective_user.id, context.user_data["auto_settings"])
                 
                 # Save settings
                 settings = context.user_data["auto_settings"]
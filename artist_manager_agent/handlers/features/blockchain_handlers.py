@@ -101,29 +101,23 @@ class BlockchainHandlers(BaseBotHandler):
             allow_reentry=True
         )
 
+    def register_callbacks(self, router) -> None:
+        """Register blockchain callback routes."""
+        router.add_route("blockchain", "menu", self.show_menu)
+        router.add_route("blockchain", "wallet", self._show_wallet)
+        router.add_route("blockchain", "nft", self._show_nft_options)
+        router.add_route("blockchain", "contracts", self._show_contract_options)
+        router.add_route("blockchain", "analytics", self._show_blockchain_analytics)
+        router.set_fallback("blockchain", self.show_menu)
+
     async def handle_callback(self, update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
         """Handle blockchain-related callbacks."""
         query = update.callback_query
         await query.answer()
         
         try:
-            # Handle both blockchain_ and menu_blockchain patterns
-            action = query.data.replace("menu_blockchain", "menu").replace("blockchain_", "").strip("_")
-            logger.info(f"Blockchain handler processing callback: {query.data} -> {action}")
-            
-            if action == "menu" or action == "":
-                await self.show_menu(update, context)
-            elif action == "wallet":
-                await self._show_wallet(update, context)
-            elif action == "nft":
-                await self._show_nft_options(update, context)
-            elif action == "contracts":
-                await self._show_contract_options(update, context)
-            elif action == "analytics":
-                await self._show_blockchain_analytics(update, context)
-            else:
-                logger.warning(f"Unknown blockchain action: {action}")
-                await self.show_menu(update, context)
+            logger.info(f"Blockchain handler processing callback: {query.data}")
+            await self.bot.callback_router.dispatch(update, context)
                 
         except Exception as e:
             logger.error(f"Error in blockchain callback handler: {str(e)}", exc_info=True)
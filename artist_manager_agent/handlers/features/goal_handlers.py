@@ -39,21 +39,22 @@ class GoalHandlers(BaseBotHandler):
             CallbackQueryHandler(self.handle_callback, pattern="^goal_")
         ]
 
+    def register_callbacks(self, router) -> None:
+        """Register goal callback routes."""
+        router.add_route("goal", "create", lambda update, context: self.start_goal_creation(update.callback_query.message, context))
+        router.add_route("goal", "view", lambda update, context, goal_id: self.view_goal(goal_id, update, context), with_id=True)
+        router.add_route("goal", "add_task", lambda update, context, goal_id: self.add_task_to_goal(goal_id, update, context), with_id=True)
+        router.add_route("goals", "", self.show_menu)
+
     async def handle_callback(self, update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
         """Handle callback queries."""
         query = update.callback_query
         await query.answer()
         
-        if query.data == "goal_create":
-            await self.start_goal_creation(query.message, context)
-        elif query.data.startswith("goal_view_"):
-            goal_id = query.data.replace("goal_view_", "")
-            await self.view_goal(goal_id, update, context)
-        elif query.data.startswith("goal_add_task_"):
-            goal_id = query.data.replace("goal_add_task_", "")
-            await self.add_task_to_goal(goal_id, update, context)
-        elif query.data == "goals":
-            await self.show_menu(update, context)
+        try:
+            await self.bot.callback_router.dispatch(update, context)
+        except LookupError:
+            logger.debug(f"Goal handler ignoring callback: {query.data}")
 
     async def show_menu(self, update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
         """Show the main menu for goals."""
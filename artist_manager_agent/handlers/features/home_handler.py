@@ -28,39 +28,39 @@ class HomeHandlers(BaseBotHandler):
             CallbackQueryHandler(self.handle_callback, pattern="^(home_menu|home_.*|menu_.*|dashboard_view)$")
         ]
 
+    def register_callbacks(self, router) -> None:
+        """Register home callback routes; ``home_`` and ``menu_`` are interchangeable."""
+        # Feature menus are looked up on use, handlers may be replaced at runtime
+        def feature_menu(attr_name):
+            return lambda update, context: getattr(self.bot, attr_name).show_menu(update, context)
+
+        routes = {
+            "": self.show_menu,
+            "menu": self.show_menu,
+            "dashboard": self.show_dashboard,
+            "profile": self._show_profile,
+            "goals": feature_menu("goals"),
+            "tasks": feature_menu("tasks"),
+            "projects": feature_menu("projects"),
+            "music": feature_menu("music"),
+            "team": feature_menu("team"),
+            "auto": feature_menu("auto"),
+            "blockchain": feature_menu("blockchain")
+        }
+        for namespace in ("home", "menu"):
+            for action, callback in routes.items():
+                router.add_route(namespace, action, callback)
+            router.set_fallback(namespace, self.show_menu)
+        router.add_route("dashboard", "view", self.show_dashboard)
+
     async def handle_callback(self, update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
         """Handle home-related callbacks."""
         query = update.callback_query
         await query.answer()
         
         try:
-            # Handle both home_ and menu_ patterns
-            action = query.data.replace("menu_", "").replace("home_", "").strip("_")
-            logger.info(f"Home handler processing callback: {query.data} -> {action}")
-            
-            if action == "menu" or action == "":
-                await self.show_menu(update, context)
-            elif action == "dashboard" or query.data == "dashboard_view":
-                await self.show_dashboard(update, context)
-            elif action == "goals":
-                await self.bot.goal_handlers.show_menu(update, context)
-            elif action == "tasks":
-                await self.bot.task_handlers.show_menu(update, context)
-            elif action == "projects":
-                await self.bot.project_handlers.show_menu(update, context)
-            elif action == "music":
-                await self.bot.music_handlers.show_menu(update, context)
-            elif action == "team":
-                await self.bot.team_handlers.show_menu(update, context)
-            elif action == "auto":
-                await self.bot.auto_handlers.show_menu(update, context)
-            elif action == "blockchain":
-                await self.bot.blockchain_handlers.show_menu(update, context)
-            elif action == "profile":
-                await self._show_profile(update, context)
-            else:
-                logger.warning(f"Unknown home action: {action}")
-                await self.show_menu(update, context)
+            logger.info(f"Home handler processing callback: {query.data}")
+            await self.bot.callback_router.dispatch(update, context)
                 
         except Exception as e:
             logger.error(f"Error in home callback handler: {str(e)}", exc_info=True)
@@ -27,32 +27,24 @@ class MusicHandlers(BaseBotHandler):
             CallbackQueryHandler(self.handle_callback, pattern="^(menu_music|music_.*|music_menu)$")
         ]
 
+    def register_callbacks(self, router) -> None:
+        """Register music callback routes."""
+        router.add_route("music", "menu", self.show_menu)
+        router.add_route("music", "upload", self._show_upload_options)
+        router.add_route("music", "catalog", self._show_catalog)
+        router.add_route("music", "analytics", self._show_music_analytics)
+        router.add_route("music", "distribution", self._show_distribution_options)
+        router.add_route("music", "track", self._show_track_management, with_id=True)
+        router.set_fallback("music", self.show_menu)
+
     async def handle_callback(self, update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
         """Handle music-related callbacks."""
         query = update.callback_query
         await query.answer()
         
         try:
-            # Handle both music_ and menu_music patterns
-            action = query.data.replace("menu_music", "menu").replace("music_", "").strip("_")
-            logger.info(f"Music handler processing callback: {query.data} -> {action}")
-            
-            if action == "menu" or action == "":
-                await self.show_menu(update, context)
-            elif action == "upload":
-                await self._show_upload_options(update, context)
-            elif action == "catalog":
-                await self._show_catalog(update, context)
-            elif action == "analytics":
-                await self._show_music_analytics(update, context)
-            elif action == "distribution":
-                await self._show_distribution_options(update, context)
-            elif action.startswith("track_"):
-                track_id = action.replace("track_", "")
-                await self._show_track_management(update, context, track_id)
-            else:
-                logger.warning(f"Unknown music action: {action}")
-                await self.show_menu(update, context)
+            logger.info(f"Music handler processing callback: {query.data}")
+            await self.bot.callback_router.dispatch(update, context)
                 
         except Exception as e:
             logger.error(f"Error in music callback handler: {str(e)}", exc_info=True)
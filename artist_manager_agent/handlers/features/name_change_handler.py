@@ -191,26 +191,22 @@ class NameChangeHandlers(BaseBotHandler):
         )
         return ConversationHandler.END
 
+    def register_callbacks(self, router) -> None:
+        """Register name change callback routes."""
+        router.add_route("name", "menu", self.show_menu)
+        router.add_route("name", "change", self.start_name_change)
+        router.add_route("name", "keep", self._keep_current_name)
+        router.add_route("name", "cancel", self.cancel)
+        router.set_fallback("name", self.show_menu)
+
     async def handle_callback(self, update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
         """Handle name change-related callbacks."""
         query = update.callback_query
         await query.answer()
         
         try:
-            action = query.data.replace("name_", "")
-            logger.info(f"Name change handler processing callback: {query.data} -> {action}")
-            
-            if action == "menu":
-                await self.show_menu(update, context)
-            elif action == "change":
-                await self.start_name_change(update, context)
-            elif action == "keep":
-                await self._keep_current_name(update, context)
-            elif action == "cancel":
-                await self.cancel(update, context)
-            else:
-                logger.warning(f"Unknown name change action: {action}")
-                await self.show_menu(update, context)
+            logger.info(f"Name change handler processing callback: {query.data}")
+            await self.bot.callback_router.dispatch(update, context)
                 
         except Exception as e:
             logger.error(f"Error in name change callback handler: {str(e)}", exc_info=True)
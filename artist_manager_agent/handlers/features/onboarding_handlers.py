@@ -523,6 +523,28 @@ class OnboardingHandlers(BaseBotHandler):
         )
         return AWAITING_GOALS
 
+    def register_callbacks(self, router) -> None:
+        """Register onboarding callback routes."""
+        router.add_route("onboard", "start", self._restart_onboarding)
+        router.add_route("onboard", "menu", self._end_with_menu)
+        router.set_fallback("onboard", self._end_with_menu)
+
+    async def _restart_onboarding(self, update: Update, context: ContextTypes.DEFAULT_TYPE) -> str:
+        """Start onboarding over from the artist name."""
+        # Clear any existing state
+        context.user_data.clear()
+        await self._send_or_edit_message(
+            update,
+            "What's your artist name?",
+            reply_markup=None
+        )
+        return AWAITING_NAME
+
+    async def _end_with_menu(self, update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
+        """Leave onboarding and show the menu."""
+        await self.show_menu(update, context)
+        return ConversationHandler.END
+
     async def handle_callback(self, update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
         """Handle onboarding-related callbacks."""
         query = update.callback_query
@@ -531,25 +553,8 @@ class OnboardingHandlers(BaseBotHandler):
             # Answer callback query first to prevent timeout
             await query.answer()
             
-            action = query.data.replace("onboard_", "")
-            logger.info(f"Onboarding handler processing callback: {query.data} -> {action}")
-            
-            if action == "start":
-                # Clear any existing state
-                context.user_data.clear()
-                await self._send_or_edit_message(
-                    update,
-                    "What's your artist name?",
-                    reply_markup=None
-                )
-                return AWAITING_NAME
-            elif action == "menu":
-                await self.show_menu(update, context)
-                return ConversationHandler.END
-            else:
-                logger.warning(f"Unknown onboarding action: {action}")
-                await self.show_menu(update, context)
-                return ConversationHandler.END
+            logger.info(f"Onboarding handler processing callback: {query.data}")
+            return await self.bot.callback_router.dispatch(update, context)
                 
         except Exception as e:
             logger.error(f"Error in onboarding callback: {str(e)}", exc_info=True)
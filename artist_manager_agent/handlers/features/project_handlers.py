@@ -42,32 +42,24 @@ class ProjectHandlers(BaseBotHandler):
             CallbackQueryHandler(self.handle_callback, pattern="^(menu_projects|project_.*|project_menu)$")
         ]
 
+    def register_callbacks(self, router) -> None:
+        """Register project callback routes."""
+        router.add_route("project", "menu", self.show_menu)
+        router.add_route("project", "add", self._show_add_project)
+        router.add_route("project", "view_all", self._show_all_projects)
+        router.add_route("project", "analytics", self._show_project_analytics)
+        router.add_route("project", "archive", self._show_archived_projects)
+        router.add_route("project", "manage", self._show_project_management, with_id=True)
+        router.set_fallback("project", self.show_menu)
+
     async def handle_callback(self, update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
         """Handle project-related callbacks."""
         query = update.callback_query
         await query.answer()
         
         try:
-            # Handle both project_ and menu_projects patterns
-            action = query.data.replace("menu_projects", "menu").replace("project_", "").strip("_")
-            logger.info(f"Project handler processing callback: {query.data} -> {action}")
-            
-            if action == "menu" or action == "":
-                await self.show_menu(update, context)
-            elif action == "add":
-                await self._show_add_project(update, context)
-            elif action == "view_all":
-                await self._show_all_projects(update, context)
-            elif action == "analytics":
-                await self._show_project_analytics(update, context)
-            elif action == "archive":
-                await self._show_archived_projects(update, context)
-            elif action.startswith("manage_"):
-                project_id = action.replace("manage_", "")
-                await self._show_project_management(update, context, project_id)
-            else:
-                logger.warning(f"Unknown project action: {action}")
-                await self.show_menu(update, context)
+            logger.info(f"Project handler processing callback: {query.data}")
+            await self.bot.callback_router.dispatch(update, context)
                 
         except Exception as e:
             logger.error(f"Error in project callback handler: {str(e)}", exc_info=True)
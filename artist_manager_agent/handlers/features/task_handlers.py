@@ -39,32 +39,29 @@ class TaskHandlers(BaseBotHandler):
             CallbackQueryHandler(self.handle_callback, pattern="^task_")
         ]
 
+    def register_callbacks(self, router) -> None:
+        """Register task callback routes."""
+        def on_message(method):
+            return lambda update, context, *args: method(update.callback_query.message, context, *args)
+
+        router.add_route("task", "create", on_message(self.start_task_creation))
+        router.add_route("task", "complete", on_message(self.show_task_completion_options))
+        router.add_route("task", "view", on_message(self.show_task_details))
+        router.add_route("task", "edit", on_message(self.show_task_edit_options))
+        router.add_route("task", "view", on_message(self.show_specific_task), with_id=True)
+        router.add_route("task", "complete", on_message(self.complete_task), with_id=True)
+        router.add_route("task", "edit", on_message(self.edit_task), with_id=True)
+        router.add_route("task", "menu", self.show_menu)
+
     async def handle_callback(self, update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
         """Handle callback queries."""
         query = update.callback_query
         await query.answer()
         
-        action = query.data.replace("task_", "")
-        
-        if action == "create":
-            await self.start_task_creation(query.message, context)
-        elif action == "complete":
-            await self.show_task_completion_options(query.message, context)
-        elif action == "view":
-            await self.show_task_details(query.message, context)
-        elif action == "edit":
-            await self.show_task_edit_options(query.message, context)
-        elif action.startswith("view_"):
-            task_id = action.replace("view_", "")
-            await self.show_specific_task(query.message, context, task_id)
-        elif action.startswith("complete_"):
-            task_id = action.replace("complete_", "")
-            await self.complete_task(query.message, context, task_id)
-        elif action.startswith("edit_"):
-            task_id = action.replace("edit_", "")
-            await self.edit_task(query.message, context, task_id)
-        elif action == "menu":
-            await self.show_menu(update, context)
+        try:
+            await self.bot.callback_router.dispatch(update, context)
+        except LookupError:
+            logger.debug(f"Task handler ignoring callback: {query.data}")
 
     async def show_menu(self, update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
         """Show the main menu for tasks."""
@@ -108,32 +108,24 @@ class TeamHandlers(BaseBotHandler):
             allow_reentry=True
         )
 
+    def register_callbacks(self, router) -> None:
+        """Register team callback routes."""
+        router.add_route("team", "menu", self.show_menu)
+        router.add_route("team", "add", self._show_add_member)
+        router.add_route("team", "view_all", self._show_all_members)
+        router.add_route("team", "analytics", self._show_team_analytics)
+        router.add_route("team", "roles", self._show_role_management)
+        router.add_route("team", "manage", self._show_member_management, with_id=True)
+        router.set_fallback("team", self.show_menu)
+
     async def handle_callback(self, update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
         """Handle team-related callbacks."""
         query = update.callback_query
         await query.answer()
         
         try:
-            # Handle both team_ and menu_team patterns
-            action = query.data.replace("menu_team", "menu").replace("team_", "").strip("_")
-            logger.info(f"Team handler processing callback: {query.data} -> {action}")
-            
-            if action == "menu" or action == "":
-                await self.show_menu(update, context)
-            elif action == "add":
-                await self._show_add_member(update, context)
-            elif action == "view_all":
-                await self._show_all_members(update, context)
-            elif action == "analytics":
-                await self._show_team_analytics(update, context)
-            elif action == "roles":
-                await self._show_role_management(update, context)
-            elif action.startswith("manage_"):
-                member_id = action.replace("manage_", "")
-                await self._show_member_management(update, context, member_id)
-            else:
-                logger.warning(f"Unknown team action: {action}")
-                await self.show_menu(update, context)
+            logger.info(f"Team handler processing callback: {query.data}")
+            await self.bot.callback_router.dispatch(update, context)
                 
         except Exception as e:
             logger.error(f"Error in team callback handler: {str(e)}", exc_info=True)
@@ -1,6 +1,12 @@
 """Utility modules for handlers."""
 from .handler_registry import HandlerRegistry
+from .callback_router import CallbackData, CallbackRouter
+from .feature_registry import FeatureRegistry, FeatureSpec
 
 __all__ = [
-    "HandlerRegistry"
-] 
\ No newline at end of file
+    "HandlerRegistry",
+    "CallbackData",
+    "CallbackRouter",
+    "FeatureRegistry",
+    "FeatureSpec"
+] 
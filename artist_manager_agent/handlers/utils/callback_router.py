@@ -0,0 +1,141 @@
+"""Central routing of callback queries to handler methods."""
+from typing import Any, Awaitable, Callable, Dict, NamedTuple, Optional, Tuple
+import time
+
+from telegram import Update
+from telegram.ext import ContextTypes
+
+from ...utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+SEPARATOR = "_"
+
+
+class CallbackData(NamedTuple):
+    """Parsed callback payload of the form ``namespace_action_id``."""
+    namespace: str
+    action: str
+    item_id: Optional[str] = None
+
+    @property
+    def route(self) -> str:
+        """Name of the matched route, used as key of the latency counters."""
+        name = f"{self.namespace}{SEPARATOR}{self.action}" if self.action else self.namespace
+        return name if self.item_id is None else f"{name}{SEPARATOR}<id>"
+
+
+class CallbackRouter:
+    """Dispatch callback queries through a table of registered routes.
+
+    Handlers register ``(namespace, action)`` routes once at startup. A route
+    registered ``with_id`` also matches ``namespace_action_<id>`` and receives
+    the id as third argument. Callback data is at most 64 bytes, so parsing
+    and lookup take constant time regardless of the number of routes.
+
+    Every dispatch is timed; ``stats`` reports calls, errors and latency per
+    route so slow menus can be found.
+    """
+
+    def __init__(self):
+        self._routes: Dict[Tuple[str, str], Callable[..., Awaitable[Any]]] = {}
+        self._id_routes: Dict[Tuple[str, str], Callable[..., Awaitable[Any]]] = {}
+        self._fallbacks: Dict[str, Callable[..., Awaitable[Any]]] = {}
+        self._stats: Dict[str, Dict[str, float]] = {}
+
+    @staticmethod
+    def build(namespace: str, action: str = "", item_id: Optional[Any] = None) -> str:
+        """Build the callback data of a route."""
+        parts = [namespace]
+        if action:
+            parts.append(action)
+        if item_id is not None:
+            parts.append(str(item_id))
+        return SEPARATOR.join(parts)
+
+    def add_route(
+        self,
+        namespace: str,
+        action: str,
+        callback: Callable[..., Awaitable[Any]],
+        with_id: bool = False
+    ) -> None:
+        """Register ``callback`` for ``namespace_action``, or ``namespace_action_<id>``."""
+        routes = self._id_routes if with_id else self._routes
+        key = (namespace, action)
+        if key in routes:
+            logger.warning(f"Callback route {self.build(namespace, action)} registered twice, replacing")
+        routes[key] = callback
+
+    def set_fallback(self, namespace: str, callback: Callable[..., Awaitable[Any]]) -> None:
+        """Register the callback for unknown actions of ``namespace``."""
+        self._fallbacks[namespace] = callback
+
+    def parse(self, data: str) -> Optional[CallbackData]:
+        """Resolve callback data to a registered route, or None if none matches."""
+        if not data:
+            return None
+        namespace, _, rest = data.partition(SEPARATOR)
+        if (namespace, rest) in self._routes:
+            return CallbackData(namespace, rest)
+
+        # Longest action first, so "view_all" wins over "view" with id "all"
+        end = len(rest)
+        while True:
+            end = rest.rfind(SEPARATOR, 0, end)
+            if end <= 0:
+                return None
+            action = rest[:end]
+            if (namespace, action) in self._id_routes:
+                return CallbackData(namespace, action, rest[end + 1:])
+
+    async def dispatch(self, update: Update, context: ContextTypes.DEFAULT_TYPE) -> Any:
+        """Run the route matching the update's callback data.
+
+        Returns the callback's result, so conversation states pass through.
+        Unknown data goes to the namespace's fallback; a LookupError is raised
+        if there is none.
+        """
+        data = update.callback_query.data
+        payload = self.parse(data)
+        if payload is not None:
+            key = (payload.namespace, payload.action)
+            if payload.item_id is None:
+                callback, args = self._routes[key], (update, context)
+            else:
+                callback, args = self._id_routes[key], (update, context, payload.item_id)
+            name = payload.route
+        else:
+            namespace = data.partition(SEPARATOR)[0]
+            callback = self._fallbacks.get(namespace)
+            if callback is None:
+                raise LookupError(f"No callback route for {data!r}")
+            logger.warning(f"Unknown callback data {data!r}, using {namespace} fallback")
+            args = (update, context)
+            name = f"{namespace}{SEPARATOR}*"
+
+        stats = self._stats.get(name)
+        if stats is None:
+            stats = self._stats[name] = {"calls": 0, "errors": 0, "total_time": 0.0, "max_time": 0.0}
+        start = time.perf_counter()
+        try:
+            return await callback(*args)
+        except Exception:
+            stats["errors"] += 1
+            raise
+        finally:
+            elapsed = time.perf_counter() - start
+            stats["calls"] += 1
+            stats["total_time"] += elapsed
+            stats["max_time"] = max(stats["max_time"], elapsed)
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        """Per-route counters, slowest average first; times are in seconds."""
+        report = {
+            name: {**stats, "avg_time": stats["total_time"] / stats["calls"] if stats["calls"] else 0.0}
+            for name, stats in self._stats.items()
+        }
+        return dict(sorted(report.items(), key=lambda item: item[1]["avg_time"], reverse=True))
+
+    def __len__(self) -> int:
+        return len(self._routes) + len(self._id_routes)
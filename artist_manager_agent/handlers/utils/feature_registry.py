@@ -0,0 +1,167 @@
+"""Registry of feature handlers that are imported on first use."""
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+import importlib
+import time
+import warnings
+
+from telegram import Update
+from telegram.ext import Application, BaseHandler, CallbackQueryHandler, CommandHandler, ContextTypes
+
+from ...utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# Feature modules are given relative to the handlers package
+HANDLERS_PACKAGE = __name__.rsplit(".", 2)[0]
+
+
+class FeatureSpec(NamedTuple):
+    """Where a feature handler lives and which updates start it.
+
+    ``module`` is relative to the ``handlers`` package. ``commands`` and
+    ``callback_pattern`` must cover every update that can reach the
+    feature before it is loaded, i.e. its commands and the entry points of
+    its conversations. ``conversations`` names its persistent
+    ConversationHandlers.
+    """
+    name: str
+    module: str
+    class_name: str
+    group: int
+    commands: Tuple[str, ...] = ()
+    callback_pattern: Optional[str] = None
+    conversations: Tuple[str, ...] = ()
+    lazy: bool = True
+
+
+class FeatureRegistry:
+    """Load feature handlers on first use instead of at startup.
+
+    Until a lazy feature is loaded, its group holds stub command and
+    callback handlers. The first update matching a stub imports the
+    feature module, creates the handler, adds its callback routes to the
+    router, replaces the stubs with the real handlers and passes the update
+    on to them. Features are also loaded when another part of the bot uses
+    them, see ``Bot.__getattr__``.
+
+    Features that are not lazy, and all features when ``lazy`` is False,
+    are loaded when the registry is installed.
+    """
+
+    def __init__(self, bot, router, lazy: bool = True):
+        self.bot = bot
+        self.router = router
+        self.lazy = lazy
+        self.application: Optional[Application] = None
+        self._specs: Dict[str, FeatureSpec] = {}
+        self._loaded: Dict[str, Any] = {}
+        self._stubs: Dict[str, List[BaseHandler]] = {}
+
+    def register(self, spec: FeatureSpec) -> None:
+        """Add a feature; it is loaded or stubbed by ``install``."""
+        if spec.name in self._specs:
+            raise ValueError(f"Feature {spec.name} registered twice")
+        self._specs[spec.name] = spec
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._specs
+
+    def is_loaded(self, name: str) -> bool:
+        return name in self._loaded
+
+    def install(self, application: Application) -> None:
+        """Add the handlers of loaded features and stubs of the others."""
+        self.application = application
+        for spec in sorted(self._specs.values(), key=lambda spec: spec.group):
+            if spec.name in self._loaded:
+                self._add_handlers(spec, self._loaded[spec.name])
+            elif spec.lazy and self.lazy:
+                self._add_stubs(spec)
+            else:
+                self.load(spec.name)
+        logger.info(
+            f"Installed {len(self._specs)} features, "
+            f"{len(self._specs) - len(self._loaded)} loaded on first use"
+        )
+
+    async def load_pending_conversations(self, persistence) -> None:
+        """Load features that have persisted conversations in progress.
+
+        Users in the middle of a conversation reach it with plain messages
+        the stubs do not match, and PTB restores persisted conversations
+        only for handlers present when the application is initialized. Must
+        be called before ``Application.initialize``.
+        """
+        for spec in self._specs.values():
+            if spec.name in self._loaded or not spec.conversations:
+                continue
+            for conversation in spec.conversations:
+                if await persistence.get_conversations(conversation):
+                    logger.info(f"Loading {spec.name} handlers, {conversation} has conversations in progress")
+                    self.load(spec.name)
+                    break
+
+    def load(self, name: str) -> Any:
+        """Import and create a feature handler unless already done, and return it."""
+        handler = self._loaded.get(name)
+        if handler is not None:
+            return handler
+
+        spec = self._specs[name]
+        started = time.perf_counter()
+        try:
+            module = importlib.import_module(spec.module, HANDLERS_PACKAGE)
+            handler = getattr(module, spec.class_name)(self.bot)
+            if not hasattr(handler, "get_handlers"):
+                raise AttributeError(f"{name} handler missing get_handlers method")
+            handler.register_callbacks(self.router)
+        except Exception as e:
+            logger.error(f"Error loading {name} handler: {e}")
+            raise RuntimeError(f"Failed to load {name} handler") from e
+
+        self._loaded[name] = handler
+        setattr(self.bot, name, handler)
+        if self.application is not None:
+            for stub in self._stubs.pop(name, []):
+                self.application.remove_handler(stub, group=spec.group)
+            self._add_handlers(spec, handler)
+        logger.info(f"Loaded {name} handler in {(time.perf_counter() - started) * 1000:.1f}ms")
+        return handler
+
+    def _add_handlers(self, spec: FeatureSpec, handler: Any) -> None:
+        handlers = handler.get_handlers() or []
+        if not isinstance(handlers, (list, tuple)):
+            handlers = [handlers]
+        with warnings.catch_warnings():
+            # PTB warns about persistent conversations added after
+            # initialize. Their persisted state is empty, otherwise they
+            # would have been loaded before, so nothing can be overwritten.
+            warnings.filterwarnings("ignore", message=".*after `Application.initialize`")
+            for real_handler in handlers:
+                if real_handler is not None:
+                    self.application.add_handler(real_handler, group=spec.group)
+        logger.debug(f"Registered {len(handlers)} {spec.name} handlers in group {spec.group}")
+
+    def _add_stubs(self, spec: FeatureSpec) -> None:
+        async def load_and_dispatch(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+            await self._dispatch(spec.name, update, context)
+
+        stubs: List[BaseHandler] = []
+        if spec.commands:
+            stubs.append(CommandHandler(list(spec.commands), load_and_dispatch))
+        if spec.callback_pattern:
+            stubs.append(CallbackQueryHandler(load_and_dispatch, pattern=spec.callback_pattern))
+        for stub in stubs:
+            self.application.add_handler(stub, group=spec.group)
+        self._stubs[spec.name] = stubs
+
+    async def _dispatch(self, name: str, update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+        """Load a feature and let its first matching handler process the update."""
+        self.load(name)
+        group = self._specs[name].group
+        for handler in self.application.handlers.get(group, []):
+            check = handler.check_update(update)
+            if check is not None and check is not False:
+                await handler.handle_update(update, self.application, check, context)
+                return
+        logger.warning(f"No {name} handler matched the update that loaded it")
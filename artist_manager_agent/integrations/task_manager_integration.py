@@ -3,6 +3,7 @@ from typing import Dict, Any, List, Optional
 from datetime import datetime
 import uuid
 import logging
+from ..managers.deadline_index import DeadlineIndex
 from ..managers.task_manager import TaskManager
 from ..models import Task, Goal
 from ..utils.logger import get_logger
@@ -12,9 +13,9 @@ logger = get_logger(__name__)
 class TaskManagerIntegration:
     """Integration layer between the bot and task manager."""
     
-    def __init__(self, persistence=None):
+    def __init__(self, persistence=None, deadlines: Optional[DeadlineIndex] = None):
         """Initialize the integration layer."""
-        self.task_manager = TaskManager()
+        self.task_manager = TaskManager(deadlines)
         self.persistence = persistence
         
     async def load_from_persistence(self):
@@ -25,6 +26,7 @@ class TaskManagerIntegration:
                 goals = self.persistence.bot_data.get('goals', {})
                 self.task_manager.tasks = tasks
                 self.task_manager.goals = goals
+                self.task_manager.reindex()
                 logger.info("Loaded tasks and goals from persistence")
         except Exception as e:
             logger.error(f"Error loading from persistence: {str(e)}")
@@ -126,6 +128,10 @@ class TaskManagerIntegration:
         """Suggest the next tasks to focus on for a goal."""
         return await self.task_manager.suggest_next_tasks(goal_id)
         
+    def goal_version(self, goal_id: str) -> int:
+        """Get a number that changes whenever the goal or one of its tasks does."""
+        return self.task_manager.goal_version(goal_id)
+        
     async def get_goals_by_user(self, user_id: int) -> List[Goal]:
         """Get all goals for a specific user."""
         try:
@@ -7,6 +7,7 @@ import psutil
 import asyncio
 import logging
 from pathlib import Path
+from typing import Union
 import pickle
 
 from telegram.ext import (
@@ -17,11 +18,41 @@ from telegram.ext import (
 )
 
 from .core import Bot
+from .core.sharding import ShardedFrontend, check_shard_layout
 from .utils.logger import get_logger, setup_logging
 from .utils.config import (
     BOT_TOKEN,
     DATA_DIR,
     PERSISTENCE_PATH,
+    PERSISTENCE_BACKEND,
+    PERSISTENCE_WAL,
+    PERSISTENCE_COMPACT_INTERVAL,
+    PERSISTENCE_LAZY_LOAD,
+    PERSISTENCE_MAX_CACHED,
+    PERSISTENCE_CACHE_TTL,
+    PERSISTENCE_SHARDS,
+    WEBHOOK_URL,
+    WEBHOOK_LISTEN,
+    WEBHOOK_PORT,
+    WEBHOOK_PATH,
+    WEBHOOK_SECRET,
+    WEBHOOK_MAX_QUEUE,
+    UPDATE_CONCURRENCY,
+    SEND_RATE_GLOBAL,
+    SEND_RATE_PER_CHAT,
+    SEND_BURST_PER_CHAT,
+    JOB_WORKERS,
+    AUTO_MODE_WORKERS,
+    AUTO_MODE_CATCH_UP_RATE,
+    AI_CONCURRENCY,
+    TRACE_UPDATES,
+    TRACE_SAMPLE_RATE,
+    TRACE_USER_IDS,
+    TRACE_PATH,
+    LAZY_FEATURES,
+    WORKER_SHARDS,
+    DRAIN_TIMEOUT,
+    TELEGRAM_API_URL,
     LOG_LEVEL,
     LOG_FORMAT,
     load_env_vars
@@ -29,25 +60,44 @@ from .utils.config import (
 
 logger = get_logger(__name__)
 
-def check_running_instance():
-    """Check if another instance is running and kill it."""
-    pid_file = Path(DATA_DIR) / "bot.pid"
-    
+async def take_over_running_instance(pid_file: Path, timeout: float) -> None:
+    """Ask a running instance to drain and wait until it exited.
+
+    The caller has already done its slow startup work, so updates are only
+    held back by Telegram while the old instance drains and flushes its
+    persistence. An instance that does not exit within ``timeout`` seconds
+    is killed.
+    """
     if pid_file.exists():
         try:
             pid = int(pid_file.read_text())
-            if psutil.pid_exists(pid):
+            if pid != os.getpid() and psutil.pid_exists(pid):
                 process = psutil.Process(pid)
                 if process.name().startswith('python'):
-                    logger.info(f"Killing existing bot process {pid}")
+                    logger.info(f"Asking running bot process {pid} to drain")
+                    started = asyncio.get_running_loop().time()
                     process.terminate()
-                    process.wait(timeout=5)
-        except (ValueError, psutil.NoSuchProcess, psutil.TimeoutExpired) as e:
+                    try:
+                        await asyncio.to_thread(process.wait, timeout)
+                        waited = asyncio.get_running_loop().time() - started
+                        logger.info(f"Bot process {pid} exited after {waited:.1f}s, taking over")
+                    except psutil.TimeoutExpired:
+                        logger.warning(f"Bot process {pid} did not drain in {timeout}s, killing it")
+                        process.kill()
+        except (ValueError, psutil.NoSuchProcess) as e:
             logger.warning(f"Error handling existing process: {e}")
     
     # Write current PID
     pid_file.write_text(str(os.getpid()))
-    atexit.register(lambda: pid_file.unlink(missing_ok=True))
+    atexit.register(_remove_pid_file, pid_file, os.getpid())
+
+def _remove_pid_file(pid_file: Path, pid: int) -> None:
+    """Remove the PID file unless a newer instance has taken it over."""
+    try:
+        if pid_file.read_text() == str(pid):
+            pid_file.unlink()
+    except (OSError, ValueError):
+        pass
 
 def init_persistence():
     """Initialize persistence directory and file."""
@@ -74,8 +124,8 @@ def init_persistence():
             pickle.dump(initial_data, f)
     return persistence_path
 
-async def run_bot(bot: Bot) -> None:
-    """Run the bot."""
+async def run_bot(bot: Union[Bot, ShardedFrontend]) -> None:
+    """Run the bot, or the front process of a sharded bot."""
     stop_event = asyncio.Event()
     
     try:
@@ -89,29 +139,9 @@ async def run_bot(bot: Bot) -> None:
             raise
         
         def signal_handler():
-            """Handle shutdown signals."""
+            """Handle shutdown signals; the bot is drained by stop below."""
             logger.info("Received shutdown signal")
-            asyncio.create_task(handle_shutdown())
             stop_event.set()
-            
-        async def handle_shutdown():
-            """Handle shutdown gracefully."""
-            try:
-                logger.info("Initiating graceful shutdown...")
-                
-                # Stop accepting new updates
-                if hasattr(bot, 'application') and bot.application.updater:
-                    logger.info("Stopping updater...")
-                    await bot.application.updater.stop()
-                
-                # Cancel any pending tasks
-                if hasattr(bot, 'cancel_tasks'):
-                    logger.info("Cancelling pending tasks...")
-                    await bot.cancel_tasks()
-                
-                logger.info("Shutdown sequence completed")
-            except Exception as e:
-                logger.error(f"Error during shutdown: {e}", exc_info=True)
         
         # Set up signal handlers
         loop = asyncio.get_running_loop()
@@ -162,14 +192,82 @@ async def main_async():
         # Load environment variables
         load_env_vars()
         
-        # Check for running instance
-        check_running_instance()
+        # Refuse to start with a shard count the stored data was not written with
+        check_shard_layout(Path(DATA_DIR), WORKER_SHARDS)
         
         # Initialize persistence
         data_dir = init_persistence()
         
+        # Backend specific persistence settings
+        persistence_options = {}
+        if PERSISTENCE_BACKEND == "pickle":
+            persistence_options = {
+                "wal_mode": PERSISTENCE_WAL,
+                "compact_interval": PERSISTENCE_COMPACT_INTERVAL,
+                "lazy_load": PERSISTENCE_LAZY_LOAD,
+                "max_cached": PERSISTENCE_MAX_CACHED,
+                "cache_ttl": PERSISTENCE_CACHE_TTL,
+                "shards": PERSISTENCE_SHARDS
+            }
+        
+        # Receive updates through a webhook when a public URL is configured
+        webhook_options = None
+        if WEBHOOK_URL:
+            webhook_options = {
+                "webhook_url": WEBHOOK_URL,
+                "listen": WEBHOOK_LISTEN,
+                "port": WEBHOOK_PORT,
+                "url_path": WEBHOOK_PATH,
+                "secret_token": WEBHOOK_SECRET,
+                "max_queue_size": WEBHOOK_MAX_QUEUE
+            }
+        
+        bot_options = {
+            "persistence_backend": PERSISTENCE_BACKEND,
+            "persistence_options": persistence_options,
+            "max_concurrent_updates": UPDATE_CONCURRENCY,
+            "message_queue_options": {
+                # Telegram's global limit is shared by all worker processes
+                "global_rate": SEND_RATE_GLOBAL / WORKER_SHARDS,
+                "chat_rate": SEND_RATE_PER_CHAT,
+                "chat_burst": SEND_BURST_PER_CHAT
+            },
+            "job_workers": JOB_WORKERS,
+            "auto_workers": AUTO_MODE_WORKERS,
+            "auto_catch_up_rate": AUTO_MODE_CATCH_UP_RATE,
+            "ai_concurrency": AI_CONCURRENCY,
+            "trace_options": {
+                "enabled": TRACE_UPDATES,
+                "sample_rate": TRACE_SAMPLE_RATE,
+                "user_ids": TRACE_USER_IDS,
+                "path": TRACE_PATH
+            },
+            "lazy_features": LAZY_FEATURES,
+            "drain_timeout": DRAIN_TIMEOUT,
+            "base_url": TELEGRAM_API_URL
+        }
+        
         # Initialize and run bot
-        bot = Bot(token=BOT_TOKEN, data_dir=data_dir.parent)
+        if WORKER_SHARDS > 1:
+            logger.info(f"Sharding users across {WORKER_SHARDS} worker processes")
+            bot = ShardedFrontend(
+                token=BOT_TOKEN,
+                data_dir=data_dir.parent,
+                shards=WORKER_SHARDS,
+                bot_options=bot_options,
+                webhook_options=webhook_options
+            )
+        else:
+            bot = Bot(
+                token=BOT_TOKEN,
+                data_dir=data_dir.parent,
+                webhook_options=webhook_options,
+                **bot_options
+            )
+        
+        # Start up before the running instance stops, so the handover only
+        # takes its drain and our persistence load
+        await take_over_running_instance(Path(DATA_DIR) / "bot.pid", DRAIN_TIMEOUT + 30)
         await run_bot(bot)
         
     except Exception as e:
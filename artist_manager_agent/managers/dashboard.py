@@ -4,7 +4,7 @@ from typing import Dict, Any, List, Optional
 import logging
 from ..models import ArtistProfile
 from ..utils.logger import get_logger
-from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup, CallbackQuery
+from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
 from telegram.ext import ContextTypes
 
 logger = get_logger(__name__)
@@ -33,6 +33,12 @@ class Dashboard:
             keyboard.append(row)
         return InlineKeyboardMarkup(keyboard)
         
+    def register_callbacks(self, router) -> None:
+        """Register profile callback routes; other namespaces belong to the feature handlers."""
+        router.add_route("profile", "view", self._view_profile)
+        router.add_route("profile", "edit", self._show_profile_edit_options)
+        router.add_route("profile", "edit", self._show_profile_edit_help, with_id=True)
+
     async def handle_callback(self, update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
         """Handle callback queries from inline buttons."""
         try:
@@ -47,28 +53,9 @@ class Dashboard:
                 await query.answer("Please complete your profile setup first with /start")
                 return
                 
-            # Handle different button callbacks
-            if query.data.startswith("goal_"):
-                await self.bot.goal_handlers.handle_goal_callback(update, context)
-            elif query.data.startswith("project_"):
-                await self.bot.project_handlers.handle_project_callback(update, context)
-            elif query.data.startswith("task_"):
-                await self.bot.task_handlers.handle_task_callback(update, context)
-            elif query.data.startswith("team_"):
-                await self.bot.team_handlers.handle_team_callback(update, context)
-            elif query.data.startswith("auto_"):
-                await self.bot.auto_handlers.handle_auto_callback(update, context)
-            elif query.data.startswith("blockchain_"):
-                await self.bot.blockchain_handlers.handle_blockchain_callback(update, context)
-            elif query.data.startswith("music_"):
-                await self.bot.music_handlers.handle_music_callback(update, context)
-            elif query.data.startswith("profile_"):
-                await self.handle_profile_callback(query)
-            elif query.data.startswith("dashboard_"):
-                await self._handle_dashboard_action(update, context, query.data)
-            elif query.data.startswith("menu_"):
-                await self._handle_menu_action(update, context, query.data)
-            else:
+            try:
+                await self.bot.callback_router.dispatch(update, context)
+            except LookupError:
                 logger.warning(f"Unknown callback data received: {query.data}")
                 await query.answer("This feature is not implemented yet")
                 
@@ -76,44 +63,40 @@ class Dashboard:
             logger.error(f"Error handling callback: {str(e)}")
             await query.answer("Sorry, an error occurred. Please try again or use commands instead.")
             
-    async def handle_profile_callback(self, query: CallbackQuery) -> None:
-        """Handle profile-related button callbacks."""
-        try:
-            action = query.data.replace("profile_", "")
-            if action == "view":
-                await self.bot.view_profile(query.message, query.message.bot_data)
-            elif action == "edit":
-                # Show edit options with inline buttons
-                keyboard = [
-                    [
-                        InlineKeyboardButton("Basic Info", callback_data="profile_edit_basic"),
-                        InlineKeyboardButton("Goals", callback_data="profile_edit_goals")
-                    ],
-                    [
-                        InlineKeyboardButton("Social Media", callback_data="profile_edit_social"),
-                        InlineKeyboardButton("Streaming", callback_data="profile_edit_streaming")
-                    ],
-                    [
-                        InlineKeyboardButton("« Back to Menu", callback_data="menu_main")
-                    ]
-                ]
-                reply_markup = InlineKeyboardMarkup(keyboard)
-                await query.edit_message_text(
-                    "What would you like to edit?\n\n"
-                    "Choose a section to edit, or use /update for the full edit menu.",
-                    reply_markup=reply_markup
-                )
-            elif action.startswith("edit_"):
-                section = action.replace("edit_", "")
-                await query.edit_message_text(
-                    f"To edit your {section}, use:\n"
-                    f"/update {section} <new value>\n\n"
-                    "Example:\n"
-                    f"/update {section} My new {section}"
-                )
-        except Exception as e:
-            logger.error(f"Error in profile callback: {str(e)}")
-            await query.answer("Error processing profile action")
+    async def _view_profile(self, update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+        """Show the profile."""
+        await self.bot.view_profile(update.callback_query.message, context.bot_data)
+
+    async def _show_profile_edit_options(self, update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+        """Show edit options with inline buttons."""
+        keyboard = [
+            [
+                InlineKeyboardButton("Basic Info", callback_data="profile_edit_basic"),
+                InlineKeyboardButton("Goals", callback_data="profile_edit_goals")
+            ],
+            [
+                InlineKeyboardButton("Social Media", callback_data="profile_edit_social"),
+                InlineKeyboardButton("Streaming", callback_data="profile_edit_streaming")
+            ],
+            [
+                InlineKeyboardButton("« Back to Menu", callback_data="menu_main")
+            ]
+        ]
+        reply_markup = InlineKeyboardMarkup(keyboard)
+        await update.callback_query.edit_message_text(
+            "What would you like to edit?\n\n"
+            "Choose a section to edit, or use /update for the full edit menu.",
+            reply_markup=reply_markup
+        )
+
+    async def _show_profile_edit_help(self, update: Update, context: ContextTypes.DEFAULT_TYPE, section: str) -> None:
+        """Explain how to edit a profile section."""
+        await update.callback_query.edit_message_text(
+            f"To edit your {section}, use:\n"
+            f"/update {section} <new value>\n\n"
+            "Example:\n"
+            f"/update {section} My new {section}"
+        )
 
     def get_quick_action_buttons(self, profile: ArtistProfile) -> List[List[InlineKeyboardButton]]:
         """Get quick action buttons based on profile."""
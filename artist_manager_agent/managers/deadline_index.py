@@ -0,0 +1,116 @@
+"""Due-date index of tasks and projects."""
+from typing import Any, Dict, List, Optional, Tuple
+from datetime import datetime
+import bisect
+
+Key = Tuple[str, str]
+
+
+class _Lane:
+    """Entries sorted by due date, with the dates alone for searching."""
+
+    def __init__(self):
+        self.entries: List[Tuple[datetime, str, str]] = []
+        self.dates: List[datetime] = []
+
+    def insert(self, entry: Tuple[datetime, str, str]) -> None:
+        index = bisect.bisect(self.entries, entry)
+        self.entries.insert(index, entry)
+        self.dates.insert(index, entry[0])
+
+    def remove(self, entry: Tuple[datetime, str, str]) -> None:
+        index = bisect.bisect_left(self.entries, entry)
+        del self.entries[index]
+        del self.dates[index]
+
+    def between(self, start: datetime, end: datetime) -> List[Tuple[datetime, str, str]]:
+        return self.entries[bisect.bisect_left(self.dates, start):bisect.bisect_right(self.dates, end)]
+
+
+class DeadlineIndex:
+    """Tasks and projects sorted by due date.
+
+    Items are keyed by kind ("task" or "project") and id. The managers
+    update the index whenever they create or change an item, so finding
+    what is due in a period is a binary search plus the matches instead of
+    a pass over every task and project.
+
+    Each item may have an owner, the id of the user it belongs to. Items
+    are also sorted per owner, so asking for one user's deadlines only
+    searches that user's items.
+    """
+
+    def __init__(self):
+        self._all = _Lane()
+        self._lanes: Dict[Any, _Lane] = {}
+        self._due: Dict[Key, datetime] = {}
+        self._owners: Dict[Key, Any] = {}
+        self._items: Dict[Key, Any] = {}
+
+    def update(self, kind: str, item_id: str, due: Optional[datetime], item: Any = None, owner: Any = None) -> None:
+        """Set the due date and owner of an item; without a date the item is removed."""
+        self.remove(kind, item_id)
+        if due is None:
+            return
+        entry = (due, kind, item_id)
+        self._all.insert(entry)
+        if owner is not None:
+            self._lanes.setdefault(owner, _Lane()).insert(entry)
+        self._due[(kind, item_id)] = due
+        self._owners[(kind, item_id)] = owner
+        self._items[(kind, item_id)] = item
+
+    def remove(self, kind: str, item_id: str) -> bool:
+        due = self._due.pop((kind, item_id), None)
+        if due is None:
+            return False
+        del self._items[(kind, item_id)]
+        owner = self._owners.pop((kind, item_id))
+        entry = (due, kind, item_id)
+        self._all.remove(entry)
+        if owner is not None:
+            lane = self._lanes[owner]
+            lane.remove(entry)
+            if not lane.entries:
+                del self._lanes[owner]
+        return True
+
+    def clear(self, kind: Optional[str] = None) -> None:
+        """Remove all items, or all items of one kind."""
+        if kind is None:
+            self._all = _Lane()
+            self._lanes.clear()
+            self._due.clear()
+            self._owners.clear()
+            self._items.clear()
+            return
+        for lane in [self._all, *self._lanes.values()]:
+            lane.entries = [entry for entry in lane.entries if entry[1] != kind]
+            lane.dates = [entry[0] for entry in lane.entries]
+        self._lanes = {owner: lane for owner, lane in self._lanes.items() if lane.entries}
+        for key in [key for key in self._due if key[0] == kind]:
+            del self._due[key]
+            del self._owners[key]
+            del self._items[key]
+
+    def due_between(
+        self, start: datetime, end: datetime, kind: Optional[str] = None, owner: Any = None
+    ) -> List[Tuple[datetime, str, str, Any]]:
+        """Return (due date, kind, id, item) of items due from ``start`` to ``end``, soonest first.
+
+        With an ``owner``, only that owner's items are returned.
+        """
+        if owner is None:
+            lane = self._all
+        elif owner in self._lanes:
+            lane = self._lanes[owner]
+        else:
+            return []
+        return [
+            (due, item_kind, item_id, self._items[(item_kind, item_id)])
+            for due, item_kind, item_id in lane.between(start, end)
+            if kind is None or item_kind == kind
+        ]
+
+    def __len__(self) -> int:
+        return len(self._due)
@@ -226,10 +226,12 @@ class ProjectManager:
                 team_members=[],
                 budget=0,
                 milestones=template["milestones"],
-                required_roles=template["roles"]
+                required_roles=template["roles"],
+                user_id=update.effective_user.id
             )
             
             self.projects[project_id] = project
+            self._index_project(project)
             
             # Show project setup
             keyboard = [
@@ -477,6 +479,23 @@ class ProjectManager:
                 "Sorry, there was an error managing team members. Please try again."
             )
 
+    def _index_project(self, project: Project) -> None:
+        """Keep the deadline index in step with a created or changed project."""
+        due = project.end_date if project.status != "completed" else None
+        self.bot.deadlines.update("project", project.id, due, project, project.user_id)
+
+    async def update_project(self, project_id: str, updates: Dict[str, Any]) -> Optional[Project]:
+        """Update an existing project."""
+        project = self.projects.get(project_id)
+        if not project:
+            return None
+        for key, value in updates.items():
+            if hasattr(project, key):
+                setattr(project, key, value)
+        project.updated_at = datetime.now()
+        self._index_project(project)
+        return project
+
     async def allocate_resource(
         self,
         project_id: str,
@@ -2,8 +2,11 @@ from datetime import datetime, timedelta
 from typing import List, Dict, Optional
 from dataclasses import dataclass
 import asyncio
+import itertools
 import logging
 
+from .deadline_index import DeadlineIndex
+
 logger = logging.getLogger(__name__)
 
 @dataclass
@@ -39,9 +42,33 @@ class Goal:
     updated_at: datetime = None
 
 class TaskManager:
-    def __init__(self):
+    def __init__(self, deadlines: Optional[DeadlineIndex] = None):
         self.tasks = {}
         self.goals = {}
+        self.deadlines = deadlines if deadlines is not None else DeadlineIndex()
+        # Changes when a goal or one of its tasks changes, see goal_version
+        self._goal_versions: Dict[str, int] = {}
+        self._versions = itertools.count(1)
+        
+    def _index_task(self, task: Task) -> None:
+        """Keep the deadline index in step with a created or changed task."""
+        due = task.due_date if task.status != "completed" else None
+        # A task belongs to the user whose goal it serves
+        goal = self.goals.get(task.goal_id) if task.goal_id else None
+        self.deadlines.update("task", task.id, due, task, goal.user_id if goal else None)
+
+    def goal_version(self, goal_id: str) -> int:
+        """Return a number that changes whenever the goal or one of its tasks does."""
+        return self._goal_versions.get(goal_id, 0)
+
+    def _touch_goal(self, goal_id: str) -> None:
+        self._goal_versions[goal_id] = next(self._versions)
+
+    def reindex(self) -> None:
+        """Rebuild the deadline index after ``tasks`` was replaced."""
+        self.deadlines.clear("task")
+        for task in self.tasks.values():
+            self._index_task(task)
         
     async def create_task(self, task: Task) -> str:
         """Create a new task."""
@@ -54,6 +81,7 @@ class TaskManager:
             task.dependencies = []
         
         self.tasks[task.id] = task
+        self._index_task(task)
         
         # If task is linked to a goal, update goal
         if task.goal_id and task.goal_id in self.goals:
@@ -70,11 +98,15 @@ class TaskManager:
             return None
             
         task = self.tasks[task_id]
+        if task.goal_id and updates.get("goal_id", task.goal_id) != task.goal_id:
+            # Moved to another goal
+            self._touch_goal(task.goal_id)
         for key, value in updates.items():
             if hasattr(task, key):
                 setattr(task, key, value)
         
         task.updated_at = datetime.now()
+        self._index_task(task)
         
         # Update parent task progress if this is a subtask
         if task.parent_task_id:
@@ -110,6 +142,10 @@ class TaskManager:
                 setattr(goal, key, value)
         
         goal.updated_at = datetime.now()
+        self._touch_goal(goal_id)
+        if "user_id" in updates:
+            for task in await self.get_tasks_by_goal(goal_id):
+                self._index_task(task)
         return goal
 
     async def get_task(self, task_id: str) -> Optional[Task]:
@@ -156,6 +192,7 @@ class TaskManager:
         """Update goal progress based on associated tasks."""
         if goal_id not in self.goals:
             return
+        self._touch_goal(goal_id)
             
         goal = self.goals[goal_id]
         if not goal.tasks:
@@ -33,6 +33,7 @@ class Project(BaseModelWithId):
     tasks: List[str] = []  # List of task IDs
     budget: Optional[float] = None
     milestones: List[Dict[str, Any]] = []
+    user_id: Optional[int] = None  # Telegram user who created the project
     created_at: datetime = Field(default_factory=datetime.now)
     updated_at: datetime = Field(default_factory=datetime.now)
 
@@ -1,14 +1,24 @@
 """Persistence handling for the Artist Manager Bot."""
-from typing import Dict, Optional, Set, Any, Tuple, Union
+from typing import Callable, Dict, Mapping, Optional, Set, Any, Tuple, Union
+from types import MappingProxyType
 from telegram.ext import BasePersistence
-import pickle
 from pathlib import Path
 import logging
 from datetime import datetime
 import asyncio
+import copy
 import json
 import threading
 from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from .wal import WriteAheadLog, OP_SET, OP_DROP
+from .sqlite import SQLitePersistence
+from .scheduler import WriteBehindScheduler
+from .store import DELETE
+from .shards import KINDS, ShardSet
+from .cache import WorkingSet
+from .serialization import dumps, loads
+from .backup import BackupStore
 
 # Type aliases
 ConversationDict = Dict[str, Dict[Tuple[Any, ...], Optional[object]]]
@@ -17,13 +27,50 @@ CallbackData = Dict[str, Any]
 logger = logging.getLogger(__name__)
 
 class RobustPersistence(BasePersistence):
-    """Robust persistence implementation with backup support."""
+    """Robust persistence implementation with backup support.
+
+    Changes are written behind: updates only mark keys dirty, and the dirty
+    set is written once per ``update_interval`` or as soon as it holds
+    ``flush_threshold`` keys. By default a write is a full backup snapshot.
+    With ``wal_mode`` enabled, only the dirty keys are appended to a
+    write-ahead log next to ``filepath``, and the log is compacted into a
+    snapshot every ``compact_interval`` records.
+
+    Pickling and file I/O run in a single-worker executor on a snapshot taken
+    on the event loop, so handlers keep being served while a save is running.
+    Jobs run in submission order, which keeps log appends and snapshots
+    consistent with each other.
+
+    With ``lazy_load`` enabled, user and chat data live in indexed record
+    stores next to ``filepath`` instead of the snapshot. Startup only reads
+    the indexes, and a user's data is read when PTB first refreshes it for an
+    incoming update. Snapshots and backups then cover bot data, callback
+    data and conversations only.
+
+    ``max_cached`` and ``cache_ttl`` bound the lazily loaded working set:
+    the least recently used records beyond ``max_cached``, or idle for
+    ``cache_ttl`` seconds, are evicted once they are on disk and read again
+    on the next update for them. The application's own copies are dropped
+    through the callback given to ``set_eviction_callback``.
+
+    ``shards`` partitions the user and chat records over that many shards by
+    id hash, with or without lazy loading. Each shard has its own lock and
+    executor, so saves for users in different shards run in parallel, and
+    an unreadable shard is reset on its own instead of failing the load.
+    """
     
     def __init__(
         self, 
         filepath: str,
         update_interval: int = 60,
-        backup_count: int = 3
+        backup_count: int = 3,
+        wal_mode: bool = False,
+        compact_interval: int = 1000,
+        flush_threshold: int = 100,
+        lazy_load: bool = False,
+        max_cached: Optional[int] = None,
+        cache_ttl: Optional[float] = None,
+        shards: int = 1
     ):
         # Initialize base class with default settings
         super().__init__(
@@ -41,11 +88,41 @@ class RobustPersistence(BasePersistence):
         self.backup_count = backup_count
         self.backup_dir = self.filepath.parent / "backups"
         self.backup_dir.mkdir(exist_ok=True)
+        self._backups = BackupStore(self.backup_dir, keep=backup_count)
+        
+        # Write-ahead log for incremental updates
+        self.compact_interval = compact_interval
+        self._wal = WriteAheadLog(self.filepath.with_suffix(".wal")) if wal_mode else None
+        self._wal_seq = 0
+        
+        # Indexed per-user and per-chat records, sharded by id hash
+        self.lazy_load = lazy_load
+        self._record_dir = self.filepath.parent / f"{self.filepath.stem}.records"
+        self._shards: Optional[ShardSet] = None
+        if lazy_load or shards > 1:
+            self._shards = ShardSet(self._record_dir, shards)
+        # Records held by the application, in least recently used order
+        self._working_set = WorkingSet(max_size=max_cached, ttl=cache_ttl)
+        if self._working_set.bounded and not lazy_load:
+            raise ValueError("Evicting cached user data requires lazy_load")
+        self._on_evict: Optional[Callable[[str, int], bool]] = None
+        # Records handed to the application whose changes have not come back
+        # through update_user_data/update_chat_data yet
+        self._awaiting_update: Set[Tuple[str, int]] = set()
+        
+        # Coalesce bursts of updates into one write per interval
+        self._scheduler = WriteBehindScheduler(
+            self._write_dirty,
+            interval=update_interval,
+            max_dirty=flush_threshold
+        )
         
         # Initialize data containers
         self._user_data = defaultdict(dict)
         self._chat_data = defaultdict(dict)
         self._bot_data = {}
+        # Set while the application holds self._bot_data itself
+        self._bot_data_shared = False
         self._callback_data = None
         self._conversations = {}
         
@@ -53,6 +130,7 @@ class RobustPersistence(BasePersistence):
         self._update_task = None
         self._last_update = None
         self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="persistence")
         self._closed = False
 
     @property
@@ -75,57 +153,92 @@ class RobustPersistence(BasePersistence):
         """Return whether callback_data should be stored."""
         return self._store_callback_data
 
-    async def get_user_data(self) -> Dict[int, Dict[str, Any]]:
-        """Return user_data from persistence."""
+    def get_stats(self) -> Dict[str, int]:
+        """Return write-behind, working set and backup counters."""
+        stats = dict(self._scheduler.stats)
+        stats["pending"] = self._scheduler.pending
+        stats.update(self._working_set.stats)
+        stats["cached"] = len(self._working_set)
+        stats.update({f"backup_{name}": value for name, value in self._backups.stats.items()})
+        return stats
+
+    def set_eviction_callback(self, callback: Callable[[str, int], bool]) -> None:
+        """Set the callback that drops an evicted record from the application.
+
+        It is called with the kind ("user_data" or "chat_data") and the id,
+        and returns False if the record cannot be evicted right now. Records
+        refreshed for an update are not offered until the application has
+        passed their data back, since it reads them to do so.
+        """
+        self._on_evict = callback
+
+    async def get_user_data(self) -> Mapping[int, Dict[str, Any]]:
+        """Return a read-only view of user_data.
+
+        PTB copies the entries into its own dict, so no copy is made here.
+        In lazy mode this only contains users held in memory; the rest are
+        loaded on demand by refresh_user_data.
+        """
         if not self.store_user_data:
             return {}
-        return self._user_data.copy()
+        return MappingProxyType(self._user_data)
 
-    async def get_chat_data(self) -> Dict[int, Dict[str, Any]]:
-        """Return chat_data from persistence."""
+    async def get_chat_data(self) -> Mapping[int, Dict[str, Any]]:
+        """Return a read-only view of chat_data."""
         if not self.store_chat_data:
             return {}
-        return self._chat_data.copy()
+        return MappingProxyType(self._chat_data)
 
     async def get_bot_data(self) -> Dict[str, Any]:
-        """Return bot_data from persistence."""
+        """Return bot_data from persistence.
+
+        PTB requires a real dict, so the stored one is handed out and copied
+        on write instead: a snapshot taken before the application's next
+        update_bot_data copies it first.
+        """
         if not self.store_bot_data:
             return {}
-        return self._bot_data.copy()
+        self._bot_data_shared = True
+        return self._bot_data
 
     async def get_callback_data(self) -> Optional[Dict[str, Any]]:
         """Return callback_data from persistence."""
         if not self.store_callback_data:
             return None
-        return self._callback_data.copy()
+        return self._callback_data
 
-    async def get_conversations(self, name: str) -> Dict[Tuple[int, ...], object]:
-        """Return conversations from persistence."""
-        return self._conversations.get(name, {}).copy()
+    async def get_conversations(self, name: str) -> Mapping[Tuple[int, ...], object]:
+        """Return a read-only view of the conversations of a handler."""
+        return MappingProxyType(self._conversations.get(name, {}))
 
     async def update_user_data(self, user_id: int, data: Dict) -> None:
         """Update user_data in persistence."""
         if self.store_user_data:
             self._user_data[user_id] = data
-            await self._backup_data()
+            self._awaiting_update.discard(("user_data", user_id))
+            self._touch("user_data", user_id)
+            await self._mark_dirty("user_data", user_id)
 
     async def update_chat_data(self, chat_id: int, data: Dict) -> None:
         """Update chat_data in persistence."""
         if self.store_chat_data:
             self._chat_data[chat_id] = data
-            await self._backup_data()
+            self._awaiting_update.discard(("chat_data", chat_id))
+            self._touch("chat_data", chat_id)
+            await self._mark_dirty("chat_data", chat_id)
 
     async def update_bot_data(self, data: Dict) -> None:
         """Update bot_data in persistence."""
         if self.store_bot_data:
             self._bot_data = data
-            await self._backup_data()
+            self._bot_data_shared = False
+            await self._mark_dirty("bot_data")
 
     async def update_callback_data(self, data: Dict[str, Any]) -> None:
         """Update callback_data in persistence."""
         if self.store_callback_data:
             self._callback_data = data
-            await self._backup_data()
+            await self._mark_dirty("callback_data")
 
     async def update_conversation(self, name: str, key: Tuple[int, ...], new_state: Optional[object]) -> None:
         """Update conversation data in persistence."""
@@ -136,84 +249,181 @@ class RobustPersistence(BasePersistence):
             self._conversations[name].pop(key, None)
         else:
             self._conversations[name][key] = new_state
-            
-        await self._backup_data()
+        await self._mark_dirty("conversations", (name, key))
 
-    async def flush(self) -> None:
-        """Flush all data to disk."""
+    def _snapshot_data(self) -> Dict[str, Any]:
+        """Take a snapshot of the in-memory state for serialization.
+
+        PTB hands deep copies to ``update_*``, so stored values are replaced
+        rather than mutated. Copying the containers is therefore enough to
+        decouple the snapshot from updates arriving while it is written.
+        """
+        return {
+            "user_data": dict(self._user_data) if self.store_user_data and self._shards is None else {},
+            "chat_data": dict(self._chat_data) if self.store_chat_data and self._shards is None else {},
+            "bot_data": self._owned_bot_data() if self.store_bot_data else {},
+            "callback_data": self._callback_data if self.store_callback_data else {},
+            "conversations": {name: dict(states) for name, states in self._conversations.items()},
+            "wal_seq": self._wal_seq,
+            "timestamp": datetime.now().isoformat()
+        }
+
+    def _owned_bot_data(self) -> Dict[str, Any]:
+        """Return bot_data that the application cannot mutate during a write."""
+        if self._bot_data_shared:
+            return copy.deepcopy(self._bot_data)
+        return self._bot_data
+
+    async def _run_in_executor(self, func, *args):
+        """Run blocking serialization or file I/O in the persistence executor."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, func, *args)
+
+    async def _mark_dirty(self, kind: str, key: Any = None) -> None:
+        """Schedule a changed key to be written behind."""
         if self._closed:
             return
+        await self._scheduler.mark_dirty(kind, key)
+
+    def _current_change(self, kind: str, key: Any) -> Tuple[str, Any]:
+        """Return the WAL operation and value that reproduce a key's current state."""
+        if kind == "bot_data":
+            return OP_SET, self._owned_bot_data()
+        if kind == "callback_data":
+            return OP_SET, self._callback_data
             
-        try:
-            with self._lock:
-                data = {
-                    "user_data": self._user_data if self.store_user_data else {},
-                    "chat_data": self._chat_data if self.store_chat_data else {},
-                    "bot_data": self._bot_data if self.store_bot_data else {},
-                    "callback_data": self._callback_data if self.store_callback_data else {},
-                    "conversations": self._conversations,
-                    "timestamp": datetime.now().isoformat()
-                }
-                
-                # Create parent directory if it doesn't exist
-                self.filepath.parent.mkdir(parents=True, exist_ok=True)
-                
-                # Save to temporary file first
-                temp_path = self.filepath.with_suffix('.tmp')
-                with open(temp_path, "wb") as f:
-                    pickle.dump(data, f)
-                    
-                # Rename temporary file to actual file
-                temp_path.replace(self.filepath)
-                
-                # Create backup
-                await self._backup_data()
-                
-                self._last_update = datetime.now()
-                logger.info("Successfully flushed persistence data")
+        if kind == "conversations":
+            name, conversation_key = key
+            container, key = self._conversations.get(name, {}), conversation_key
+        else:
+            container = self._user_data if kind == "user_data" else self._chat_data
+            
+        if key in container:
+            return OP_SET, container[key]
+        return OP_DROP, None
+
+    async def _write_records(self, dirty: Set[Tuple[str, Any]]) -> Set[Tuple[str, Any]]:
+        """Write dirty user and chat keys to their record shards.
+
+        Returns the dirty keys that are not kept in a record store.
+        """
+        if self._shards is None:
+            return dirty
+            
+        changes: Dict[str, Dict[Any, Any]] = {kind: {} for kind in KINDS}
+        remaining = set()
+        for kind, key in dirty:
+            if kind in changes:
+                op, value = self._current_change(kind, key)
+                changes[kind][key] = value if op == OP_SET else DELETE
+            else:
+                remaining.add((kind, key))
                 
+        try:
+            await self._shards.write(changes)
         except Exception as e:
-            logger.error(f"Error flushing persistence data: {str(e)}")
+            logger.error(f"Error writing user and chat records: {str(e)}")
             raise
+            
+        # Only changes that are not on disk yet stay in memory
+        for kind, batch in changes.items():
+            container = self._user_data if kind == "user_data" else self._chat_data
+            for key, value in batch.items():
+                if container.get(key) is value:
+                    del container[key]
+        return remaining
 
-    async def _backup_data(self) -> None:
-        """Create a backup of the current data."""
+    async def _write_dirty(self, dirty: Set[Tuple[str, Any]]) -> None:
+        """Persist a batch of dirty keys to the WAL, or as a full snapshot without one."""
         if self._closed:
             return
             
+        dirty = await self._write_records(dirty)
+        if not dirty:
+            return
+            
+        if self._wal is None:
+            await self._write_full_snapshot()
+            return
+            
+        # Values are captured now; sequence numbers order them against snapshots
+        records = []
+        for kind, key in dirty:
+            op, value = self._current_change(kind, key)
+            self._wal_seq += 1
+            records.append((self._wal_seq, op, kind, key, value))
+            
         try:
-            with self._lock:
-                current_time = datetime.now().strftime("%Y%m%d_%H%M%S")
-                backup_path = self.backup_dir / f"persistence_backup_{current_time}.pickle"
-                
-                data = {
-                    "user_data": self._user_data if self.store_user_data else {},
-                    "chat_data": self._chat_data if self.store_chat_data else {},
-                    "bot_data": self._bot_data if self.store_bot_data else {},
-                    "callback_data": self._callback_data if self.store_callback_data else {},
-                    "conversations": self._conversations,
-                    "timestamp": datetime.now().isoformat()
-                }
-                
-                # Write to temporary file first
-                temp_path = backup_path.with_suffix('.tmp')
-                with open(temp_path, "wb") as f:
-                    pickle.dump(data, f)
-                    
-                # Rename temporary file to actual backup
-                temp_path.replace(backup_path)
+            await self._run_in_executor(self._wal.append, records)
+        except Exception as e:
+            logger.error(f"Error appending to write-ahead log: {str(e)}")
+            raise
+            
+        if self._wal.entries >= self.compact_interval:
+            logger.info(f"Compacting write-ahead log after {self._wal.entries} records")
+            await self._write_full_snapshot()
+
+    def _write_file(self, path: Path, data: Dict[str, Any]) -> None:
+        """Atomically serialize data to path via a temporary file."""
+        with self._lock:
+            # Create parent directory if it doesn't exist
+            path.parent.mkdir(parents=True, exist_ok=True)
+            
+            # Save to temporary file first
+            temp_path = path.with_suffix('.tmp')
+            with open(temp_path, "wb") as f:
+                f.write(dumps(data))
                 
-                # Clean up old backups
-                backups = sorted(self.backup_dir.glob("persistence_backup_*.pickle"))
-                while len(backups) > self.backup_count:
-                    backups[0].unlink()
-                    backups = backups[1:]
-                    
-                self._last_update = datetime.now()
-                logger.debug(f"Created backup: {backup_path}")
+            # Rename temporary file to actual file
+            temp_path.replace(path)
+
+    def _write_snapshot(self, data: Dict[str, Any]) -> None:
+        """Write the main snapshot and drop the log records it contains."""
+        self._write_file(self.filepath, data)
+        
+        # Every record submitted before this job is covered by the snapshot
+        if self._wal is not None:
+            self._wal.truncate()
+
+    def _write_backup(self, data: Dict[str, Any]) -> Path:
+        """Write an incremental backup; unchanged data is shared with older ones."""
+        return self._backups.create(data)
+
+    async def _write_full_snapshot(self) -> None:
+        """Write the main snapshot and a backup of the current state."""
+        data = self._snapshot_data()
+        await self._run_in_executor(self._write_snapshot, data)
+        backup_path = await self._run_in_executor(self._write_backup, data)
+        
+        self._last_update = datetime.now()
+        logger.debug(f"Created backup: {backup_path}")
+
+    async def flush(self) -> None:
+        """Flush all data to disk."""
+        if self._closed:
+            return
+            
+        try:
+            # Record stores need their pending keys written; the snapshot
+            # contains every other pending change
+            batch = self._scheduler.drain()
+            try:
+                remaining = await self._write_records(batch)
+            except Exception:
+                # Keep the keys dirty so the next flush retries them
+                self._scheduler.restore(batch)
+                raise
+            try:
+                await self._write_full_snapshot()
+            except Exception:
+                # Written records left memory and must not be written again
+                self._scheduler.restore(remaining)
+                raise
+            self._scheduler.mark_written(batch)
+            logger.info("Successfully flushed persistence data")
                 
         except Exception as e:
-            logger.error(f"Error creating backup: {str(e)}")
+            logger.error(f"Error flushing persistence data: {str(e)}")
             raise
 
     async def close(self) -> None:
@@ -222,15 +432,22 @@ class RobustPersistence(BasePersistence):
             return
             
         try:
-            # Final flush of data
+            # Final flush of data, including anything still pending
+            self._scheduler.cancel()
             await self.flush()
+            if self._wal is not None:
+                await self._run_in_executor(self._wal.close)
+            if self._shards is not None:
+                await self._shards.close()
+            self._executor.shutdown(wait=True)
             
             # Clear all data
             self._user_data.clear()
             self._chat_data.clear()
-            self._bot_data.clear()
-            self._callback_data.clear()
+            self._bot_data = {}
+            self._callback_data = None
             self._conversations.clear()
+            self._working_set.clear()
             
             self._closed = True
             logger.info("Successfully closed persistence")
@@ -239,38 +456,101 @@ class RobustPersistence(BasePersistence):
             logger.error(f"Error closing persistence: {str(e)}")
             raise
 
+    def _touch(self, kind: str, key: int) -> None:
+        """Mark a lazily loaded record as recently used."""
+        if self.lazy_load:
+            self._working_set.touch((kind, key))
+
+    async def _load_record(self, kind: str, key: int) -> Optional[Dict]:
+        """Read a record the application does not hold yet from its store."""
+        container = self._user_data if kind == "user_data" else self._chat_data
+        cache_key = (kind, key)
+        if cache_key in self._working_set or key in container:
+            self._working_set.stats["hits"] += 1
+            self._touch(kind, key)
+            return None
+            
+        self._working_set.stats["misses"] += 1
+        value = None
+        if self._shards.contains(kind, key):
+            try:
+                value = await self._shards.get(kind, key)
+            except Exception as e:
+                logger.error(f"Error loading {kind} record {key}: {str(e)}")
+                return None
+                
+        # An update for the key may have arrived while it was being read
+        if cache_key in self._working_set or key in container:
+            value = None
+        self._touch(kind, key)
+        return value
+
+    def evict_idle(self) -> int:
+        """Evict records beyond the working set limits and return how many.
+
+        Only records whose latest state is on disk are evicted; they are read
+        from the record store again on the next update for them.
+        """
+        evicted = 0
+        for cache_key in self._working_set.candidates():
+            kind, key = cache_key
+            container = self._user_data if kind == "user_data" else self._chat_data
+            if key in container or cache_key in self._awaiting_update:
+                continue
+            if self._on_evict is not None and not self._on_evict(kind, key):
+                continue
+            self._working_set.discard(cache_key)
+            self._working_set.stats["evictions"] += 1
+            evicted += 1
+            
+        if evicted:
+            logger.debug(f"Evicted {evicted} idle records from memory")
+        return evicted
+
     async def refresh_user_data(self, user_id: int, user_data: Dict) -> Dict:
-        """Refresh user data from persistence."""
-        if not self.store_user_data:
-            return user_data
-        self._user_data[user_id] = user_data
+        """Refresh user data from persistence.
+
+        The application's live dict is not stored here; PTB passes a deep copy
+        to update_user_data whenever it changes. In lazy mode the user's
+        stored data is read into it the first time the user is seen.
+        """
+        if self.lazy_load and self.store_user_data:
+            self._awaiting_update.add(("user_data", user_id))
+            stored = await self._load_record("user_data", user_id)
+            if stored:
+                user_data.update(stored)
+            self.evict_idle()
         return user_data
 
     async def refresh_chat_data(self, chat_id: int, chat_data: Dict) -> Dict:
         """Refresh chat data from persistence."""
-        if not self.store_chat_data:
-            return chat_data
-        self._chat_data[chat_id] = chat_data
+        if self.lazy_load and self.store_chat_data:
+            self._awaiting_update.add(("chat_data", chat_id))
+            stored = await self._load_record("chat_data", chat_id)
+            if stored:
+                chat_data.update(stored)
+            self.evict_idle()
         return chat_data
 
     async def refresh_bot_data(self, bot_data: Dict) -> Dict:
         """Refresh bot data from persistence."""
-        if not self.store_bot_data:
-            return bot_data
-        self._bot_data = bot_data
         return bot_data
 
     async def drop_chat_data(self, chat_id: int) -> None:
         """Drop chat data from persistence."""
         if self.store_chat_data:
             self._chat_data.pop(chat_id, None)
-            await self._backup_data()
+            self._awaiting_update.discard(("chat_data", chat_id))
+            self._working_set.discard(("chat_data", chat_id))
+            await self._mark_dirty("chat_data", chat_id)
 
     async def drop_user_data(self, user_id: int) -> None:
         """Drop user data from persistence."""
         if self.store_user_data:
             self._user_data.pop(user_id, None)
-            await self._backup_data()
+            self._awaiting_update.discard(("user_data", user_id))
+            self._working_set.discard(("user_data", user_id))
+            await self._mark_dirty("user_data", user_id)
 
     async def refresh_callback_data(self, callback_data: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
         """Refresh callback data from persistence."""
@@ -284,63 +564,137 @@ class RobustPersistence(BasePersistence):
         self._callback_data = merged
         return merged
 
+    def _apply_data(self, data: Dict[str, Any]) -> None:
+        """Apply a loaded snapshot to the in-memory state."""
+        # Load storage flags
+        store_flags = data.get("store_flags", {})
+        self._store_user_data = store_flags.get("_store_user_data", True)
+        self._store_chat_data = store_flags.get("_store_chat_data", True)
+        self._store_bot_data = store_flags.get("_store_bot_data", True)
+        self._store_callback_data = store_flags.get("_store_callback_data", True)
+        
+        # Load data
+        if self.store_user_data:
+            self._user_data = data.get("user_data", {})
+        if self.store_chat_data:
+            self._chat_data = data.get("chat_data", {})
+        if self.store_bot_data:
+            self._bot_data = data.get("bot_data", {})
+        if self.store_callback_data:
+            self._callback_data = data.get("callback_data", {})
+        self._conversations = data.get("conversations", {})
+        self._wal_seq = data.get("wal_seq", 0)
+
+    def _apply_change(self, op: str, kind: str, key: Any, value: Any) -> None:
+        """Apply a single write-ahead log record to the in-memory state."""
+        if kind == "bot_data":
+            self._bot_data = value if op == OP_SET else {}
+            return
+        if kind == "callback_data":
+            self._callback_data = value if op == OP_SET else None
+            return
+            
+        if kind == "user_data":
+            target = self._user_data
+        elif kind == "chat_data":
+            target = self._chat_data
+        elif kind == "conversations":
+            name, key = key
+            target = self._conversations.setdefault(name, {})
+        else:
+            logger.warning(f"Skipping write-ahead log record of unknown kind: {kind}")
+            return
+            
+        if op == OP_DROP:
+            target.pop(key, None)
+        else:
+            target[key] = value
+
+    def _replay_wal(self) -> None:
+        """Replay the write-ahead log on top of the loaded snapshot."""
+        if self._wal is None:
+            return
+            
+        applied = 0
+        for seq, op, kind, key, value in self._wal.replay(after_seq=self._wal_seq):
+            self._apply_change(op, kind, key, value)
+            self._wal_seq = seq
+            applied += 1
+            
+        if applied:
+            logger.info(f"Replayed {applied} write-ahead log records")
+
     async def load(self) -> None:
-        """Load data from disk with backup support."""
+        """Load data from disk with backup support.
+
+        The newest readable snapshot is loaded first (main file, then backups)
+        and any write-ahead log records are replayed on top of it. Record
+        shards are opened concurrently; in lazy mode only their indexes are
+        read.
+        """
+        if not self._load_snapshot():
+            logger.warning("Could not load data from main file or backups. Starting fresh.")
+        self._replay_wal()
+        
+        if self._shards is None:
+            return
+        await self._shards.open()
+        await self._migrate_to_stores()
+        if not self.lazy_load:
+            if self.store_user_data:
+                self._user_data.update(await self._shards.items("user_data"))
+            if self.store_chat_data:
+                self._chat_data.update(await self._shards.items("chat_data"))
+
+    async def _migrate_to_stores(self) -> None:
+        """Move user and chat data found in a snapshot into the record stores."""
+        migrated = 0
+        for kind, container in (("user_data", self._user_data), ("chat_data", self._chat_data)):
+            if not container:
+                continue
+            await self._shards.write({kind: dict(container)})
+            migrated += len(container)
+            container.clear()
+            
+        if migrated:
+            # Rewrite the snapshot without them
+            await self._write_full_snapshot()
+            logger.info(f"Migrated {migrated} user and chat records to indexed storage")
+
+    def _load_snapshot(self) -> bool:
+        """Load the main snapshot file, falling back to the newest backup."""
         try:
             if self.filepath.exists():
                 with open(self.filepath, "rb") as f:
-                    data = pickle.load(f)
+                    data = loads(f.read())
                     
-                # Load storage flags
-                store_flags = data.get("store_flags", {})
-                self._store_user_data = store_flags.get("_store_user_data", True)
-                self._store_chat_data = store_flags.get("_store_chat_data", True)
-                self._store_bot_data = store_flags.get("_store_bot_data", True)
-                self._store_callback_data = store_flags.get("_store_callback_data", True)
-                
-                # Load data
-                if self.store_user_data:
-                    self._user_data = data.get("user_data", {})
-                if self.store_chat_data:
-                    self._chat_data = data.get("chat_data", {})
-                if self.store_bot_data:
-                    self._bot_data = data.get("bot_data", {})
-                if self.store_callback_data:
-                    self._callback_data = data.get("callback_data", {})
-                self._conversations = data.get("conversations", {})
+                self._apply_data(data)
                 logger.info("Successfully loaded persistence data")
-                return
+                return True
                 
         except Exception as e:
             logger.error(f"Error loading persistence data: {str(e)}", exc_info=True)
             
-        # Try loading from backup
+        # Try loading from backup, newest first
+        for manifest_path in self._backups.list():
+            try:
+                self._apply_data(self._backups.restore(manifest_path))
+                logger.info(f"Successfully loaded persistence data from backup: {manifest_path}")
+                return True
+            except Exception as e:
+                logger.warning(f"Failed to load from backup {manifest_path}: {e}")
+            
+        # Backups written before incremental backups were introduced
         try:
             backups = sorted(self.backup_dir.glob("persistence_backup_*.pickle"), reverse=True)
             for backup in backups:
                 try:
                     with open(backup, "rb") as f:
-                        data = pickle.load(f)
+                        data = loads(f.read())
                         
-                    # Load storage flags
-                    store_flags = data.get("store_flags", {})
-                    self._store_user_data = store_flags.get("_store_user_data", True)
-                    self._store_chat_data = store_flags.get("_store_chat_data", True)
-                    self._store_bot_data = store_flags.get("_store_bot_data", True)
-                    self._store_callback_data = store_flags.get("_store_callback_data", True)
-                    
-                    # Load data
-                    if self.store_user_data:
-                        self._user_data = data.get("user_data", {})
-                    if self.store_chat_data:
-                        self._chat_data = data.get("chat_data", {})
-                    if self.store_bot_data:
-                        self._bot_data = data.get("bot_data", {})
-                    if self.store_callback_data:
-                        self._callback_data = data.get("callback_data", {})
-                    self._conversations = data.get("conversations", {})
+                    self._apply_data(data)
                     logger.info(f"Successfully loaded persistence data from backup: {backup}")
-                    return
+                    return True
                 except Exception as e:
                     logger.warning(f"Failed to load from backup {backup}: {e}")
                     continue
@@ -348,4 +702,4 @@ class RobustPersistence(BasePersistence):
         except Exception as e:
             logger.error(f"Error loading from backups: {str(e)}")
             
-        logger.warning("Could not load data from main file or backups. Starting fresh.")
\ No newline at end of file
+        return False
@@ -0,0 +1,187 @@
+"""Deduplicated, compressed backups for the Artist Manager Bot persistence."""
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from datetime import datetime
+from pathlib import Path
+import hashlib
+import logging
+import os
+import threading
+import zlib
+
+from .serialization import dumps, loads
+
+logger = logging.getLogger(__name__)
+
+_MANIFEST_VERSION = 1
+
+
+class BackupStore:
+    """Content-addressed backup storage with shared, compressed chunks.
+
+    A backup is a small manifest that maps each top-level key of the backed
+    up state to the digest of a chunk. Mappings listed in ``split_keys``,
+    such as ``user_data``, get one chunk per entry, so a backup after a few
+    users changed only writes chunks for those users. Chunks are compressed
+    and stored once under ``chunks/`` no matter how many backups use them.
+
+    Manifests are named after a sequence number that increases with every
+    backup, so any number of backups can be taken within the same second.
+    Only the newest ``keep`` manifests are retained; chunks no longer used
+    by any of them are deleted.
+    """
+
+    def __init__(
+        self,
+        directory: Path,
+        keep: int = 3,
+        split_keys: Iterable[str] = ("user_data", "chat_data"),
+        compression_level: int = 6
+    ):
+        self.directory = Path(directory)
+        self.keep = max(1, keep)
+        self.split_keys = tuple(split_keys)
+        self.compression_level = compression_level
+        self.chunk_dir = self.directory / "chunks"
+        self.manifest_dir = self.directory / "manifests"
+        self._lock = threading.Lock()
+        self._sequence: Optional[int] = None
+        # Digests of values written by the previous backup, by identity
+        self._digests: Dict[Tuple[str, Any], Tuple[Any, str]] = {}
+        self.stats: Dict[str, int] = {
+            "backups": 0,
+            "chunks_written": 0,
+            "chunks_reused": 0,
+            "bytes_written": 0
+        }
+
+    def list(self) -> List[Path]:
+        """Return the manifests of all retained backups, newest first."""
+        if not self.manifest_dir.exists():
+            return []
+        return sorted(self.manifest_dir.glob("*.manifest"), reverse=True)
+
+    def _chunk_path(self, digest: str) -> Path:
+        return self.chunk_dir / digest[:2] / digest
+
+    def _write_atomic(self, path: Path, payload: bytes) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        temp_path = path.with_name(path.name + ".tmp")
+        with open(temp_path, "wb") as f:
+            f.write(payload)
+            f.flush()
+            os.fsync(f.fileno())
+        temp_path.replace(path)
+
+    def _put_chunk(self, value: Any) -> str:
+        """Store a value as a chunk unless an identical one exists."""
+        payload = dumps(value)
+        digest = hashlib.sha256(payload).hexdigest()
+        path = self._chunk_path(digest)
+        if path.exists():
+            self.stats["chunks_reused"] += 1
+            return digest
+
+        compressed = zlib.compress(payload, self.compression_level)
+        self._write_atomic(path, compressed)
+        self.stats["chunks_written"] += 1
+        self.stats["bytes_written"] += len(compressed)
+        return digest
+
+    def _get_chunk(self, digest: str) -> Any:
+        with open(self._chunk_path(digest), "rb") as f:
+            payload = zlib.decompress(f.read())
+        if hashlib.sha256(payload).hexdigest() != digest:
+            raise ValueError(f"Backup chunk {digest} is corrupt")
+        return loads(payload)
+
+    def _next_sequence(self) -> int:
+        if self._sequence is None:
+            manifests = self.list()
+            self._sequence = int(manifests[0].name.split("_", 1)[0]) if manifests else 0
+        self._sequence += 1
+        return self._sequence
+
+    def create(self, data: Dict[str, Any]) -> Path:
+        """Back up ``data`` and return the path of its manifest."""
+        with self._lock:
+            digests = {}
+            entries: Dict[str, Any] = {}
+            for key, value in data.items():
+                if key in self.split_keys and isinstance(value, dict):
+                    split = {}
+                    for item_key, item in value.items():
+                        # Values are replaced rather than mutated, so an
+                        # unchanged object still has the same content
+                        cached = self._digests.get((key, item_key))
+                        if cached is not None and cached[0] is item:
+                            self.stats["chunks_reused"] += 1
+                            digest = cached[1]
+                        else:
+                            digest = self._put_chunk(item)
+                        split[item_key] = digest
+                        digests[(key, item_key)] = (item, digest)
+                    entries[key] = {"split": split}
+                else:
+                    entries[key] = {"chunk": self._put_chunk(value)}
+            self._digests = digests
+
+            sequence = self._next_sequence()
+            created = datetime.now()
+            manifest = {"version": _MANIFEST_VERSION, "created": created, "entries": entries}
+            path = self.manifest_dir / f"{sequence:010d}_{created.strftime('%Y%m%d_%H%M%S')}.manifest"
+            self._write_atomic(path, dumps(manifest))
+            self.stats["backups"] += 1
+
+            self._prune()
+            return path
+
+    def restore(self, manifest_path: Optional[Path] = None) -> Dict[str, Any]:
+        """Rebuild the state stored by a backup, the newest one by default."""
+        with self._lock:
+            if manifest_path is None:
+                manifests = self.list()
+                if not manifests:
+                    raise FileNotFoundError(f"No backups in {self.directory}")
+                manifest_path = manifests[0]
+
+            with open(manifest_path, "rb") as f:
+                manifest = loads(f.read())
+
+            data = {}
+            for key, entry in manifest["entries"].items():
+                if "split" in entry:
+                    data[key] = {item_key: self._get_chunk(digest) for item_key, digest in entry["split"].items()}
+                else:
+                    data[key] = self._get_chunk(entry["chunk"])
+            return data
+
+    def _manifest_digests(self, manifest_path: Path) -> Iterable[str]:
+        with open(manifest_path, "rb") as f:
+            manifest = loads(f.read())
+        for entry in manifest["entries"].values():
+            if "split" in entry:
+                yield from entry["split"].values()
+            else:
+                yield entry["chunk"]
+
+    def _prune(self) -> None:
+        """Delete manifests beyond ``keep`` and chunks no backup refers to."""
+        manifests = self.list()
+        if len(manifests) <= self.keep:
+            return
+
+        for manifest_path in manifests[self.keep:]:
+            manifest_path.unlink()
+
+        live = set()
+        for manifest_path in manifests[:self.keep]:
+            live.update(self._manifest_digests(manifest_path))
+
+        removed = 0
+        for prefix_dir in self.chunk_dir.iterdir():
+            for chunk_path in prefix_dir.iterdir():
+                if chunk_path.name not in live:
+                    chunk_path.unlink()
+                    removed += 1
+        if removed:
+            logger.debug(f"Removed {removed} unreferenced backup chunks")
@@ -0,0 +1,74 @@
+"""Bounded working set tracking for the Artist Manager Bot persistence."""
+from typing import Any, Callable, Dict, Hashable, List, Optional
+from collections import OrderedDict
+import time
+
+
+class WorkingSet:
+    """Track which records are held in memory, in least recently used order.
+
+    Keys beyond ``max_size``, or idle for longer than ``ttl`` seconds, are
+    reported as eviction candidates. Keys used within the last ``grace``
+    seconds are never reported, so a record is not evicted while an update
+    for it may still be in flight.
+    """
+
+    def __init__(
+        self,
+        max_size: Optional[int] = None,
+        ttl: Optional[float] = None,
+        grace: float = 30.0,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.grace = grace
+        self._clock = clock
+        self._entries: "OrderedDict[Hashable, float]" = OrderedDict()
+        self.stats: Dict[str, int] = {
+            "hits": 0,
+            "misses": 0,
+            "evictions": 0
+        }
+
+    @property
+    def bounded(self) -> bool:
+        """Return whether any eviction policy is configured."""
+        return self.max_size is not None or self.ttl is not None
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._entries
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def touch(self, key: Hashable) -> None:
+        """Mark a key as most recently used."""
+        self._entries[key] = self._clock()
+        self._entries.move_to_end(key)
+
+    def discard(self, key: Hashable) -> None:
+        """Stop tracking a key."""
+        self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def candidates(self) -> List[Any]:
+        """Return keys to evict, least recently used first."""
+        if not self.bounded:
+            return []
+
+        now = self._clock()
+        excess = len(self._entries) - self.max_size if self.max_size is not None else 0
+        result = []
+        for key, last_used in self._entries.items():
+            idle = now - last_used
+            if idle < self.grace:
+                # Everything after this key was used even more recently
+                break
+            if len(result) < excess or (self.ttl is not None and idle >= self.ttl):
+                result.append(key)
+            else:
+                break
+        return result
@@ -0,0 +1,106 @@
+"""Write-behind scheduling for the Artist Manager Bot persistence."""
+from typing import Any, Awaitable, Callable, Dict, Optional, Set, Tuple
+import asyncio
+import logging
+
+logger = logging.getLogger(__name__)
+
+DirtyKey = Tuple[str, Any]
+
+
+class WriteBehindScheduler:
+    """Coalesce persistence changes and write them in batches.
+
+    Changes only mark a ``(kind, key)`` pair as dirty. The dirty set is handed
+    to ``write`` once ``interval`` seconds have passed since the first pending
+    change, or as soon as it reaches ``max_dirty`` entries. Repeated changes to
+    the same key in between are coalesced into a single write.
+    """
+
+    def __init__(
+        self,
+        write: Callable[[Set[DirtyKey]], Awaitable[None]],
+        interval: float = 60,
+        max_dirty: int = 100
+    ):
+        self._write = write
+        self.interval = interval
+        self.max_dirty = max_dirty
+        self._dirty: Set[DirtyKey] = set()
+        self._timer: Optional[asyncio.Task] = None
+        self._flush_lock = asyncio.Lock()
+        self.stats: Dict[str, int] = {
+            "updates": 0,
+            "coalesced": 0,
+            "written": 0,
+            "flushes": 0
+        }
+
+    @property
+    def pending(self) -> int:
+        """Return the number of dirty keys waiting to be written."""
+        return len(self._dirty)
+
+    async def mark_dirty(self, kind: str, key: Any = None) -> None:
+        """Record that ``key`` of ``kind`` changed."""
+        self.stats["updates"] += 1
+        dirty_key = (kind, key)
+        if dirty_key in self._dirty:
+            self.stats["coalesced"] += 1
+        self._dirty.add(dirty_key)
+
+        if len(self._dirty) >= self.max_dirty:
+            await self.flush()
+        elif self._timer is None or self._timer.done():
+            self._timer = asyncio.create_task(self._flush_later())
+
+    async def _flush_later(self) -> None:
+        """Flush the dirty set once the interval has elapsed."""
+        try:
+            await asyncio.sleep(self.interval)
+            await self.flush()
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"Error in scheduled persistence flush: {str(e)}")
+
+    async def flush(self) -> None:
+        """Write all dirty keys now."""
+        async with self._flush_lock:
+            if not self._dirty:
+                return
+
+            batch, self._dirty = self._dirty, set()
+            try:
+                await self._write(batch)
+            except Exception:
+                # Keep the keys dirty so the next flush retries them
+                self._dirty |= batch
+                raise
+
+            self.stats["written"] += len(batch)
+            self.stats["flushes"] += 1
+            logger.debug(f"Wrote {len(batch)} dirty persistence keys")
+
+    def drain(self) -> Set[DirtyKey]:
+        """Take all dirty keys for a caller that writes them itself.
+
+        The caller reports the outcome with ``mark_written`` or, if the write
+        failed, hands the keys back with ``restore``.
+        """
+        batch, self._dirty = self._dirty, set()
+        return batch
+
+    def mark_written(self, batch: Set[DirtyKey]) -> None:
+        """Count drained keys that were written."""
+        self.stats["written"] += len(batch)
+
+    def restore(self, batch: Set[DirtyKey]) -> None:
+        """Mark drained keys dirty again after their write failed."""
+        self._dirty |= batch
+
+    def cancel(self) -> None:
+        """Cancel a pending scheduled flush."""
+        if self._timer is not None and not self._timer.done() and self._timer is not asyncio.current_task():
+            self._timer.cancel()
+        self._timer = None
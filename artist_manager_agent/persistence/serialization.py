@@ -0,0 +1,248 @@
+"""Compact, schema-aware serialization for persisted Artist Manager Bot state.
+
+Values are encoded with msgpack. Registered pydantic models are stored as a
+stable type name plus their field values in schema order, and every payload
+starts with a table of the model versions and field names it was written
+with. Loading therefore does not depend on the module a class lives in, and
+``upgrade`` hooks can convert data written by older model versions.
+
+Types msgpack cannot represent (and unregistered classes) fall back to an
+embedded pickle, and payloads without the format marker are read as plain
+pickle, so existing persistence files keep loading.
+"""
+from typing import Any, Callable, Dict, List, Optional, Tuple, Type
+from datetime import date, datetime, timedelta, timezone
+from enum import Enum
+import importlib
+import logging
+import pickle
+import struct
+
+import msgpack
+from pydantic import BaseModel
+
+logger = logging.getLogger(__name__)
+
+# Marker and format version at the start of every payload
+MAGIC = b"AMS\x01"
+
+# msgpack extension type codes
+_EXT_MODEL = 1
+_EXT_DATETIME = 2
+_EXT_DATE = 3
+_EXT_TIMEDELTA = 4
+_EXT_TUPLE = 5
+_EXT_SET = 6
+_EXT_FROZENSET = 7
+_EXT_ENUM = 8
+_EXT_PICKLE = 16
+
+_EPOCH = datetime(1970, 1, 1)
+_MICROSECONDS = struct.Struct("<q")
+_AWARE = struct.Struct("<qi")
+
+# upgrade(values, from_version) -> values for the current version
+Upgrade = Callable[[Dict[str, Any], int], Dict[str, Any]]
+
+
+class ModelSchema:
+    """Registration of a pydantic model under a stable name and version."""
+
+    def __init__(self, cls: Type[BaseModel], name: str, version: int, upgrade: Optional[Upgrade]):
+        self.cls = cls
+        self.name = name
+        self.version = version
+        self.upgrade = upgrade
+        self.fields: Tuple[str, ...] = tuple(cls.model_fields)
+
+
+_schemas_by_name: Dict[str, ModelSchema] = {}
+_schemas_by_class: Dict[type, ModelSchema] = {}
+
+
+def register_model(
+    cls: Type[BaseModel],
+    name: Optional[str] = None,
+    version: int = 1,
+    upgrade: Optional[Upgrade] = None
+) -> Type[BaseModel]:
+    """Register a model for compact serialization.
+
+    ``name`` must stay the same when the class is moved or renamed. Bump
+    ``version`` when fields change in a way pydantic defaults cannot absorb,
+    and pass ``upgrade`` to convert values written by older versions.
+    """
+    schema = ModelSchema(cls, name or cls.__name__, version, upgrade)
+    existing = _schemas_by_name.get(schema.name)
+    if existing is not None and existing.cls is not cls:
+        raise ValueError(f"Model name {schema.name} is already registered for {existing.cls}")
+    _schemas_by_name[schema.name] = schema
+    _schemas_by_class[cls] = schema
+    return cls
+
+
+def _micros(delta: timedelta) -> int:
+    return (delta.days * 86400 + delta.seconds) * 1000000 + delta.microseconds
+
+
+class _Encoder:
+    """Encode one payload, collecting the schemas of the models it contains."""
+
+    def __init__(self):
+        self.schemas: Dict[str, List[Any]] = {}
+
+    def pack(self, obj: Any) -> bytes:
+        return msgpack.packb(obj, default=self._default, strict_types=True, use_bin_type=True)
+
+    def _default(self, obj: Any) -> Any:
+        # Naive datetimes are by far the most common value handled here
+        if type(obj) is datetime and obj.tzinfo is None:
+            return msgpack.ExtType(_EXT_DATETIME, _MICROSECONDS.pack(_micros(obj - _EPOCH)))
+
+        schema = _schemas_by_class.get(type(obj))
+        if schema is not None:
+            self.schemas[schema.name] = [schema.version, list(schema.fields)]
+            values = [getattr(obj, field) for field in schema.fields]
+            payload = [schema.name, values]
+            if obj.model_extra:
+                payload.append(obj.model_extra)
+            return msgpack.ExtType(_EXT_MODEL, self.pack(payload))
+
+        if isinstance(obj, datetime):
+            local = _micros(obj.replace(tzinfo=None) - _EPOCH)
+            offset = obj.utcoffset()
+            if offset is None:
+                return msgpack.ExtType(_EXT_DATETIME, _MICROSECONDS.pack(local))
+            return msgpack.ExtType(_EXT_DATETIME, _AWARE.pack(local, int(offset.total_seconds())))
+        if isinstance(obj, date):
+            return msgpack.ExtType(_EXT_DATE, _MICROSECONDS.pack(obj.toordinal()))
+        if isinstance(obj, timedelta):
+            return msgpack.ExtType(_EXT_TIMEDELTA, _MICROSECONDS.pack(_micros(obj)))
+
+        # Enums are stored as their class and value
+        if isinstance(obj, Enum):
+            cls = type(obj)
+            return msgpack.ExtType(_EXT_ENUM, self.pack([f"{cls.__module__}:{cls.__qualname__}", obj.value]))
+        if type(obj) is tuple:
+            return msgpack.ExtType(_EXT_TUPLE, self.pack(list(obj)))
+        if type(obj) is set:
+            return msgpack.ExtType(_EXT_SET, self.pack(list(obj)))
+        if type(obj) is frozenset:
+            return msgpack.ExtType(_EXT_FROZENSET, self.pack(list(obj)))
+
+        # Everything else, including subclasses of builtins such as
+        # defaultdict, is pickled so it comes back as the same type
+        try:
+            return msgpack.ExtType(_EXT_PICKLE, pickle.dumps(obj, protocol=pickle.HIGHEST_PROTOCOL))
+        except (pickle.PicklingError, AttributeError, TypeError):
+            # E.g. a defaultdict with a lambda factory
+            for base in (dict, list, str, int, float, bytes):
+                if isinstance(obj, base):
+                    logger.warning(f"Cannot pickle {type(obj).__name__}, storing it as {base.__name__}")
+                    return base(obj)
+            raise
+
+
+class _Decoder:
+    """Decode one payload using the schema table written with it."""
+
+    def __init__(self, schemas: Dict[str, List[Any]]):
+        self.schemas = schemas
+
+    def unpack(self, data: bytes) -> Any:
+        return msgpack.unpackb(data, ext_hook=self._ext_hook, raw=False, strict_map_key=False)
+
+    def _ext_hook(self, code: int, data: bytes) -> Any:
+        if code == _EXT_MODEL:
+            return self._decode_model(self.unpack(data))
+        if code == _EXT_DATETIME:
+            if len(data) == _MICROSECONDS.size:
+                return _EPOCH + timedelta(microseconds=_MICROSECONDS.unpack(data)[0])
+            local, offset = _AWARE.unpack(data)
+            value = _EPOCH + timedelta(microseconds=local)
+            return value.replace(tzinfo=timezone(timedelta(seconds=offset)))
+        if code == _EXT_DATE:
+            return date.fromordinal(_MICROSECONDS.unpack(data)[0])
+        if code == _EXT_TIMEDELTA:
+            return timedelta(microseconds=_MICROSECONDS.unpack(data)[0])
+        if code == _EXT_TUPLE:
+            return tuple(self.unpack(data))
+        if code == _EXT_SET:
+            return set(self.unpack(data))
+        if code == _EXT_FROZENSET:
+            return frozenset(self.unpack(data))
+        if code == _EXT_ENUM:
+            return self._decode_enum(*self.unpack(data))
+        if code == _EXT_PICKLE:
+            return pickle.loads(data)
+        raise ValueError(f"Unknown extension type {code} in persisted data")
+
+    def _decode_enum(self, path: str, value: Any) -> Any:
+        module, _, qualname = path.partition(":")
+        try:
+            cls: Any = importlib.import_module(module)
+            for name in qualname.split("."):
+                cls = getattr(cls, name)
+            return cls(value)
+        except (ImportError, AttributeError, ValueError) as e:
+            logger.warning(f"Cannot restore enum {path}, loading its value: {e}")
+            return value
+
+    def _decode_model(self, payload: List[Any]) -> Any:
+        name, values = payload[0], payload[1]
+        version, fields = self.schemas[name]
+        data = dict(zip(fields, values))
+        if len(payload) > 2:
+            data.update(payload[2])
+
+        schema = _schemas_by_name.get(name)
+        if schema is None:
+            logger.warning(f"No model registered as {name}, loading it as a dict")
+            return data
+        if version != schema.version:
+            if schema.upgrade is None:
+                logger.warning(f"Loading {name} version {version} as version {schema.version} without an upgrade")
+            else:
+                data = schema.upgrade(data, version)
+        return schema.cls.model_validate(data)
+
+
+def dumps(obj: Any) -> bytes:
+    """Serialize ``obj`` into the compact format."""
+    encoder = _Encoder()
+    try:
+        body = encoder.pack(obj)
+    except OverflowError:
+        # msgpack integers are limited to 64 bits
+        logger.debug("Value out of msgpack range, serializing with pickle")
+        return pickle.dumps(obj, protocol=pickle.HIGHEST_PROTOCOL)
+    return MAGIC + msgpack.packb(encoder.schemas, use_bin_type=True) + body
+
+
+def loads(data: bytes) -> Any:
+    """Deserialize data written by ``dumps``, or by pickle in older files."""
+    if not data.startswith(MAGIC):
+        return pickle.loads(data)
+
+    unpacker = msgpack.Unpacker(raw=False)
+    unpacker.feed(data[len(MAGIC):])
+    schemas = unpacker.unpack()
+    body = data[len(MAGIC) + unpacker.tell():]
+    return _Decoder(schemas).unpack(body)
+
+
+def _register_default_models() -> None:
+    """Register the pydantic models of artist_manager_agent.models by class name."""
+    from ..models import models
+
+    for name, value in vars(models).items():
+        if (
+            isinstance(value, type)
+            and issubclass(value, BaseModel)
+            and value.__module__ == models.__name__
+            and value not in _schemas_by_class
+        ):
+            register_model(value, name)
+
+
+_register_default_models()
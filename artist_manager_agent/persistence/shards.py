@@ -0,0 +1,207 @@
+"""Hash-sharded record storage for the Artist Manager Bot persistence."""
+from typing import Any, Dict, List, Optional
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+import asyncio
+import logging
+import shutil
+import zlib
+
+from .store import RecordStore
+
+logger = logging.getLogger(__name__)
+
+KINDS = ("user_data", "chat_data")
+
+
+def shard_for(key: Any, count: int) -> int:
+    """Return the shard of a key; stable across processes and restarts."""
+    return zlib.crc32(str(key).encode()) % count
+
+
+def shard_directory(directory: Path, count: int, index: int) -> Path:
+    """Return where shard ``index`` of a ``count``-shard layout lives.
+
+    A single shard uses ``directory`` itself, which is the layout written
+    before sharding was introduced.
+    """
+    if count == 1:
+        return directory
+    return directory / f"{count}_shards" / f"{index:03d}"
+
+
+class Shard:
+    """One partition of the user and chat records.
+
+    Every shard has its own lock and single-worker executor, so writes to
+    different shards run in parallel while operations on one shard keep
+    their submission order.
+    """
+
+    def __init__(self, index: int, directory: Path):
+        self.index = index
+        self.directory = directory
+        self.stores = {kind: RecordStore(directory, kind) for kind in KINDS}
+        self.lock = asyncio.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix=f"persistence-shard-{index}")
+
+    async def run(self, func, *args):
+        """Run blocking store I/O in this shard's executor."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, func, *args)
+
+    async def open(self) -> None:
+        """Open the stores, quarantining any that cannot be read."""
+        for kind, store in self.stores.items():
+            try:
+                await self.run(store.open)
+            except Exception as e:
+                moved = await self.run(store.quarantine)
+                logger.error(
+                    f"Shard {self.index} {kind} is unreadable and was reset, "
+                    f"moved {[str(path) for path in moved]} aside: {str(e)}"
+                )
+
+    async def write(self, changes: Dict[str, Dict[Any, Any]]) -> None:
+        """Commit changes for this shard, grouped by kind."""
+        async with self.lock:
+            for kind, batch in changes.items():
+                if batch:
+                    await self.run(self.stores[kind].write, batch)
+
+    async def close(self) -> None:
+        for store in self.stores.values():
+            await self.run(store.close)
+        self._executor.shutdown(wait=True)
+
+
+class ShardSet:
+    """User and chat records partitioned over ``count`` shards by id hash.
+
+    The shard count is recorded in a ``layout`` file. When it changes, the
+    records are redistributed on the next ``open`` before the old layout is
+    removed.
+    """
+
+    def __init__(self, directory: Path, count: int = 1):
+        if count < 1:
+            raise ValueError("Shard count must be at least 1")
+        self.directory = Path(directory)
+        self.count = count
+        self.shards = [Shard(index, shard_directory(self.directory, count, index)) for index in range(count)]
+
+    @property
+    def layout_path(self) -> Path:
+        return self.directory / "layout"
+
+    def shard(self, key: Any) -> Shard:
+        return self.shards[shard_for(key, self.count)]
+
+    def contains(self, kind: str, key: Any) -> bool:
+        return key in self.shard(key).stores[kind]
+
+    def keys(self, kind: str) -> List[Any]:
+        return [key for shard in self.shards for key in shard.stores[kind].keys()]
+
+    async def open(self) -> None:
+        """Open all shards concurrently, resharding first if the count changed."""
+        self.directory.mkdir(parents=True, exist_ok=True)
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, self._migrate_layout)
+        await asyncio.gather(*(shard.open() for shard in self.shards))
+        logger.info(f"Opened {self.count} persistence shards")
+
+    async def get(self, kind: str, key: Any) -> Optional[Any]:
+        shard = self.shard(key)
+        return await shard.run(shard.stores[kind].get, key)
+
+    async def items(self, kind: str) -> Dict[Any, Any]:
+        """Read every record of a kind, reading shards concurrently."""
+        results = await asyncio.gather(*(shard.run(shard.stores[kind].items) for shard in self.shards))
+        return {key: value for shard_items in results for key, value in shard_items}
+
+    async def write(self, changes: Dict[str, Dict[Any, Any]]) -> None:
+        """Write changes to their shards in parallel.
+
+        Every shard is attempted even if another one fails; the first error
+        is raised afterwards so the caller can retry.
+        """
+        by_shard: Dict[int, Dict[str, Dict[Any, Any]]] = {}
+        for kind, batch in changes.items():
+            for key, value in batch.items():
+                shard_changes = by_shard.setdefault(shard_for(key, self.count), {})
+                shard_changes.setdefault(kind, {})[key] = value
+
+        indexes = list(by_shard)
+        results = await asyncio.gather(
+            *(self.shards[index].write(by_shard[index]) for index in indexes),
+            return_exceptions=True
+        )
+        errors = [(index, result) for index, result in zip(indexes, results) if isinstance(result, Exception)]
+        for index, error in errors:
+            logger.error(f"Error writing persistence shard {index}: {str(error)}")
+        if errors:
+            raise errors[0][1]
+
+    async def close(self) -> None:
+        await asyncio.gather(*(shard.close() for shard in self.shards))
+
+    def _read_layout(self) -> int:
+        if not self.layout_path.exists():
+            return 1
+        return int(self.layout_path.read_text().strip())
+
+    def _write_layout(self) -> None:
+        temp_path = self.layout_path.with_suffix(".tmp")
+        temp_path.write_text(str(self.count))
+        temp_path.replace(self.layout_path)
+
+    def _remove_layout(self, count: int) -> None:
+        """Delete the record files of a ``count``-shard layout."""
+        if count == 1:
+            for kind in KINDS:
+                for path in self.directory.glob(f"{kind}.*"):
+                    if path.suffix in (".index", ".journal", ".data", ".tmp"):
+                        path.unlink()
+        else:
+            shutil.rmtree(self.directory / f"{count}_shards", ignore_errors=True)
+
+    def _migrate_layout(self) -> None:
+        """Move records written with another shard count into this layout."""
+        previous = self._read_layout()
+        if previous == self.count:
+            if not self.layout_path.exists():
+                self._write_layout()
+            return
+
+        logger.info(f"Resharding persistence records from {previous} to {self.count} shards")
+        # Leftovers of an interrupted migration are rebuilt from scratch
+        self._remove_layout(self.count)
+
+        moved = 0
+        for index in range(previous):
+            directory = shard_directory(self.directory, previous, index)
+            for kind in KINDS:
+                old_store = RecordStore(directory, kind)
+                try:
+                    old_store.open()
+                    items = old_store.items()
+                except Exception as e:
+                    logger.error(f"Skipping unreadable {kind} in old shard {index}: {str(e)}")
+                    continue
+                finally:
+                    old_store.close()
+
+                grouped: Dict[int, Dict[Any, Any]] = {}
+                for key, value in items:
+                    grouped.setdefault(shard_for(key, self.count), {})[key] = value
+                for new_index, batch in grouped.items():
+                    store = self.shards[new_index].stores[kind]
+                    store.open()
+                    store.write(batch)
+                    store.close()
+                moved += len(items)
+
+        self._write_layout()
+        self._remove_layout(previous)
+        logger.info(f"Moved {moved} records to {self.count} shards")
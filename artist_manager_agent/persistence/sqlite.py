@@ -0,0 +1,271 @@
+"""SQLite-backed persistence for the Artist Manager Bot."""
+from typing import Dict, Optional, Any, Tuple
+from telegram.ext import BasePersistence
+from pathlib import Path
+import logging
+import asyncio
+import json
+import aiosqlite
+
+from .serialization import dumps, loads
+
+logger = logging.getLogger(__name__)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS user_data (
+    user_id INTEGER PRIMARY KEY,
+    data BLOB NOT NULL
+);
+CREATE TABLE IF NOT EXISTS chat_data (
+    chat_id INTEGER PRIMARY KEY,
+    data BLOB NOT NULL
+);
+CREATE TABLE IF NOT EXISTS bot_data (
+    id INTEGER PRIMARY KEY CHECK (id = 0),
+    data BLOB NOT NULL
+);
+CREATE TABLE IF NOT EXISTS callback_data (
+    id INTEGER PRIMARY KEY CHECK (id = 0),
+    data BLOB NOT NULL
+);
+CREATE TABLE IF NOT EXISTS conversations (
+    name TEXT NOT NULL,
+    conversation_key TEXT NOT NULL,
+    state BLOB NOT NULL,
+    PRIMARY KEY (name, conversation_key)
+);
+"""
+
+
+def _conversation_key(key: Tuple[int, ...]) -> str:
+    return json.dumps(list(key))
+
+
+class SQLitePersistence(BasePersistence):
+    """Persistence implementation storing one SQLite row per user or chat.
+
+    Updates touch only the affected row, so the cost of a save no longer
+    grows with the total amount of stored state. The database runs in WAL
+    journal mode so reads are not blocked while a write is in progress.
+    """
+
+    def __init__(
+        self,
+        database: str,
+        update_interval: int = 60
+    ):
+        super().__init__(
+            store_data=None,  # Let PTB handle defaults
+            update_interval=update_interval
+        )
+
+        # Initialize storage flags
+        self._store_user_data = True
+        self._store_chat_data = True
+        self._store_bot_data = True
+        self._store_callback_data = True
+
+        self.database = Path(database)
+        self._conn: Optional[aiosqlite.Connection] = None
+        self._connect_lock = asyncio.Lock()
+        self._closed = False
+
+    @property
+    def store_user_data(self) -> bool:
+        """Return whether user_data should be stored."""
+        return self._store_user_data
+
+    @property
+    def store_chat_data(self) -> bool:
+        """Return whether chat_data should be stored."""
+        return self._store_chat_data
+
+    @property
+    def store_bot_data(self) -> bool:
+        """Return whether bot_data should be stored."""
+        return self._store_bot_data
+
+    @property
+    def store_callback_data(self) -> bool:
+        """Return whether callback_data should be stored."""
+        return self._store_callback_data
+
+    async def _connection(self) -> aiosqlite.Connection:
+        """Return the open database connection, creating the schema on first use."""
+        if self._conn is not None:
+            return self._conn
+
+        async with self._connect_lock:
+            if self._conn is None:
+                self.database.parent.mkdir(parents=True, exist_ok=True)
+                conn = await aiosqlite.connect(str(self.database))
+                await conn.execute("PRAGMA journal_mode=WAL")
+                await conn.execute("PRAGMA synchronous=NORMAL")
+                await conn.executescript(_SCHEMA)
+                await conn.commit()
+                self._conn = conn
+                logger.info(f"Opened SQLite persistence at {self.database}")
+        return self._conn
+
+    async def _execute(self, sql: str, params: Tuple = ()) -> None:
+        """Execute a single write statement and commit it."""
+        if self._closed:
+            return
+        try:
+            conn = await self._connection()
+            await conn.execute(sql, params)
+            await conn.commit()
+        except Exception as e:
+            logger.error(f"Error writing SQLite persistence: {str(e)}")
+            raise
+
+    async def _fetch_rows(self, table: str, key_column: str) -> Dict[int, Any]:
+        """Load every row of a per-id table into a dict."""
+        conn = await self._connection()
+        result = {}
+        async with conn.execute(f"SELECT {key_column}, data FROM {table}") as cursor:
+            async for row_id, blob in cursor:
+                try:
+                    result[row_id] = loads(blob)
+                except Exception as e:
+                    logger.warning(f"Skipping unreadable {table} row {row_id}: {e}")
+        return result
+
+    async def _fetch_single(self, table: str) -> Optional[Any]:
+        """Load the value of a single-row table."""
+        conn = await self._connection()
+        async with conn.execute(f"SELECT data FROM {table} WHERE id = 0") as cursor:
+            row = await cursor.fetchone()
+        return loads(row[0]) if row else None
+
+    async def load(self) -> None:
+        """Open the database so it is ready before the application starts."""
+        await self._connection()
+
+    async def get_user_data(self) -> Dict[int, Dict[str, Any]]:
+        """Return user_data from persistence."""
+        if not self.store_user_data:
+            return {}
+        return await self._fetch_rows("user_data", "user_id")
+
+    async def get_chat_data(self) -> Dict[int, Dict[str, Any]]:
+        """Return chat_data from persistence."""
+        if not self.store_chat_data:
+            return {}
+        return await self._fetch_rows("chat_data", "chat_id")
+
+    async def get_bot_data(self) -> Dict[str, Any]:
+        """Return bot_data from persistence."""
+        if not self.store_bot_data:
+            return {}
+        return await self._fetch_single("bot_data") or {}
+
+    async def get_callback_data(self) -> Optional[Dict[str, Any]]:
+        """Return callback_data from persistence."""
+        if not self.store_callback_data:
+            return None
+        return await self._fetch_single("callback_data")
+
+    async def get_conversations(self, name: str) -> Dict[Tuple[int, ...], object]:
+        """Return conversations from persistence."""
+        conn = await self._connection()
+        result = {}
+        async with conn.execute(
+            "SELECT conversation_key, state FROM conversations WHERE name = ?", (name,)
+        ) as cursor:
+            async for key, blob in cursor:
+                result[tuple(json.loads(key))] = loads(blob)
+        return result
+
+    async def update_user_data(self, user_id: int, data: Dict) -> None:
+        """Update user_data in persistence."""
+        if self.store_user_data:
+            await self._execute(
+                "INSERT OR REPLACE INTO user_data (user_id, data) VALUES (?, ?)",
+                (user_id, dumps(data))
+            )
+
+    async def update_chat_data(self, chat_id: int, data: Dict) -> None:
+        """Update chat_data in persistence."""
+        if self.store_chat_data:
+            await self._execute(
+                "INSERT OR REPLACE INTO chat_data (chat_id, data) VALUES (?, ?)",
+                (chat_id, dumps(data))
+            )
+
+    async def update_bot_data(self, data: Dict) -> None:
+        """Update bot_data in persistence."""
+        if self.store_bot_data:
+            await self._execute(
+                "INSERT OR REPLACE INTO bot_data (id, data) VALUES (0, ?)",
+                (dumps(data),)
+            )
+
+    async def update_callback_data(self, data: Dict[str, Any]) -> None:
+        """Update callback_data in persistence."""
+        if self.store_callback_data:
+            await self._execute(
+                "INSERT OR REPLACE INTO callback_data (id, data) VALUES (0, ?)",
+                (dumps(data),)
+            )
+
+    async def update_conversation(self, name: str, key: Tuple[int, ...], new_state: Optional[object]) -> None:
+        """Update conversation data in persistence."""
+        if new_state is None:
+            await self._execute(
+                "DELETE FROM conversations WHERE name = ? AND conversation_key = ?",
+                (name, _conversation_key(key))
+            )
+        else:
+            await self._execute(
+                "INSERT OR REPLACE INTO conversations (name, conversation_key, state) VALUES (?, ?, ?)",
+                (name, _conversation_key(key), dumps(new_state))
+            )
+
+    async def refresh_user_data(self, user_id: int, user_data: Dict) -> Dict:
+        """Refresh user data from persistence."""
+        return user_data
+
+    async def refresh_chat_data(self, chat_id: int, chat_data: Dict) -> Dict:
+        """Refresh chat data from persistence."""
+        return chat_data
+
+    async def refresh_bot_data(self, bot_data: Dict) -> Dict:
+        """Refresh bot data from persistence."""
+        return bot_data
+
+    async def drop_chat_data(self, chat_id: int) -> None:
+        """Drop chat data from persistence."""
+        if self.store_chat_data:
+            await self._execute("DELETE FROM chat_data WHERE chat_id = ?", (chat_id,))
+
+    async def drop_user_data(self, user_id: int) -> None:
+        """Drop user data from persistence."""
+        if self.store_user_data:
+            await self._execute("DELETE FROM user_data WHERE user_id = ?", (user_id,))
+
+    async def flush(self) -> None:
+        """Checkpoint the SQLite WAL into the main database file."""
+        if self._closed or self._conn is None:
+            return
+        try:
+            await self._conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+            logger.info("Successfully flushed SQLite persistence")
+        except Exception as e:
+            logger.error(f"Error flushing SQLite persistence: {str(e)}")
+            raise
+
+    async def close(self) -> None:
+        """Close the persistence."""
+        if self._closed:
+            return
+        try:
+            await self.flush()
+            if self._conn is not None:
+                await self._conn.close()
+                self._conn = None
+            self._closed = True
+            logger.info("Successfully closed SQLite persistence")
+        except Exception as e:
+            logger.error(f"Error closing SQLite persistence: {str(e)}")
+            raise
@@ -0,0 +1,304 @@
+"""Indexed on-disk record store for the Artist Manager Bot persistence."""
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from pathlib import Path
+import logging
+import os
+import pickle
+import struct
+import threading
+import time
+import zlib
+
+from .serialization import dumps, loads
+
+logger = logging.getLogger(__name__)
+
+# Records use the same <length:uint32><crc32:uint32><payload> framing as the WAL
+_HEADER = struct.Struct("<II")
+
+# Marker for deletions passed to RecordStore.write
+DELETE = object()
+
+
+class RecordStore:
+    """Log-structured key/value store with an on-disk offset index.
+
+    Values are appended to a data file and located through an index that maps
+    each key to ``(offset, length)``. Opening the store reads only the index,
+    so startup cost does not depend on the size of the stored values, and a
+    single value can be read without touching the others.
+
+    Index changes are appended to a journal once the new records are on
+    disk, so a write costs O(changed keys). A write is committed when its
+    journal entry is fsynced; a crash before that leaves the previous index
+    pointing at records that are still in the append-only data file. The
+    full index is only rewritten by compaction, which writes a new data
+    file generation first, and when the journal outgrows the index.
+    """
+
+    def __init__(self, directory: Path, name: str, compact_ratio: float = 0.5):
+        self.directory = Path(directory)
+        self.name = name
+        self.compact_ratio = compact_ratio
+        self._index: Dict[Any, Tuple[int, int]] = {}
+        self._generation = 0
+        self._size = 0
+        self._garbage = 0
+        self._file = None
+        self._journal = None
+        self._journal_entries = 0
+        self._lock = threading.Lock()
+
+    @property
+    def index_path(self) -> Path:
+        return self.directory / f"{self.name}.index"
+
+    @property
+    def journal_path(self) -> Path:
+        return self.directory / f"{self.name}.journal"
+
+    def _data_path(self, generation: int) -> Path:
+        return self.directory / f"{self.name}.{generation}.data"
+
+    @property
+    def data_path(self) -> Path:
+        return self._data_path(self._generation)
+
+    def __contains__(self, key: Any) -> bool:
+        return key in self._index
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def keys(self) -> Iterable[Any]:
+        return self._index.keys()
+
+    def open(self) -> None:
+        """Load the index; values stay on disk until they are read."""
+        with self._lock:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            if self.index_path.exists():
+                with open(self.index_path, "rb") as f:
+                    state = pickle.load(f)
+                self._index = state["index"]
+                self._generation = state["generation"]
+                self._garbage = state.get("garbage", 0)
+                self._size = state["size"]
+            self._replay_journal()
+
+            if self._size or self.data_path.exists():
+                # Records appended after the last committed write are unreachable
+                actual_size = self.data_path.stat().st_size if self.data_path.exists() else 0
+                if actual_size < self._size:
+                    raise ValueError(
+                        f"Data file {self.data_path} is shorter than its index "
+                        f"({actual_size} < {self._size} bytes)"
+                    )
+                if actual_size > self._size:
+                    with open(self.data_path, "r+b") as f:
+                        f.truncate(self._size)
+            logger.debug(f"Opened record store {self.name} with {len(self._index)} keys")
+
+    def _replay_journal(self) -> None:
+        """Apply the index changes committed since the index was written."""
+        self._journal_entries = 0
+        if not self.journal_path.exists():
+            return
+        good = 0
+        with open(self.journal_path, "rb") as f:
+            while True:
+                header = f.read(_HEADER.size)
+                if len(header) < _HEADER.size:
+                    break
+                length, checksum = _HEADER.unpack(header)
+                payload = f.read(length)
+                if len(payload) < length or zlib.crc32(payload) != checksum:
+                    break
+                good = f.tell()
+                generation, size, garbage, placed, deleted = loads(payload)
+                # Entries of an older generation are already in the index
+                if generation != self._generation:
+                    continue
+                for key in deleted:
+                    self._index.pop(key, None)
+                self._index.update(placed)
+                self._size = size
+                self._garbage = garbage
+                self._journal_entries += 1
+        if good < self.journal_path.stat().st_size:
+            # A write interrupted before its commit
+            with open(self.journal_path, "r+b") as f:
+                f.truncate(good)
+                os.fsync(f.fileno())
+
+    def _read_frame(self, f, offset: int, length: int) -> Any:
+        f.seek(offset)
+        header = f.read(_HEADER.size)
+        size, checksum = _HEADER.unpack(header)
+        payload = f.read(size)
+        if size + _HEADER.size != length or zlib.crc32(payload) != checksum:
+            raise ValueError(f"Corrupt record at offset {offset} in {self.data_path}")
+        return loads(payload)
+
+    def get(self, key: Any) -> Optional[Any]:
+        """Read a single value from disk, or None if the key is unknown."""
+        with self._lock:
+            location = self._index.get(key)
+            if location is None:
+                return None
+            with open(self.data_path, "rb") as f:
+                return self._read_frame(f, *location)
+
+    def items(self) -> List[Tuple[Any, Any]]:
+        """Read every stored key and value in file order."""
+        with self._lock:
+            if not self._index:
+                return []
+            locations = sorted(self._index.items(), key=lambda item: item[1][0])
+            with open(self.data_path, "rb") as f:
+                return [(key, self._read_frame(f, *location)) for key, location in locations]
+
+    def write(self, changes: Dict[Any, Any]) -> None:
+        """Append changed values, drop deleted keys and commit the index.
+
+        A value of ``DELETE`` removes the key.
+        """
+        with self._lock:
+            frames = []
+            placed = {}
+            offset = self._size
+            for key, value in changes.items():
+                if value is DELETE:
+                    continue
+                payload = dumps(value)
+                frame = _HEADER.pack(len(payload), zlib.crc32(payload)) + payload
+                frames.append(frame)
+                placed[key] = (offset, len(frame))
+                offset += len(frame)
+
+            if frames:
+                if self._file is None:
+                    self.directory.mkdir(parents=True, exist_ok=True)
+                    self._file = open(self.data_path, "ab")
+                self._file.write(b"".join(frames))
+                self._file.flush()
+                os.fsync(self._file.fileno())
+
+            # Only point the index at the new records once they are on disk
+            deleted = []
+            for key in changes:
+                previous = self._index.pop(key, None)
+                if previous is not None:
+                    self._garbage += previous[1]
+                    if key not in placed:
+                        deleted.append(key)
+            self._index.update(placed)
+            self._size = offset
+            if placed or deleted:
+                self._append_journal(placed, deleted)
+
+            # Replay cost stays proportional to the number of keys
+            rewrite = self._journal_entries > max(1024, len(self._index))
+            if rewrite:
+                self._write_index()
+
+        if self._size and self._garbage > self._size * self.compact_ratio:
+            self.compact()
+
+    def _append_journal(self, placed: Dict[Any, Tuple[int, int]], deleted: List[Any]) -> None:
+        payload = dumps([self._generation, self._size, self._garbage, placed, deleted])
+        if self._journal is None:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            self._journal = open(self.journal_path, "ab")
+        self._journal.write(_HEADER.pack(len(payload), zlib.crc32(payload)) + payload)
+        self._journal.flush()
+        os.fsync(self._journal.fileno())
+        self._journal_entries += 1
+
+    def _write_index(self) -> None:
+        """Write the full index and empty the journal it now covers."""
+        state = {
+            "index": self._index,
+            "generation": self._generation,
+            "size": self._size,
+            "garbage": self._garbage
+        }
+        self.directory.mkdir(parents=True, exist_ok=True)
+        temp_path = self.index_path.with_suffix(".tmp")
+        with open(temp_path, "wb") as f:
+            pickle.dump(state, f, protocol=pickle.HIGHEST_PROTOCOL)
+            f.flush()
+            os.fsync(f.fileno())
+        temp_path.replace(self.index_path)
+
+        if self._journal is not None:
+            self._journal.close()
+            self._journal = None
+        # Entries left by a crash before this point are of the same
+        # generation but only repeat what the index already holds
+        with open(self.journal_path, "wb") as f:
+            os.fsync(f.fileno())
+        self._journal_entries = 0
+
+    def compact(self) -> None:
+        """Rewrite live records into a new data file generation."""
+        with self._lock:
+            old_path = self.data_path
+            new_generation = self._generation + 1
+            new_path = self._data_path(new_generation)
+            new_index = {}
+            offset = 0
+            with open(old_path, "rb") as src, open(new_path, "wb") as dst:
+                for key, (start, length) in sorted(self._index.items(), key=lambda item: item[1][0]):
+                    src.seek(start)
+                    dst.write(src.read(length))
+                    new_index[key] = (offset, length)
+                    offset += length
+                dst.flush()
+                os.fsync(dst.fileno())
+
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+            reclaimed = self._garbage
+            self._index = new_index
+            self._generation = new_generation
+            self._size = offset
+            self._garbage = 0
+            self._write_index()
+            old_path.unlink(missing_ok=True)
+            logger.info(f"Compacted record store {self.name}, reclaimed {reclaimed} bytes")
+
+    def quarantine(self) -> List[Path]:
+        """Move unreadable files aside and reset the store to empty.
+
+        The files are renamed with a ``.corrupt-<timestamp>`` suffix so they
+        can be inspected or recovered by hand.
+        """
+        with self._lock:
+            self._close_files()
+            suffix = f".corrupt-{int(time.time())}"
+            moved = []
+            for path in [self.index_path, self.journal_path, *self.directory.glob(f"{self.name}.*.data")]:
+                if path.exists():
+                    target = path.with_name(path.name + suffix)
+                    path.replace(target)
+                    moved.append(target)
+            self._index = {}
+            self._generation = 0
+            self._size = 0
+            self._garbage = 0
+            self._journal_entries = 0
+            return moved
+
+    def _close_files(self) -> None:
+        for f in (self._file, self._journal):
+            if f is not None:
+                f.close()
+        self._file = None
+        self._journal = None
+
+    def close(self) -> None:
+        """Close the data file and journal handles."""
+        with self._lock:
+            self._close_files()
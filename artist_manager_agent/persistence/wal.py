@@ -0,0 +1,135 @@
+"""Append-only write-ahead log for the Artist Manager Bot persistence."""
+from typing import Any, Iterator, List, Tuple
+from pathlib import Path
+import logging
+import os
+import struct
+import threading
+import zlib
+
+from .serialization import dumps, loads
+
+logger = logging.getLogger(__name__)
+
+# Each record is framed as <length:uint32><crc32:uint32><serialized payload>
+_HEADER = struct.Struct("<II")
+
+# Record operations
+OP_SET = "set"
+OP_DROP = "drop"
+
+# (sequence number, operation, kind, key, value)
+WalRecord = Tuple[int, str, str, Any, Any]
+
+
+class WriteAheadLog:
+    """Append-only log of individual persistence changes.
+
+    Every record holds a single ``(seq, op, kind, key, value)`` change so an
+    update costs O(size of the changed value) instead of O(total state).
+    Sequence numbers increase monotonically; a snapshot remembers the last
+    sequence number it contains so replay can skip records it already covers.
+    """
+
+    def __init__(self, path: Path, fsync: bool = False):
+        self.path = Path(path)
+        self.fsync = fsync
+        self._file = None
+        self._lock = threading.Lock()
+        self.entries = 0
+
+    def _open(self):
+        if self._file is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._file = open(self.path, "ab")
+        return self._file
+
+    def append(self, records: List[WalRecord]) -> None:
+        """Append a batch of changes to the log."""
+        frames = []
+        for record in records:
+            payload = dumps(record)
+            frames.append(_HEADER.pack(len(payload), zlib.crc32(payload)))
+            frames.append(payload)
+        with self._lock:
+            f = self._open()
+            f.write(b"".join(frames))
+            f.flush()
+            if self.fsync:
+                os.fsync(f.fileno())
+            self.entries += len(records)
+
+    def replay(self, after_seq: int = 0) -> Iterator[WalRecord]:
+        """Yield intact records newer than ``after_seq`` in write order.
+
+        Reading stops at the first torn or corrupt frame, which is what a
+        crash in the middle of ``append`` leaves behind. Once all records
+        have been read, the log is cut back to the last intact one, so
+        records appended afterwards are not hidden behind the bad frame.
+        """
+        if not self.path.exists():
+            return
+        count = 0
+        good = 0
+        with open(self.path, "rb") as f:
+            while True:
+                header = f.read(_HEADER.size)
+                if not header:
+                    break
+                if len(header) < _HEADER.size:
+                    logger.warning(f"Ignoring torn WAL header after {count} records")
+                    break
+                length, checksum = _HEADER.unpack(header)
+                payload = f.read(length)
+                if len(payload) < length or zlib.crc32(payload) != checksum:
+                    logger.warning(f"Ignoring corrupt WAL record after {count} records")
+                    break
+                try:
+                    record = loads(payload)
+                except Exception as e:
+                    logger.warning(f"Ignoring undecodable WAL record after {count} records: {e}")
+                    break
+                count += 1
+                good = f.tell()
+                if record[0] > after_seq:
+                    yield record
+        self.entries = count
+        if good < self.size():
+            self._cut(good)
+
+    def _cut(self, offset: int) -> None:
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+            with open(self.path, "r+b") as f:
+                f.truncate(offset)
+                # Appends must not land behind the bad frame even after a crash
+                os.fsync(f.fileno())
+        logger.warning(f"Cut write-ahead log back to {offset} bytes")
+
+    def truncate(self) -> None:
+        """Discard all records, typically after a snapshot has been written."""
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.path, "wb") as f:
+                if self.fsync:
+                    os.fsync(f.fileno())
+            self.entries = 0
+
+    def size(self) -> int:
+        """Return the current size of the log in bytes."""
+        try:
+            return self.path.stat().st_size
+        except FileNotFoundError:
+            return 0
+
+    def close(self) -> None:
+        """Close the underlying file handle."""
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
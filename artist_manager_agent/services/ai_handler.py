@@ -1,7 +1,9 @@
 """AI functionality handler for the Artist Manager Bot."""
-from typing import Dict, List, Optional
+from typing import Any, Dict, List, Optional
 import logging
+import uuid
 from datetime import datetime
+from ..managers.task_manager import Task
 from ..models import ArtistProfile
 
 logger = logging.getLogger(__name__)
@@ -44,6 +46,44 @@ class AIHandler:
             logger.error(f"Error analyzing metrics: {str(e)}")
             return None
             
+    async def analyze_goal_progress(self, goal: Any, profile: ArtistProfile) -> int:
+        """Estimate a goal's progress in percent."""
+        # Mock analysis - would integrate with real AI
+        return getattr(goal, "progress", 0)
+        
+    async def suggest_tasks_for_goal(self, goal: Any, profile: ArtistProfile) -> List[Task]:
+        """Suggest tasks that move a goal forward, most important first."""
+        # Mock suggestions - would integrate with real AI
+        return [
+            Task(
+                id=str(uuid.uuid4()),
+                title=f"{step} for {goal.title}",
+                description="",
+                priority=priority,
+                status="pending",
+                goal_id=goal.id
+            )
+            for step, priority in [("Plan the next milestone", "high"), ("Review progress", "medium")]
+        ]
+        
+    async def evaluate_goals(self, goals: List[Any], profile: ArtistProfile) -> Dict[str, Dict[str, Any]]:
+        """Assess progress and suggest tasks for several goals in one request.
+
+        Returns {"progress": int, "tasks": [Task]} by goal id.
+        """
+        try:
+            # Mock batch analysis - would send all goals in one structured request
+            return {
+                goal.id: {
+                    "progress": await self.analyze_goal_progress(goal, profile),
+                    "tasks": await self.suggest_tasks_for_goal(goal, profile)
+                }
+                for goal in goals
+            }
+        except Exception as e:
+            logger.error(f"Error evaluating goals: {str(e)}")
+            return {}
+            
     async def generate_suggestions(self, profile: ArtistProfile) -> List[str]:
         """Generate AI suggestions for improvement."""
         try:
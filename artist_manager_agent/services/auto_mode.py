@@ -1,20 +1,35 @@
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, List, Optional, Tuple
 from datetime import datetime, timedelta
 from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
 from telegram.ext import ContextTypes
-import asyncio
 import json
 import random
+from ..core.message_queue import NOTIFICATION
+from ..core.user_scheduler import UserScheduler
+from .goal_evaluator import GoalEvaluator
 from ..models import ArtistProfile, Task
 from ..utils.logger import logger, log_error
 
 class AutoMode:
-    """Handles auto mode functionality for the bot."""
+    """Handles auto mode functionality for the bot.
+
+    Every enabled user is enrolled in one UserScheduler, which runs the
+    user's cycle every ``frequency`` seconds of the user's settings on
+    ``workers`` workers. The settings are copied into the enrollment, so
+    cycles do not depend on the user's data being in memory. A cycle sends
+    at most one message, an AutoDigest of what it found; ``stats`` counts
+    the messages saved that way. Goals are evaluated by a GoalEvaluator,
+    with at most ``ai_concurrency`` AI requests at once.
+    """
     
-    def __init__(self, bot):
+    def __init__(self, bot, workers: int = 8, ai_concurrency: int = 4):
         self.bot = bot
-        self._auto_mode = False
-        self._auto_task = None
+        self.scheduler = UserScheduler(self.run_cycle, workers=workers)
+        self.goal_evaluator = GoalEvaluator(bot.ai_handler, max_concurrency=ai_concurrency)
+        self.stats: Dict[str, int] = {
+            "digests": 0,
+            "messages_saved": 0
+        }
         self._default_settings = {
             "frequency": 3600,  # 1 hour
             "ai_level": "balanced",
@@ -23,12 +38,17 @@ class AutoMode:
             "goal_check_interval": 86400,  # 24 hours
             "analytics_interval": 604800  # 7 days
         }
+        # Days ahead a deadline is reported, by notification level
+        self._deadline_windows = {
+            "project": {"all": 7, "important": 7, "minimal": 3},
+            "task": {"all": 3, "important": 3, "minimal": 1}
+        }
 
     async def show_options(self, update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
         """Show auto mode options."""
         user_id = update.effective_user.id
         
-        if not self.bot.get_user_profile(user_id):
+        if not self.bot.profiles.get(str(user_id)):
             await update.message.reply_text(
                 "Please complete your profile setup first with /start"
             )
@@ -99,17 +119,7 @@ class AutoMode:
         action = query.data.replace("auto_", "")
         
         if action == "enable":
-            # Save current settings or use defaults
-            if "auto_settings" not in context.user_data:
-                context.user_data["auto_settings"] = self._default_settings.copy()
-            
-            self._auto_mode = True
-            
-            # Start background task if not running
-            if not self._auto_task or self._auto_task.done():
-                self._auto_task = asyncio.create_task(
-                    self._process_tasks(update, context)
-                )
+            self.enable(update.effective_user.id, update.effective_chat.id, context.user_data)
             
             await query.edit_message_text(
                 "🤖 Auto Mode Enabled\n\n"
@@ -122,9 +132,7 @@ class AutoMode:
             )
             
         elif action == "disable":
-            self._auto_mode = False
-            if self._auto_task:
-                self._auto_task.cancel()
+            self.disable(update.effective_user.id)
             
             await query.edit_message_text(
                 "Auto mode has been disabled. Use /auto to re-enable."
@@ -135,151 +143,155 @@ class AutoMode:
             
         elif action.startswith("freq_"):
             hours = int(action.split("_")[1])
-            context.user_data["auto_settings"]["frequency"] = hours * 3600
+            settings = context.user_data.setdefault("auto_settings", self._default_settings.copy())
+            settings["frequency"] = hours * 3600
+            self.update_settings(update.effective_user.id, settings)
             await self.show_options(update, context)
             
         elif action.startswith("ai_"):
             level = action.split("_")[1]
-            context.user_data["auto_settings"]["ai_level"] = level
+            settings = context.user_data.setdefault("auto_settings", self._default_settings.copy())
+            settings["ai_level"] = level
+            self.update_settings(update.effective_user.id, settings)
             await self.show_options(update, context)
             
         elif action.startswith("notif_"):
             level = action.split("_")[1]
-            context.user_data["auto_settings"]["notifications"] = level
+            settings = context.user_data.setdefault("auto_settings", self._default_settings.copy())
+            settings["notifications"] = level
+            self.update_settings(update.effective_user.id, settings)
             await self.show_options(update, context)
 
-    async def _process_tasks(self, update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
-        """Background task for auto mode processing."""
-        user_id = update.effective_user.id
+    def enable(self, user_id: int, chat_id: int, user_data: Dict[str, Any]) -> Dict[str, Any]:
+        """Enroll a user in auto mode with the settings in ``user_data``."""
+        settings = user_data.setdefault("auto_settings", self._default_settings.copy())
+        record = self.scheduler.get(user_id)
+        data = record["data"] if record else {}
+        data["settings"] = dict(settings)
+        return self.scheduler.enable(user_id, chat_id, settings.get("frequency", self._default_settings["frequency"]), data=data)
+
+    def disable(self, user_id: int) -> bool:
+        """Take a user out of auto mode."""
+        return self.scheduler.disable(user_id)
+
+    def is_enabled(self, user_id: int) -> bool:
+        return user_id in self.scheduler
+
+    def update_settings(self, user_id: int, settings: Dict[str, Any]) -> None:
+        """Apply changed settings to an enrolled user's next cycles."""
+        record = self.scheduler.get(user_id)
+        if record is None:
+            return
+        record["data"]["settings"] = dict(settings)
+        self.scheduler.set_interval(user_id, settings.get("frequency", self._default_settings["frequency"]))
+
+    async def run_cycle(self, record: Dict[str, Any]) -> None:
+        """Run one auto mode cycle for an enrolled user; called by the scheduler.
+
+        Everything the cycle finds is collected in a digest and sent as one
+        message.
+        """
+        profile = self.bot.profiles.get(str(record["user_id"]))
+        if not profile:
+            return
+        settings = {**self._default_settings, **record["data"].get("settings", {})}
+        digest = AutoDigest(settings.get("notifications", "important"))
         
-        while self._auto_mode:
-            try:
-                # Get user profile and settings
-                profile = self.bot.get_user_profile(user_id)
-                settings = context.user_data.get("auto_settings", self._default_settings)
-                
-                if profile:
-                    # Process goals and create tasks
-                    await self._process_goals(update, context, profile)
-                    
-                    # Check project deadlines
-                    await self._check_deadlines(update, context)
-                    
-                    # Analyze performance metrics
-                    await self._analyze_metrics(update, context, profile)
-                    
-                    # Generate insights and suggestions
-                    await self._generate_insights(update, context, profile)
-                
-                # Wait before next check based on settings
-                freq = settings.get("frequency", self._default_settings["frequency"])
-                await asyncio.sleep(freq)
-                
-            except Exception as e:
-                logger.error(f"Error in auto mode processing: {str(e)}")
-                await asyncio.sleep(300)  # Wait 5 minutes on error
+        # Process goals and create tasks
+        await self._process_goals(digest, settings, profile, record["user_id"])
+        
+        # Check project deadlines
+        await self._check_deadlines(digest, settings, record["user_id"], record["data"])
+        
+        # Analyze performance metrics
+        await self._analyze_metrics(digest, settings, profile, record["data"])
+        
+        # Generate insights and suggestions
+        await self._generate_insights(digest, settings, profile)
+        
+        await self._send_digest(record["chat_id"], digest)
 
-    async def _process_goals(self, update: Update, context: ContextTypes.DEFAULT_TYPE, profile: ArtistProfile) -> None:
-        """Process goals and generate tasks."""
-        goals = profile.goals if hasattr(profile, "goals") else []
-        settings = context.user_data.get("auto_settings", self._default_settings)
+    async def _send_digest(self, chat_id: int, digest: "AutoDigest") -> None:
+        """Send a cycle's findings, if any, as one message."""
+        if not digest:
+            return
+        text, reply_markup = digest.render()
+        await self.bot.message_queue.send(chat_id, text, reply_markup=reply_markup, priority=NOTIFICATION)
+        self.stats["digests"] += 1
+        self.stats["messages_saved"] += digest.findings - 1
+
+    async def _process_goals(self, digest: "AutoDigest", settings: Dict[str, Any], profile: ArtistProfile, user_id: int) -> None:
+        """Suggest tasks for the user's unfinished goals."""
+        try:
+            integration = self.bot.task_manager_integration
+            goals = [goal for goal in await integration.get_goals_by_user(user_id) if goal.status != "completed"]
+            # All goals at once; unchanged goals come from the cache
+            evaluations = await self.goal_evaluator.evaluate(goals, profile, integration.goal_version)
+        except Exception as e:
+            logger.error(f"Error evaluating goals: {str(e)}")
+            return
         
         for goal in goals:
-            try:
-                # Get current progress
-                progress = await self.bot.ai_handler.analyze_goal_progress(goal, profile)
-                
-                if progress < 100:  # Goal not completed
-                    # Generate task suggestions
-                    tasks = await self.bot.ai_handler.suggest_tasks_for_goal(goal, profile)
-                    
-                    if tasks:
-                        # Filter based on AI level setting
-                        ai_level = settings.get("ai_level", "balanced")
-                        if ai_level == "conservative":
-                            tasks = tasks[:1]  # Only most important task
-                        elif ai_level == "balanced":
-                            tasks = tasks[:3]  # Top 3 tasks
-                        
-                        # Create task buttons
-                        keyboard = []
-                        for task in tasks:
-                            keyboard.append([
-                                InlineKeyboardButton(
-                                    f"Add: {task.title[:30]}...",
-                                    callback_data=f"auto_task_{task.id}"
-                                )
-                            ])
-                        keyboard.append([InlineKeyboardButton("Skip All", callback_data="auto_skip")])
-                        
-                        # Send suggestion based on notification settings
-                        notif_level = settings.get("notifications", "important")
-                        if notif_level == "all" or (notif_level == "important" and task.priority == "high"):
-                            await update.message.reply_text(
-                                f"🎯 Goal Progress Update: {goal.title}\n"
-                                f"Current Progress: {progress}%\n\n"
-                                "Suggested tasks to move forward:\n" +
-                                "\n".join(f"• {task.title}" for task in tasks),
-                                reply_markup=InlineKeyboardMarkup(keyboard)
-                            )
+            evaluation = evaluations.get(goal.id)
+            if not evaluation or evaluation["progress"] >= 100 or not evaluation["tasks"]:
+                continue
+            tasks = evaluation["tasks"]
             
-            except Exception as e:
-                logger.error(f"Error processing goal {goal.title}: {str(e)}")
+            # Filter based on AI level setting
+            ai_level = settings.get("ai_level", "balanced")
+            if ai_level == "conservative":
+                tasks = tasks[:1]  # Only most important task
+            elif ai_level == "balanced":
+                tasks = tasks[:3]  # Top 3 tasks
+            
+            # Include suggestion based on notification settings
+            notif_level = settings.get("notifications", "important")
+            if notif_level == "all" or (notif_level == "important" and any(task.priority == "high" for task in tasks)):
+                digest.add(
+                    f"🎯 {goal.title}: {evaluation['progress']}%\n" +
+                    "\n".join(f"• {task.title}" for task in tasks),
+                    [
+                        InlineKeyboardButton(f"Add: {task.title[:30]}", callback_data=f"auto_task_{task.id}")
+                        for task in tasks
+                    ]
+                )
 
-    async def _check_deadlines(self, update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
-        """Check project and task deadlines."""
+    async def _check_deadlines(self, digest: "AutoDigest", settings: Dict[str, Any], user_id: int, state: Dict[str, Any]) -> None:
+        """Report the user's project and task deadlines coming up, once per deadline."""
         try:
-            settings = context.user_data.get("auto_settings", self._default_settings)
             notif_level = settings.get("notifications", "important")
+            now = datetime.now()
+            sent = state.get("deadline_alerts", {})
+            due_soon = {}
+            lines = []
+            buttons = []
             
-            # Check projects
-            projects = await self.bot.team_manager.get_projects()
-            for project in projects:
-                if project.end_date:
-                    days_remaining = (project.end_date - datetime.now()).days
-                    
-                    if (days_remaining <= 7 and notif_level in ["all", "important"]) or \
-                       (days_remaining <= 3 and notif_level == "minimal"):
-                        await update.message.reply_text(
-                            f"⚠️ Project Deadline Alert\n\n"
-                            f"Project: {project.title}\n"
-                            f"Deadline: {project.end_date.strftime('%Y-%m-%d')}\n"
-                            f"Days remaining: {days_remaining}\n\n"
-                            f"Use /projects to view details",
-                            reply_markup=InlineKeyboardMarkup([[
-                                InlineKeyboardButton("View Project", callback_data=f"project_view_{project.id}")
-                            ]])
-                        )
+            for kind, windows in self._deadline_windows.items():
+                days = windows.get(notif_level, windows["important"])
+                # Up to the end of the last day, like days remaining <= days
+                for due, _, item_id, item in self.bot.deadlines.due_between(now, now + timedelta(days=days + 1), kind, user_id):
+                    key = f"{kind}:{item_id}"
+                    due_soon[key] = due.timestamp()
+                    # A moved deadline is reported again
+                    if sent.get(key) == due_soon[key]:
+                        continue
+                    label = "Project" if kind == "project" else "Task"
+                    lines.append(f"• {label}: {item.title}, due {due.strftime('%Y-%m-%d')} ({(due - now).days} days)")
+                    buttons.append(InlineKeyboardButton(f"View {item.title[:30]}", callback_data=f"{kind}_view_{item_id}"))
             
-            # Check tasks
-            tasks = await self.bot.team_manager.get_tasks()
-            for task in tasks:
-                if task.due_date:
-                    days_remaining = (task.due_date - datetime.now()).days
-                    
-                    if (days_remaining <= 3 and notif_level in ["all", "important"]) or \
-                       (days_remaining <= 1 and notif_level == "minimal"):
-                        await update.message.reply_text(
-                            f"⏰ Task Due Soon\n\n"
-                            f"Task: {task.title}\n"
-                            f"Due: {task.due_date.strftime('%Y-%m-%d')}\n"
-                            f"Days remaining: {days_remaining}\n\n"
-                            f"Use /tasks to view details",
-                            reply_markup=InlineKeyboardMarkup([[
-                                InlineKeyboardButton("View Task", callback_data=f"task_view_{task.id}")
-                            ]])
-                        )
+            if lines:
+                digest.add("⏰ Deadlines\n" + "\n".join(lines), buttons, findings=len(lines))
+            # Deadlines that passed or moved out of range are forgotten
+            state["deadline_alerts"] = due_soon
                         
         except Exception as e:
             logger.error(f"Error checking deadlines: {str(e)}")
 
-    async def _analyze_metrics(self, update: Update, context: ContextTypes.DEFAULT_TYPE, profile: ArtistProfile) -> None:
+    async def _analyze_metrics(self, digest: "AutoDigest", settings: Dict[str, Any], profile: ArtistProfile, state: Dict[str, Any]) -> None:
         """Analyze performance metrics and generate reports."""
         try:
-            settings = context.user_data.get("auto_settings", self._default_settings)
-            
             # Check if it's time for analytics
-            last_analysis = context.user_data.get("last_analytics_time", 0)
+            last_analysis = state.get("last_analytics_time", 0)
             if (datetime.now().timestamp() - last_analysis) < settings["analytics_interval"]:
                 return
                 
@@ -289,68 +301,90 @@ class AutoMode:
             if metrics:
                 # Generate report
                 report = (
-                    "📊 Weekly Performance Report\n\n"
+                    "📊 Weekly Performance Report\n"
                     f"Social Media Growth: {metrics['social_growth']}%\n"
                     f"Streaming Performance: {metrics['streaming_growth']}%\n"
                     f"Project Completion Rate: {metrics['project_completion']}%\n"
-                    f"Goal Progress: {metrics['goal_progress']}%\n\n"
-                    "Key Insights:\n"
+                    f"Goal Progress: {metrics['goal_progress']}%"
                 )
                 
                 for insight in metrics['insights'][:3]:
-                    report += f"• {insight}\n"
-                
-                # Add action buttons
-                keyboard = []
-                for action in metrics['suggested_actions'][:2]:
-                    keyboard.append([
-                        InlineKeyboardButton(action['title'], callback_data=f"metric_action_{action['id']}")
-                    ])
+                    report += f"\n• {insight}"
                 
-                await update.message.reply_text(
-                    report,
-                    reply_markup=InlineKeyboardMarkup(keyboard)
-                )
+                digest.add(report, [
+                    InlineKeyboardButton(action['title'], callback_data=f"metric_action_{action['id']}")
+                    for action in metrics['suggested_actions'][:2]
+                ])
                 
                 # Update last analysis time
-                context.user_data["last_analytics_time"] = datetime.now().timestamp()
+                state["last_analytics_time"] = datetime.now().timestamp()
                 
         except Exception as e:
             logger.error(f"Error analyzing metrics: {str(e)}")
 
-    async def _generate_insights(self, update: Update, context: ContextTypes.DEFAULT_TYPE, profile: ArtistProfile) -> None:
+    async def _generate_insights(self, digest: "AutoDigest", settings: Dict[str, Any], profile: ArtistProfile) -> None:
         """Generate AI insights and suggestions."""
         try:
-            settings = context.user_data.get("auto_settings", self._default_settings)
-            
             # Generate insights based on recent activity
             insights = await self.bot.ai_handler.generate_insights(profile)
             
             if insights and settings.get("notifications") != "minimal":
-                # Format insights message
-                message = "🤖 AI Insights\n\n"
+                # Format insights section
+                message = "🤖 AI Insights"
                 for category, items in insights.items():
-                    message += f"*{category}*:\n"
+                    if category == "suggestions":
+                        continue
+                    message += f"\n{category}:"
                     for item in items[:2]:  # Show top 2 insights per category
-                        message += f"• {item}\n"
-                    message += "\n"
-                
-                # Add action buttons
-                keyboard = []
-                if insights.get("suggestions"):
-                    for suggestion in insights["suggestions"][:2]:
-                        keyboard.append([
-                            InlineKeyboardButton(
-                                suggestion["title"],
-                                callback_data=f"insight_action_{suggestion['id']}"
-                            )
-                        ])
+                        message += f"\n• {item}"
                 
-                await update.message.reply_text(
-                    message,
-                    reply_markup=InlineKeyboardMarkup(keyboard),
-                    parse_mode='Markdown'
-                )
+                digest.add(message, [
+                    InlineKeyboardButton(suggestion["title"], callback_data=f"insight_action_{suggestion['id']}")
+                    for suggestion in insights.get("suggestions", [])[:2]
+                ])
                 
         except Exception as e:
-            logger.error(f"Error generating insights: {str(e)}") 
\ No newline at end of file
+            logger.error(f"Error generating insights: {str(e)}")
+
+
+class AutoDigest:
+    """Findings of one auto mode cycle for one user, sent as one message.
+
+    Each part of the cycle adds a section with its buttons instead of
+    sending its own messages. The keyboard is cut to a size set by the
+    user's notification level and laid out two buttons per row.
+    """
+
+    MAX_LENGTH = 4096  # Telegram's limit for a message
+    BUTTON_LIMITS = {"all": 6, "important": 4, "minimal": 2}
+
+    def __init__(self, notifications: str = "important"):
+        self.notifications = notifications
+        self.sections: List[str] = []
+        self.buttons: List[InlineKeyboardButton] = []
+        # Messages the findings used to be sent as
+        self.findings = 0
+
+    def add(self, text: str, buttons: Optional[List[InlineKeyboardButton]] = None, findings: int = 1) -> None:
+        self.sections.append(text.strip())
+        self.buttons.extend(buttons or [])
+        self.findings += findings
+
+    def __len__(self) -> int:
+        return len(self.sections)
+
+    def render(self) -> Tuple[str, Optional[InlineKeyboardMarkup]]:
+        """Return the text and keyboard of the digest message."""
+        text = "🤖 Auto Mode Update\n\n" + "\n\n".join(self.sections)
+        if len(text) > self.MAX_LENGTH:
+            text = text[:self.MAX_LENGTH - 1] + "…"
+        
+        buttons = []
+        seen = set()
+        for button in self.buttons:
+            if button.callback_data not in seen:
+                seen.add(button.callback_data)
+                buttons.append(button)
+        buttons = buttons[:self.BUTTON_LIMITS.get(self.notifications, self.BUTTON_LIMITS["important"])]
+        rows = [buttons[i:i + 2] for i in range(0, len(buttons), 2)]
+        return text, InlineKeyboardMarkup(rows) if rows else None
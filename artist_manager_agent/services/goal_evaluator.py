@@ -0,0 +1,94 @@
+"""Batched, cached evaluation of goals for auto mode."""
+from typing import Any, Callable, Dict, List, Optional, Tuple
+import asyncio
+
+from ..persistence.cache import WorkingSet
+from ..utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# Goal id -> number that changes with the goal and its tasks
+GoalVersion = Callable[[str], int]
+
+
+class GoalEvaluator:
+    """Assess progress and suggest tasks for all of a user's goals at once.
+
+    A backend with ``evaluate_goals`` gets every goal that needs an
+    evaluation in one request. Otherwise each goal is evaluated with
+    ``analyze_goal_progress`` and ``suggest_tasks_for_goal``, goals
+    concurrently. Either way at most ``max_concurrency`` requests are in
+    flight across all users. Results are cached per goal until its version
+    changes, i.e. until the goal or one of its tasks does, so unchanged
+    goals cost no requests. The cache keeps the ``max_cached`` most
+    recently used goals.
+    """
+
+    def __init__(self, ai_handler: Any, max_concurrency: int = 4, max_cached: int = 10000):
+        self.ai_handler = ai_handler
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._cache: Dict[str, Tuple[int, Dict[str, Any]]] = {}
+        self._working_set = WorkingSet(max_size=max_cached, grace=0)
+        self.stats: Dict[str, int] = {
+            "cached": 0,
+            "evaluated": 0,
+            "requests": 0
+        }
+
+    async def evaluate(self, goals: List[Any], profile: Any, version: GoalVersion) -> Dict[str, Dict[str, Any]]:
+        """Return {"progress": int, "tasks": [...]} by goal id; failed goals are left out."""
+        results = {}
+        stale = []
+        for goal in goals:
+            cached = self._cache.get(goal.id)
+            if cached and cached[0] == version(goal.id):
+                results[goal.id] = cached[1]
+                self._working_set.touch(goal.id)
+                self.stats["cached"] += 1
+            else:
+                stale.append(goal)
+        if not stale:
+            return results
+
+        # Read before the requests, a change meanwhile makes the result stale
+        versions = {goal.id: version(goal.id) for goal in stale}
+        if hasattr(self.ai_handler, "evaluate_goals"):
+            async with self._semaphore:
+                self.stats["requests"] += 1
+                fresh = await self.ai_handler.evaluate_goals(stale, profile)
+        else:
+            evaluations = await asyncio.gather(*(self._evaluate_one(goal, profile) for goal in stale))
+            fresh = {goal.id: evaluation for goal, evaluation in zip(stale, evaluations) if evaluation is not None}
+
+        for goal_id, evaluation in fresh.items():
+            if goal_id in versions:
+                self._cache[goal_id] = (versions[goal_id], evaluation)
+                self._working_set.touch(goal_id)
+                results[goal_id] = evaluation
+                self.stats["evaluated"] += 1
+        for goal_id in self._working_set.candidates():
+            self.invalidate(goal_id)
+        return results
+
+    async def _evaluate_one(self, goal: Any, profile: Any) -> Optional[Dict[str, Any]]:
+        async with self._semaphore:
+            try:
+                self.stats["requests"] += 1
+                progress = await self.ai_handler.analyze_goal_progress(goal, profile)
+                tasks = []
+                if progress < 100:
+                    self.stats["requests"] += 1
+                    tasks = await self.ai_handler.suggest_tasks_for_goal(goal, profile)
+                return {"progress": progress, "tasks": tasks}
+            except Exception as e:
+                logger.error(f"Error evaluating goal {goal.title}: {str(e)}")
+                return None
+
+    def invalidate(self, goal_id: Optional[str] = None) -> None:
+        """Forget the cached evaluation of one goal, or of all goals."""
+        if goal_id is None:
+            self._cache.clear()
+            self._working_set.clear()
+        else:
+            self._cache.pop(goal_id, None)
+            self._working_set.discard(goal_id)
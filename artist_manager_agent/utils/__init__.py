@@ -1,6 +1,7 @@
 """Utility functions and helpers."""
 from .logger import get_logger, log_event, log_error
 from .utils import async_retry, RateLimiter, validate_input, measure_performance
+from .lazy import lazy_module_getattr
 
 __all__ = [
     "get_logger",
@@ -9,5 +10,6 @@ __all__ = [
     "async_retry",
     "RateLimiter",
     "validate_input",
-    "measure_performance"
+    "measure_performance",
+    "lazy_module_getattr"
 ] 
\ No newline at end of file
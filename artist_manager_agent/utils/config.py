@@ -50,6 +50,57 @@ BASE_DIR = Path(__file__).parent.parent.parent
 DATA_DIR = os.getenv("DATA_DIR", str(BASE_DIR / "data"))
 PERSISTENCE_PATH = os.path.join(DATA_DIR, "persistence.pickle")
 
+# Persistence
+PERSISTENCE_BACKEND = os.getenv("PERSISTENCE_BACKEND", "pickle").lower()  # pickle or sqlite
+PERSISTENCE_WAL = os.getenv("PERSISTENCE_WAL", "false").lower() == "true"
+PERSISTENCE_COMPACT_INTERVAL = int(os.getenv("PERSISTENCE_COMPACT_INTERVAL", "1000"))
+PERSISTENCE_LAZY_LOAD = os.getenv("PERSISTENCE_LAZY_LOAD", "false").lower() == "true"
+PERSISTENCE_MAX_CACHED = int(os.getenv("PERSISTENCE_MAX_CACHED", "0")) or None  # 0 disables the limit
+PERSISTENCE_CACHE_TTL = float(os.getenv("PERSISTENCE_CACHE_TTL", "0")) or None  # seconds, 0 disables
+PERSISTENCE_SHARDS = int(os.getenv("PERSISTENCE_SHARDS", "1"))
+
+# Webhook mode, used instead of polling when WEBHOOK_URL is set
+WEBHOOK_URL = os.getenv("WEBHOOK_URL")  # public base URL, WEBHOOK_PATH is appended
+WEBHOOK_LISTEN = os.getenv("WEBHOOK_LISTEN", "0.0.0.0")
+WEBHOOK_PORT = int(os.getenv("WEBHOOK_PORT", "8443"))
+WEBHOOK_PATH = os.getenv("WEBHOOK_PATH", "telegram")
+WEBHOOK_SECRET = os.getenv("WEBHOOK_SECRET")  # generated per start if unset
+WEBHOOK_MAX_QUEUE = int(os.getenv("WEBHOOK_MAX_QUEUE", "1000"))
+
+# Update processing
+UPDATE_CONCURRENCY = int(os.getenv("UPDATE_CONCURRENCY", "256"))  # updates handled at once, across users
+
+# Background jobs
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "4"))
+
+# Auto mode cycles run at once, across users
+AUTO_MODE_WORKERS = int(os.getenv("AUTO_MODE_WORKERS", "8"))
+AUTO_MODE_CATCH_UP_RATE = float(os.getenv("AUTO_MODE_CATCH_UP_RATE", "5"))  # missed cycles started per second after a restart
+AI_CONCURRENCY = int(os.getenv("AI_CONCURRENCY", "4"))  # AI requests of auto mode at once, across users
+
+# Outgoing messages, Telegram allows about 30/s overall and 1/s per chat
+SEND_RATE_GLOBAL = float(os.getenv("SEND_RATE_GLOBAL", "30"))
+SEND_RATE_PER_CHAT = float(os.getenv("SEND_RATE_PER_CHAT", "1"))
+SEND_BURST_PER_CHAT = int(os.getenv("SEND_BURST_PER_CHAT", "3"))
+
+# Update tracing, written as JSON lines
+TRACE_UPDATES = os.getenv("TRACE_UPDATES", "false").lower() == "true"
+TRACE_SAMPLE_RATE = float(os.getenv("TRACE_SAMPLE_RATE", "1.0"))  # share of updates traced, 0 to 1
+TRACE_USER_IDS = [int(user_id) for user_id in os.getenv("TRACE_USER_IDS", "").split(",") if user_id.strip()]  # always traced
+TRACE_PATH = os.getenv("TRACE_PATH", "logs/updates.jsonl")
+
+# Import feature handlers on first use instead of at startup
+LAZY_FEATURES = os.getenv("LAZY_FEATURES", "true").lower() == "true"
+
+# Seconds a stopping bot waits for updates and jobs in progress
+DRAIN_TIMEOUT = float(os.getenv("DRAIN_TIMEOUT", "30"))
+
+# Local Bot API server, e.g. http://localhost:8081/bot
+TELEGRAM_API_URL = os.getenv("TELEGRAM_API_URL")
+
+# Worker processes users are sharded across, 1 handles everything in-process
+WORKER_SHARDS = int(os.getenv("WORKER_SHARDS", "1"))
+
 # Database
 DB_URL = os.getenv("DATABASE_URL", f"sqlite:///{DATA_DIR}/bot.db")
 
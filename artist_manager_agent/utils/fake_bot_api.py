@@ -0,0 +1,141 @@
+"""Local stand-in for the Telegram Bot API, for tests and benchmarks.
+
+Point the application at it with ``ApplicationBuilder().base_url(fake.base_url)``.
+It answers Bot API calls from memory, records them, and delivers updates to
+the registered webhook the way Telegram does, including the secret token.
+Updates added with ``push_update`` are served by ``getUpdates`` until a
+later offset confirms them, as Telegram does for polling bots, or until
+``setWebhook``/``deleteWebhook`` is called with ``drop_pending_updates``.
+"""
+from typing import Any, Dict, List, Optional
+import asyncio
+import itertools
+import time
+
+import aiohttp
+from aiohttp import web
+
+BOT_USER = {"id": 123456, "is_bot": True, "first_name": "Artist Manager", "username": "artist_manager_test_bot"}
+
+
+def _flag(value: Any) -> bool:
+    """Read a boolean parameter, sent as JSON or as a form field."""
+    if isinstance(value, str):
+        return value.lower() == "true"
+    return bool(value)
+
+
+class FakeBotAPI:
+    """Minimal in-memory Bot API server."""
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0):
+        self.host = host
+        self.port = port
+        self.calls: List[Dict[str, Any]] = []
+        self.webhook: Optional[Dict[str, Any]] = None
+        # Updates not yet confirmed by a getUpdates offset
+        self.updates: List[Dict[str, Any]] = []
+        # Pending updates discarded through drop_pending_updates
+        self.dropped = 0
+        self._new_update = asyncio.Event()
+        self._message_ids = itertools.count(1)
+        self._update_ids = itertools.count(1)
+        self._runner: Optional[web.AppRunner] = None
+        self._session: Optional[aiohttp.ClientSession] = None
+
+    @property
+    def base_url(self) -> str:
+        return f"http://{self.host}:{self.port}/bot"
+
+    async def start(self) -> None:
+        app = web.Application()
+        app.router.add_post("/bot{token}/{method}", self._handle_call)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, self.host, self.port).start()
+        self.port = self._runner.addresses[0][1]
+        self._session = aiohttp.ClientSession()
+
+    async def stop(self) -> None:
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+    async def _handle_call(self, request: web.Request) -> web.Response:
+        method = request.match_info["method"]
+        if request.content_type == "application/json":
+            params = await request.json()
+        else:
+            params = dict(await request.post())
+        self.calls.append({"method": method, "params": params, "time": time.time()})
+
+        result: Any = True
+        if method in ("setWebhook", "deleteWebhook") and _flag(params.get("drop_pending_updates")):
+            self.dropped += len(self.updates)
+            self.updates = []
+        if method == "getMe":
+            result = BOT_USER
+        elif method == "setWebhook":
+            self.webhook = params
+        elif method == "deleteWebhook":
+            self.webhook = None
+        elif method == "getUpdates":
+            result = await self._get_updates(params)
+        elif method == "sendMessage":
+            result = {
+                "message_id": next(self._message_ids),
+                "date": int(time.time()),
+                "chat": {"id": int(params["chat_id"]), "type": "private"},
+                "from": BOT_USER,
+                "text": params.get("text", "")
+            }
+        return web.json_response({"ok": True, "result": result})
+
+    async def _get_updates(self, params: Dict[str, Any]) -> List[Dict[str, Any]]:
+        offset = int(params.get("offset") or 0)
+        limit = int(params.get("limit") or 100)
+        timeout = float(params.get("timeout") or 0)
+        # An offset confirms every earlier update
+        if offset:
+            self.updates = [update for update in self.updates if update["update_id"] >= offset]
+        if not self.updates and timeout:
+            self._new_update.clear()
+            try:
+                await asyncio.wait_for(self._new_update.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+        return self.updates[:limit]
+
+    def push_update(self, update: Dict[str, Any]) -> None:
+        """Make an update available to getUpdates."""
+        self.updates.append(update)
+        self._new_update.set()
+
+    def message_update(self, user_id: int, text: str) -> Dict[str, Any]:
+        """Build the update Telegram sends when a user writes to the bot."""
+        user = {"id": user_id, "is_bot": False, "first_name": f"User {user_id}"}
+        return {
+            "update_id": next(self._update_ids),
+            "message": {
+                "message_id": next(self._message_ids),
+                "date": int(time.time()),
+                "chat": {"id": user_id, "type": "private"},
+                "from": user,
+                "text": text,
+                **({"entities": [{"type": "bot_command", "offset": 0, "length": len(text.split()[0])}]}
+                   if text.startswith("/") else {})
+            }
+        }
+
+    async def deliver(self, update: Dict[str, Any], secret_token: Optional[str] = None) -> int:
+        """POST an update to the registered webhook and return the status code."""
+        if self.webhook is None:
+            raise RuntimeError("No webhook registered")
+        if secret_token is None:
+            secret_token = self.webhook.get("secret_token", "")
+        headers = {"X-Telegram-Bot-Api-Secret-Token": secret_token}
+        async with self._session.post(self.webhook["url"], json=update, headers=headers) as response:
+            return response.status
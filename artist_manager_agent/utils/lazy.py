@@ -0,0 +1,21 @@
+"""Lazy imports of package attributes."""
+from typing import Any, Callable, Dict
+import importlib
+
+
+def lazy_module_getattr(package: str, imports: Dict[str, str]) -> Callable[[str], Any]:
+    """Return a module ``__getattr__`` that imports attributes on first access.
+
+    ``imports`` maps each attribute name to the module defining it, relative
+    to ``package``. The imported value is stored in the package, so later
+    accesses do not go through ``__getattr__``.
+    """
+    def __getattr__(name: str) -> Any:
+        module = imports.get(name)
+        if module is None:
+            raise AttributeError(f"module {package!r} has no attribute {name!r}")
+        value = getattr(importlib.import_module(module, package), name)
+        setattr(importlib.import_module(package), name, value)
+        return value
+
+    return __getattr__
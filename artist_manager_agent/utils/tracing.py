@@ -0,0 +1,132 @@
+"""Sampled tracing of incoming updates for the Artist Manager Bot."""
+from typing import Any, Dict, Iterable, Optional
+from datetime import datetime
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+
+from telegram import Update
+from telegram.ext import ContextTypes
+
+from .logger import get_logger
+
+logger = get_logger(__name__)
+
+
+class _DroppingQueueHandler(logging.handlers.QueueHandler):
+    """Queue trace records as they are; drop them when the writer falls behind."""
+
+    def __init__(self, record_queue: queue.Queue):
+        super().__init__(record_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # The message is already a JSON line, skip the copy QueueHandler makes
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class UpdateTracer:
+    """Write JSON trace records of sampled updates without blocking handlers.
+
+    Nothing is serialized unless tracing is enabled and the update is
+    sampled: updates of users in ``user_ids`` always are, others with
+    probability ``sample_rate``. A sampled update is serialized to a JSON
+    line on the event loop, since handlers keep changing its data, and
+    written to ``path`` by a background thread. When more than
+    ``max_queue`` records are waiting, new ones are dropped and counted.
+    """
+
+    def __init__(
+        self,
+        enabled: bool = False,
+        sample_rate: float = 1.0,
+        user_ids: Iterable[int] = (),
+        path: str = "logs/updates.jsonl",
+        max_queue: int = 10000
+    ):
+        self.enabled = enabled
+        self.sample_rate = sample_rate
+        self.user_ids = frozenset(user_ids)
+        self.path = path
+        self._queue: queue.Queue = queue.Queue(maxsize=max_queue)
+        self._handler = _DroppingQueueHandler(self._queue)
+        self._listener: Optional[logging.handlers.QueueListener] = None
+        self._trace_logger = logging.getLogger("artist_manager_agent.trace")
+        self._trace_logger.propagate = False
+        self._trace_logger.setLevel(logging.DEBUG)
+        self.traced = 0
+
+    @property
+    def dropped(self) -> int:
+        return self._handler.dropped
+
+    def start(self) -> None:
+        """Start the writer thread."""
+        if not self.enabled or self._listener is not None:
+            return
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        file_handler = logging.handlers.RotatingFileHandler(
+            self.path,
+            maxBytes=10485760,  # 10MB
+            backupCount=5
+        )
+        file_handler.setFormatter(logging.Formatter("%(message)s"))
+        self._listener = logging.handlers.QueueListener(self._queue, file_handler)
+        self._listener.start()
+        self._trace_logger.addHandler(self._handler)
+        logger.info(f"Tracing updates to {self.path} (sample rate {self.sample_rate}, {len(self.user_ids)} users)")
+
+    def stop(self) -> None:
+        """Write the queued records and stop the writer thread."""
+        if self._listener is None:
+            return
+        self._trace_logger.removeHandler(self._handler)
+        self._listener.stop()
+        for handler in self._listener.handlers:
+            handler.close()
+        self._listener = None
+        if self.dropped:
+            logger.warning(f"Dropped {self.dropped} update traces, the writer could not keep up")
+
+    def sampled(self, update: Update) -> bool:
+        """Decide whether to trace an update, without touching its content."""
+        if not self.enabled:
+            return False
+        user = update.effective_user
+        if user is not None and user.id in self.user_ids:
+            return True
+        return self.sample_rate >= 1.0 or random.random() < self.sample_rate
+
+    async def handle(self, update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+        """Handler callback that traces sampled updates."""
+        if not self.sampled(update):
+            return
+        try:
+            self._trace_logger.debug(json.dumps(self._record(update, context), default=str))
+            self.traced += 1
+        except Exception as e:
+            logger.error(f"Error tracing update: {e}")
+
+    @staticmethod
+    def _record(update: Update, context: ContextTypes.DEFAULT_TYPE) -> Dict[str, Any]:
+        message = update.effective_message
+        text = message.text if message else None
+        return {
+            "timestamp": datetime.now().isoformat(),
+            "update_id": update.update_id,
+            "user_id": update.effective_user.id if update.effective_user else None,
+            "chat_id": update.effective_chat.id if update.effective_chat else None,
+            "command": text.split()[0] if text and text.startswith("/") else None,
+            "update": update.to_dict(),
+            "user_data": dict(context.user_data) if context.user_data else None,
+            "chat_data": dict(context.chat_data) if context.chat_data else None
+        }
@@ -0,0 +1 @@
+"""Benchmarks for the Artist Manager Bot."""
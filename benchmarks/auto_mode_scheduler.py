@@ -0,0 +1,103 @@
+"""Measure the auto mode scheduler with many enrolled users.
+
+Enrolls ``--users`` users with the frequencies the settings menu offers and
+first runs spread over the longest one, as after users enabled auto mode
+over time. Reports the cost of enrolling and rescheduling, memory, CPU used
+while no cycle is due, and how late cycles start when ``--due`` users are
+due at once.
+
+Usage:
+    python -m benchmarks.auto_mode_scheduler --users 100000 --idle 5
+"""
+import argparse
+import asyncio
+import json
+import random
+import statistics
+import time
+import tracemalloc
+
+from artist_manager_agent.core.user_scheduler import UserScheduler
+
+FREQUENCIES = [3600, 3 * 3600, 6 * 3600]
+
+
+async def run(args) -> dict:
+    lags = []
+    done = asyncio.Event()
+
+    async def cycle(record):
+        lags.append(time.time() - record["next_run"])
+        await asyncio.sleep(args.work)
+        if len(lags) == args.due:
+            done.set()
+
+    scheduler = UserScheduler(cycle, workers=args.workers)
+    random.seed(0)
+
+    tracemalloc.start()
+    started = time.perf_counter()
+    for user_id in range(args.users):
+        scheduler.enable(
+            user_id, user_id, random.choice(FREQUENCIES),
+            delay=args.idle + 60 + random.random() * FREQUENCIES[-1]
+        )
+    enroll_seconds = time.perf_counter() - started
+    memory_mb = tracemalloc.get_traced_memory()[0] / 2 ** 20
+    tracemalloc.stop()
+
+    started = time.perf_counter()
+    for user_id in random.sample(range(args.users), min(args.users, 10000)):
+        scheduler.set_interval(user_id, random.choice(FREQUENCIES))
+    reschedule_us = (time.perf_counter() - started) / min(args.users, 10000) * 1e6
+
+    tasks = [asyncio.create_task(scheduler.run_scheduler())]
+    tasks += [asyncio.create_task(scheduler.run_worker()) for _ in range(scheduler.workers)]
+
+    # Nothing is due, the scheduler should be asleep
+    cpu_started = time.process_time()
+    await asyncio.sleep(args.idle)
+    idle_cpu = time.process_time() - cpu_started
+
+    # Make a batch of users due now
+    for user_id in range(args.due):
+        scheduler.disable(user_id)
+        scheduler.enable(user_id, user_id, FREQUENCIES[0])
+    started = time.perf_counter()
+    await asyncio.wait_for(done.wait(), 600)
+    burst_seconds = time.perf_counter() - started
+
+    await scheduler.drain()
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+
+    lags.sort()
+    return {
+        "users": args.users,
+        "enroll_us_per_user": round(enroll_seconds / args.users * 1e6, 2),
+        "reschedule_us": round(reschedule_us, 2),
+        "memory_mb": round(memory_mb, 1),
+        "idle_seconds": args.idle,
+        "idle_cpu_seconds": round(idle_cpu, 4),
+        "due_at_once": args.due,
+        "burst_seconds": round(burst_seconds, 3),
+        "lag_p50_ms": round(statistics.median(lags) * 1000, 1),
+        "lag_max_ms": round(lags[-1] * 1000, 1),
+        "runs": scheduler.stats["runs"],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, default=100000)
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--idle", type=float, default=5, help="seconds to measure idle CPU")
+    parser.add_argument("--due", type=int, default=1000, help="users due at the same time")
+    parser.add_argument("--work", type=float, default=0.005, help="seconds each cycle takes")
+    args = parser.parse_args()
+    print(json.dumps(asyncio.run(run(args)), indent=2))
+
+
+if __name__ == "__main__":
+    main()
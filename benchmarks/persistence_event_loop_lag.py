@@ -0,0 +1,107 @@
+"""Measure event-loop lag while RobustPersistence saves a large state.
+
+Compares writing the snapshot inline on the event loop (the previous
+behaviour of ``flush``) with ``flush`` running serialization and file I/O in
+the persistence executor.
+
+Usage:
+    python -m benchmarks.persistence_event_loop_lag --size-mb 50
+"""
+import argparse
+import asyncio
+import json
+import pickle
+import statistics
+import tempfile
+import time
+from pathlib import Path
+
+from artist_manager_agent.persistence import RobustPersistence
+
+
+def build_user(user_id: int) -> dict:
+    """Build a user_data entry resembling an onboarded artist."""
+    return {
+        "profile_data": {
+            "name": f"Artist {user_id}",
+            "genre": "Pop",
+            "career_stage": "emerging",
+            "goals": [f"Goal {i} for artist {user_id}" for i in range(20)],
+            "social_media": {"instagram": f"@artist{user_id}", "twitter": f"@artist{user_id}"},
+        },
+        "auto_settings": {"frequency": 3600, "ai_level": "balanced", "notifications": "important"},
+        "history": [{"step": i, "text": "x" * 80, "ts": time.time()} for i in range(60)],
+    }
+
+
+def populate(persistence: RobustPersistence, size_mb: float) -> int:
+    """Fill the persistence with roughly size_mb of pickled user data."""
+    user_size = len(pickle.dumps(build_user(0)))
+    users = max(1, int(size_mb * 1024 * 1024 / user_size))
+    for user_id in range(users):
+        persistence._user_data[user_id] = build_user(user_id)
+    return users
+
+
+async def measure_lag(save, tick: float = 0.001) -> dict:
+    """Run save() while a ticker records how late each wake-up is."""
+    lags = []
+    done = asyncio.Event()
+
+    async def ticker():
+        while not done.is_set():
+            expected = time.perf_counter() + tick
+            await asyncio.sleep(tick)
+            lags.append(max(0.0, time.perf_counter() - expected))
+
+    ticker_task = asyncio.create_task(ticker())
+    await asyncio.sleep(0.05)
+    lags.clear()
+
+    started = time.perf_counter()
+    await save()
+    duration = time.perf_counter() - started
+
+    done.set()
+    await ticker_task
+
+    lags.sort()
+    return {
+        "save_seconds": round(duration, 3),
+        "max_lag_ms": round(lags[-1] * 1000, 2) if lags else 0.0,
+        "p99_lag_ms": round(lags[int(len(lags) * 0.99) - 1] * 1000, 2) if lags else 0.0,
+        "mean_lag_ms": round(statistics.mean(lags) * 1000, 3) if lags else 0.0,
+        "ticks": len(lags),
+    }
+
+
+async def run(size_mb: float) -> dict:
+    with tempfile.TemporaryDirectory() as tmp:
+        persistence = RobustPersistence(str(Path(tmp) / "persistence.pickle"))
+        users = populate(persistence, size_mb)
+
+        async def inline_save():
+            persistence._write_snapshot(persistence._snapshot_data())
+
+        inline = await measure_lag(inline_save)
+        executor = await measure_lag(persistence.flush)
+        await persistence.close()
+
+        return {
+            "users": users,
+            "state_mb": round(Path(tmp, "persistence.pickle").stat().st_size / 1024 / 1024, 1)
+            if Path(tmp, "persistence.pickle").exists() else None,
+            "inline": inline,
+            "executor": executor,
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--size-mb", type=float, default=50)
+    args = parser.parse_args()
+    print(json.dumps(asyncio.run(run(args.size_mb)), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,158 @@
+"""Measure peak RSS while Application.initialize() reads RobustPersistence.
+
+``copy`` returns dict copies from the getters, as RobustPersistence used
+to; ``view`` returns the read-only views it returns now. Each mode runs in
+a fresh interpreter so that freed memory from one run does not hide the
+peak of the other.
+
+Usage:
+    python -m benchmarks.persistence_initialize_rss --users 10000 100000
+"""
+import argparse
+import asyncio
+import gc
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+from telegram import User
+from telegram.ext import ApplicationBuilder, ConversationHandler, ExtBot
+
+from artist_manager_agent.persistence import RobustPersistence
+from benchmarks.persistence_event_loop_lag import build_user
+
+PAGE_SIZE = os.sysconf("SC_PAGE_SIZE")
+
+
+class OfflineBot(ExtBot):
+    """Bot that answers get_me locally so initialize() needs no network."""
+
+    async def get_me(self, *args, **kwargs) -> User:
+        self._bot_user = User(id=123, first_name="Benchmark", is_bot=True, username="benchmark_bot")
+        return self._bot_user
+
+
+class CopyingPersistence(RobustPersistence):
+    """RobustPersistence with the getters returning copies, as before."""
+
+    async def get_user_data(self):
+        return self._user_data.copy()
+
+    async def get_chat_data(self):
+        return self._chat_data.copy()
+
+    async def get_bot_data(self):
+        return self._bot_data.copy()
+
+    async def get_conversations(self, name):
+        return self._conversations.get(name, {}).copy()
+
+
+def rss_bytes() -> int:
+    with open("/proc/self/statm") as f:
+        return int(f.read().split()[1]) * PAGE_SIZE
+
+
+class PeakSampler:
+    """Sample RSS from a background thread and keep the maximum."""
+
+    def __init__(self, interval: float = 0.001):
+        self.interval = interval
+        self.peak = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            self.peak = max(self.peak, rss_bytes())
+            time.sleep(self.interval)
+
+    def __enter__(self) -> "PeakSampler":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self._stop.set()
+        self._thread.join()
+        self.peak = max(self.peak, rss_bytes())
+
+
+async def populate(path: Path, users: int) -> None:
+    """Write a persistence file with ``users`` users, chats and conversations."""
+    persistence = RobustPersistence(str(path), flush_threshold=users * 2 + 1)
+    await persistence.load()
+    for user_id in range(users):
+        await persistence.update_user_data(user_id, build_user(user_id))
+        await persistence.update_chat_data(user_id, {"last_command": "/start"})
+        await persistence.update_conversation("benchmark", (user_id, user_id), 0)
+    await persistence.update_bot_data({"profiles": {}})
+    await persistence.close()
+
+
+async def measure(path: Path, mode: str) -> dict:
+    """Load the persistence, then record peak RSS during initialize()."""
+    persistence_class = CopyingPersistence if mode == "copy" else RobustPersistence
+    persistence = persistence_class(str(path))
+    await persistence.load()
+
+    bot = OfflineBot("123:abc")
+    application = ApplicationBuilder().bot(bot).persistence(persistence).build()
+    application.add_handler(ConversationHandler(
+        entry_points=[], states={}, fallbacks=[], name="benchmark", persistent=True
+    ))
+    gc.collect()
+    baseline = rss_bytes()
+
+    started = time.perf_counter()
+    with PeakSampler() as sampler:
+        await application.initialize()
+    seconds = time.perf_counter() - started
+
+    assert len(application.user_data) == len(persistence._user_data)
+    await application.shutdown()
+    return {
+        "baseline_mb": round(baseline / 1024 / 1024, 1),
+        "peak_mb": round(sampler.peak / 1024 / 1024, 1),
+        "peak_delta_mb": round((sampler.peak - baseline) / 1024 / 1024, 2),
+        "initialize_seconds": round(seconds, 3),
+    }
+
+
+def run_child(path: Path, mode: str) -> dict:
+    """Measure one mode in a fresh interpreter."""
+    output = subprocess.run(
+        [sys.executable, "-m", "benchmarks.persistence_initialize_rss", "--child", mode, str(path)],
+        check=True, capture_output=True, text=True
+    ).stdout
+    return json.loads(output)
+
+
+def run(user_counts) -> dict:
+    results = {}
+    for users in user_counts:
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "persistence.pickle"
+            asyncio.run(populate(path, users))
+            results[users] = {mode: run_child(path, mode) for mode in ("copy", "view")}
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, nargs="+", default=[10000])
+    parser.add_argument("--child", nargs=2, metavar=("MODE", "PATH"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        mode, path = args.child
+        print(json.dumps(asyncio.run(measure(Path(path), mode))))
+        return
+    print(json.dumps(run(args.users), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""Measure RobustPersistence startup time for eager and lazy loading.
+
+The eager layout unpickles every user's data in ``load``; the lazy layout
+only reads the record store index and loads a user on first refresh.
+
+Usage:
+    python -m benchmarks.persistence_startup --users 1000 10000 100000
+"""
+import argparse
+import asyncio
+import json
+import tempfile
+import time
+from pathlib import Path
+
+from artist_manager_agent.persistence import RobustPersistence
+from benchmarks.persistence_event_loop_lag import build_user
+
+
+async def populate(path: Path, users: int, lazy_load: bool) -> None:
+    """Write a persistence file holding ``users`` users."""
+    persistence = RobustPersistence(str(path), lazy_load=lazy_load, flush_threshold=users + 1)
+    await persistence.load()
+    for user_id in range(users):
+        await persistence.update_user_data(user_id, build_user(user_id))
+    await persistence.close()
+
+
+async def measure(path: Path, lazy_load: bool) -> dict:
+    """Time load() and the first access to a single user."""
+    persistence = RobustPersistence(str(path), lazy_load=lazy_load)
+    started = time.perf_counter()
+    await persistence.load()
+    loaded = await persistence.get_user_data()
+    load_seconds = time.perf_counter() - started
+
+    started = time.perf_counter()
+    user_data = loaded.get(0, {})
+    await persistence.refresh_user_data(0, user_data)
+    first_access_ms = (time.perf_counter() - started) * 1000
+    assert user_data["profile_data"]["name"] == "Artist 0"
+
+    await persistence.close()
+    return {
+        "load_seconds": round(load_seconds, 4),
+        "users_in_memory": len(loaded),
+        "first_access_ms": round(first_access_ms, 3),
+    }
+
+
+async def run(user_counts) -> dict:
+    results = {}
+    for users in user_counts:
+        results[users] = {}
+        for mode, lazy_load in (("eager", False), ("lazy", True)):
+            with tempfile.TemporaryDirectory() as tmp:
+                path = Path(tmp) / "persistence.pickle"
+                await populate(path, users, lazy_load)
+                results[users][mode] = await measure(path, lazy_load)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, nargs="+", default=[1000, 10000])
+    args = parser.parse_args()
+    print(json.dumps(asyncio.run(run(args.users)), indent=2))
+
+
+if __name__ == "__main__":
+    main()
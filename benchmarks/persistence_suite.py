@@ -0,0 +1,360 @@
+"""Benchmark and crash-recovery suite for RobustPersistence.
+
+For every scale, a fresh interpreter generates synthetic users, chats,
+conversations and bot_data and measures:
+
+* update latency of ``update_user_data`` on the populated state
+* flush throughput when every user changed
+* size of the snapshot and of the first and an incremental backup
+* ``load`` time and the memory it takes
+
+It then starts a writer process that keeps changing and flushing users,
+kills it with SIGKILL mid-write and times ``load``, once as left by the
+kill and once with the main file torn so that the backup fallback is used.
+
+Results are written as JSON so runs can be compared between releases.
+
+Usage:
+    python -m benchmarks.persistence_suite --scales 1000 10000 100000 --output results.json
+"""
+import argparse
+import asyncio
+import gc
+import json
+import logging
+import os
+import platform
+import resource
+import signal
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any, Dict, List
+
+from artist_manager_agent.models import ArtistProfile, Task
+from artist_manager_agent.persistence import RobustPersistence
+
+PAGE_SIZE = os.sysconf("SC_PAGE_SIZE")
+MB = 1024 * 1024
+CONVERSATION = "onboarding"
+
+
+def synthetic_user(user_id: int, revision: int = 0) -> Dict[str, Any]:
+    """Build the user_data of an artist part way through using the bot."""
+    now = datetime(2024, 1, 1) + timedelta(minutes=user_id)
+    profile = ArtistProfile(
+        name=f"Artist {user_id}",
+        genre="Pop",
+        career_stage="emerging",
+        goals=[f"Goal {i}" for i in range(3)],
+        strengths=["songwriting"],
+        achievements=[f"Release {revision}"],
+        social_media={"instagram": f"@artist{user_id}"},
+        streaming_profiles={"spotify": f"https://open.spotify.com/artist/{user_id}"},
+    )
+    tasks = [
+        Task(
+            title=f"Task {i}", description="Prepare release assets", deadline=now + timedelta(days=i),
+            assigned_to="manager", status="pending", priority=i % 3
+        )
+        for i in range(2)
+    ]
+    return {
+        "profile_data": profile,
+        "tasks": tasks,
+        "auto_settings": {"frequency": 3600, "ai_level": "balanced", "notifications": "important"},
+        "revision": revision,
+    }
+
+
+def synthetic_bot_data(users: int) -> Dict[str, Any]:
+    return {"profiles": {user_id: f"profile-{user_id}" for user_id in range(0, users, 10)}}
+
+
+def persistence_options(config: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "wal_mode": config["wal"],
+        "lazy_load": config["lazy"],
+        "shards": config["shards"],
+    }
+
+
+def rss_bytes() -> int:
+    with open("/proc/self/statm") as f:
+        return int(f.read().split()[1]) * PAGE_SIZE
+
+
+def directory_size(path: Path) -> int:
+    return sum(item.stat().st_size for item in path.rglob("*") if item.is_file())
+
+
+def percentiles(samples: List[float]) -> Dict[str, float]:
+    """Summarize latencies in milliseconds."""
+    ordered = sorted(samples)
+
+    def pick(fraction: float) -> float:
+        return round(ordered[min(len(ordered) - 1, int(len(ordered) * fraction))] * 1000, 4)
+
+    return {
+        "mean_ms": round(statistics.fmean(ordered) * 1000, 4),
+        "p50_ms": pick(0.50),
+        "p95_ms": pick(0.95),
+        "p99_ms": pick(0.99),
+        "max_ms": round(ordered[-1] * 1000, 4),
+    }
+
+
+def stored_users(persistence: RobustPersistence) -> int:
+    """Count users held in memory or in the record stores."""
+    keys = set(persistence._user_data)
+    if persistence._shards is not None:
+        keys.update(persistence._shards.keys("user_data"))
+    return len(keys)
+
+
+class LoadSource(logging.Handler):
+    """Remember whether load() fell back to a backup."""
+
+    def __init__(self):
+        super().__init__()
+        self.source = "main"
+
+    def emit(self, record: logging.LogRecord) -> None:
+        if "from backup" in record.getMessage():
+            self.source = "backup"
+
+
+async def timed_load(path: Path, config: Dict[str, Any]) -> Dict[str, Any]:
+    """Time load() and report where the state came from."""
+    handler = LoadSource()
+    persistence_logger = logging.getLogger("artist_manager_agent.persistence")
+    level, propagate = persistence_logger.level, persistence_logger.propagate
+    persistence_logger.setLevel(logging.INFO)
+    persistence_logger.propagate = False
+    persistence_logger.addHandler(handler)
+    try:
+        persistence = RobustPersistence(str(path), **persistence_options(config))
+        started = time.perf_counter()
+        await persistence.load()
+        seconds = time.perf_counter() - started
+        users = stored_users(persistence)
+        await persistence.close()
+    finally:
+        persistence_logger.removeHandler(handler)
+        persistence_logger.setLevel(level)
+        persistence_logger.propagate = propagate
+    return {"load_seconds": round(seconds, 4), "source": handler.source, "recovered_users": users}
+
+
+async def populate(path: Path, users: int, config: Dict[str, Any]) -> Dict[str, Any]:
+    """Write the synthetic state in a single flush."""
+    persistence = RobustPersistence(str(path), flush_threshold=users * 3 + 2, **persistence_options(config))
+    await persistence.load()
+
+    started = time.perf_counter()
+    for user_id in range(users):
+        await persistence.update_user_data(user_id, synthetic_user(user_id))
+        await persistence.update_chat_data(user_id, {"last_command": "/start"})
+        await persistence.update_conversation(CONVERSATION, (user_id, user_id), "AWAITING_GENRE")
+    await persistence.update_bot_data(synthetic_bot_data(users))
+    await persistence.flush()
+    total = time.perf_counter() - started
+    await persistence.close()
+    return {"populate_seconds": round(total, 3)}
+
+
+async def measure_updates(path: Path, users: int, config: Dict[str, Any], samples: int) -> Dict[str, Any]:
+    """Time update_user_data on the populated state with the default flush settings.
+
+    Calls that cross the flush threshold include the flush, so the tail
+    percentiles show its cost at this scale.
+    """
+    persistence = RobustPersistence(str(path), **persistence_options(config))
+    await persistence.load()
+
+    latencies = []
+    step = max(1, users // samples)
+    started = time.perf_counter()
+    for index in range(samples):
+        user_id = (index * step) % users
+        value = synthetic_user(user_id, revision=1)
+        call_started = time.perf_counter()
+        await persistence.update_user_data(user_id, value)
+        latencies.append(time.perf_counter() - call_started)
+    total = time.perf_counter() - started
+    flushes = persistence._scheduler.stats["flushes"]
+    await persistence.close()
+
+    return {
+        "update_user_data": percentiles(latencies),
+        "samples": samples,
+        "flushes": flushes,
+        "updates_per_second": round(samples / total, 1),
+    }
+
+
+async def measure_flush(path: Path, users: int, config: Dict[str, Any], changed_fraction: float) -> Dict[str, Any]:
+    """Time a flush of every user, then the backup written for a few changes."""
+    persistence = RobustPersistence(str(path), flush_threshold=users + 1, **persistence_options(config))
+    await persistence.load()
+    backup_dir = path.parent / "backups"
+    first_backup_bytes = directory_size(backup_dir)
+
+    for user_id in range(users):
+        await persistence.update_user_data(user_id, synthetic_user(user_id, revision=1))
+    started = time.perf_counter()
+    await persistence.flush()
+    full_seconds = time.perf_counter() - started
+
+    before = dict(persistence._backups.stats)
+    changed = max(1, int(users * changed_fraction))
+    for user_id in range(changed):
+        await persistence.update_user_data(user_id, synthetic_user(user_id, revision=2))
+    started = time.perf_counter()
+    await persistence.flush()
+    incremental_seconds = time.perf_counter() - started
+    after = persistence._backups.stats
+    await persistence.close()
+
+    snapshot_bytes = path.stat().st_size
+    records_dir = path.parent / f"{path.stem}.records"
+    record_bytes = directory_size(records_dir) if records_dir.exists() else 0
+    return {
+        "full_flush_seconds": round(full_seconds, 3),
+        "full_flush_users_per_second": round(users / full_seconds, 1),
+        "full_flush_mb_per_second": round((snapshot_bytes + record_bytes) / MB / full_seconds, 1),
+        "incremental_users": changed,
+        "incremental_flush_seconds": round(incremental_seconds, 4),
+        "snapshot_mb": round(snapshot_bytes / MB, 2),
+        "records_mb": round(record_bytes / MB, 2),
+        "first_backup_mb": round(first_backup_bytes / MB, 2),
+        "backup_dir_mb": round(directory_size(backup_dir) / MB, 2),
+        "incremental_backup_kb": round((after["bytes_written"] - before["bytes_written"]) / 1024, 1),
+    }
+
+
+async def measure_load(path: Path, config: Dict[str, Any]) -> Dict[str, Any]:
+    """Time load() and the memory it allocates."""
+    gc.collect()
+    baseline = rss_bytes()
+    persistence = RobustPersistence(str(path), **persistence_options(config))
+    started = time.perf_counter()
+    await persistence.load()
+    seconds = time.perf_counter() - started
+    loaded = rss_bytes()
+    users = stored_users(persistence)
+    await persistence.close()
+    return {
+        "load_seconds": round(seconds, 4),
+        "users": users,
+        "rss_delta_mb": round((loaded - baseline) / MB, 1),
+        "max_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+    }
+
+
+async def crash_writer(path: Path, users: int, config: Dict[str, Any]) -> None:
+    """Change and flush users until killed."""
+    persistence = RobustPersistence(str(path), flush_threshold=users + 1, **persistence_options(config))
+    await persistence.load()
+    print("ready", flush=True)
+    batch = max(1, users // 20)
+    revision = 10
+    while True:
+        revision += 1
+        for user_id in range(0, users, max(1, users // batch)):
+            await persistence.update_user_data(user_id, synthetic_user(user_id, revision))
+        await persistence.flush()
+
+
+def kill_mid_write(path: Path, users: int, config: Dict[str, Any], delay: float) -> Dict[str, Any]:
+    """Start a writer, SIGKILL it after ``delay`` seconds of flushing."""
+    writer = subprocess.Popen(
+        [sys.executable, "-m", "benchmarks.persistence_suite", "--crash-writer", str(path), str(users),
+         "--config", json.dumps(config)],
+        stdout=subprocess.PIPE, text=True
+    )
+    writer.stdout.readline()
+    time.sleep(delay)
+    writer.send_signal(signal.SIGKILL)
+    writer.wait()
+    return {"killed_after_seconds": delay, "temp_file_left": path.with_suffix(".tmp").exists()}
+
+
+def tear(path: Path) -> None:
+    """Cut the main snapshot in half, as a torn or partial write would."""
+    size = path.stat().st_size
+    with open(path, "r+b") as f:
+        f.truncate(size // 2)
+
+
+async def run_scale(users: int, config: Dict[str, Any], samples: int, kill_delay: float) -> Dict[str, Any]:
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "persistence.pickle"
+        result = {"users": users}
+        result["populate"] = await populate(path, users, config)
+        result["updates"] = await measure_updates(path, users, config, samples)
+        result["flush"] = await measure_flush(path, users, config, changed_fraction=0.01)
+        result["load"] = await measure_load(path, config)
+
+        crash = kill_mid_write(path, users, config, kill_delay)
+        crash["after_kill"] = await timed_load(path, config)
+        tear(path)
+        crash["torn_main_file"] = await timed_load(path, config)
+        result["crash_recovery"] = crash
+        return result
+
+
+def run_isolated(users: int, config: Dict[str, Any], samples: int, kill_delay: float) -> Dict[str, Any]:
+    """Run one scale in a fresh interpreter so memory figures are comparable."""
+    output = subprocess.run(
+        [sys.executable, "-m", "benchmarks.persistence_suite", "--worker", str(users),
+         "--samples", str(samples), "--kill-delay", str(kill_delay), "--config", json.dumps(config)],
+        check=True, capture_output=True, text=True
+    ).stdout
+    return json.loads(output)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--scales", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--output", help="Write the JSON results to this file instead of stdout")
+    parser.add_argument("--wal", action="store_true", help="Enable the write-ahead log")
+    parser.add_argument("--lazy", action="store_true", help="Load users lazily from record stores")
+    parser.add_argument("--shards", type=int, default=1)
+    parser.add_argument("--samples", type=int, default=1000, help="update_user_data calls to time")
+    parser.add_argument("--kill-delay", type=float, default=1.0, help="Seconds of writing before SIGKILL")
+    parser.add_argument("--worker", type=int, help=argparse.SUPPRESS)
+    parser.add_argument("--crash-writer", nargs=2, help=argparse.SUPPRESS)
+    parser.add_argument("--config", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.CRITICAL)
+    if args.crash_writer:
+        path, users = args.crash_writer
+        asyncio.run(crash_writer(Path(path), int(users), json.loads(args.config)))
+        return
+    if args.worker:
+        print(json.dumps(asyncio.run(run_scale(args.worker, json.loads(args.config), args.samples, args.kill_delay))))
+        return
+
+    config = {"wal": args.wal, "lazy": args.lazy, "shards": args.shards}
+    report = {
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "config": config,
+        "results": [run_isolated(users, config, args.samples, args.kill_delay) for users in args.scales],
+    }
+    output = json.dumps(report, indent=2)
+    if args.output:
+        Path(args.output).write_text(output + "\n")
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,145 @@
+"""Measure update loss and reply latency while the bot is restarted.
+
+Runs the bot as a process polling the local fake Bot API, which answers
+"ping <n>" with "pong <n>", and feeds it pings at a steady rate. Halfway
+through, a second process starts and takes over: in ``drain`` mode it asks
+the old one to drain as main.py does, in ``kill`` mode the old one is
+killed first, like a crash or the former restart behaviour.
+
+Usage:
+    python -m benchmarks.rolling_restart --mode drain --updates 600 --rate 20
+"""
+import argparse
+import asyncio
+import json
+import os
+import signal
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from artist_manager_agent.utils.fake_bot_api import FakeBotAPI
+
+TOKEN = "123:abc"
+
+
+async def serve(api_url: str, data_dir: str, drain_timeout: float, work: float) -> None:
+    """Run one bot process; started by ``run`` with ``--serve``."""
+    from telegram.ext import ApplicationHandlerStop, MessageHandler, filters
+
+    from artist_manager_agent.core.bot import Bot
+    from artist_manager_agent.main import run_bot, take_over_running_instance
+
+    bot = Bot(
+        TOKEN,
+        Path(data_dir),
+        message_queue_options={"global_rate": 1000},
+        drain_timeout=drain_timeout,
+        base_url=api_url
+    )
+
+    async def pong(update, context):
+        # Stands in for a handler doing real work
+        await asyncio.sleep(work)
+        await bot.message_queue.send(update.effective_chat.id, "pong " + update.effective_message.text.split()[1])
+        raise ApplicationHandlerStop
+
+    bot.application.add_handler(MessageHandler(filters.Regex(r"^ping \d+$"), pong), group=-2)
+    await take_over_running_instance(Path(data_dir) / "bot.pid", drain_timeout + 30)
+    await run_bot(bot)
+
+
+async def spawn(api: FakeBotAPI, data_dir: str, args) -> asyncio.subprocess.Process:
+    return await asyncio.create_subprocess_exec(
+        sys.executable, "-m", "benchmarks.rolling_restart", "--serve",
+        "--api-url", api.base_url, "--data-dir", data_dir,
+        "--drain-timeout", str(args.drain_timeout), "--work", str(args.work),
+        env={**os.environ, "TELEGRAM_BOT_TOKEN": TOKEN},
+    )
+
+
+async def wait_for_polling(api: FakeBotAPI, since: float, timeout: float = 60.0) -> None:
+    deadline = time.time() + timeout
+    while not any(call["method"] == "getUpdates" and call["time"] > since for call in api.calls):
+        if time.time() > deadline:
+            raise RuntimeError("Bot process did not start polling")
+        await asyncio.sleep(0.05)
+
+
+def replies(api: FakeBotAPI) -> dict:
+    """Map each answered ping to the times its pongs were sent."""
+    answered = {}
+    for call in api.calls:
+        if call["method"] == "sendMessage" and str(call["params"].get("text", "")).startswith("pong "):
+            answered.setdefault(int(call["params"]["text"].split()[1]), []).append(call["time"])
+    return answered
+
+
+async def run(args) -> dict:
+    api = FakeBotAPI()
+    await api.start()
+    data_dir = tempfile.mkdtemp(prefix="rolling-restart-")
+    try:
+        started = time.time()
+        old = await spawn(api, data_dir, args)
+        await wait_for_polling(api, started)
+
+        sent_at = {}
+        new = None
+        restart_at = args.updates // 2
+        for ping in range(args.updates):
+            if ping == restart_at:
+                if args.mode == "kill":
+                    old.kill()
+                new = await spawn(api, data_dir, args)
+            api.push_update(api.message_update(1000 + ping % args.users, f"ping {ping}"))
+            sent_at[ping] = time.time()
+            await asyncio.sleep(1 / args.rate)
+
+        deadline = time.time() + args.settle
+        while len(replies(api)) < args.updates and time.time() < deadline:
+            await asyncio.sleep(0.1)
+
+        await old.wait()
+        new.send_signal(signal.SIGTERM)
+        await new.wait()
+    finally:
+        await api.stop()
+
+    answered = replies(api)
+    latencies = sorted((times[0] - sent_at[ping]) * 1000 for ping, times in answered.items())
+    return {
+        "mode": args.mode,
+        "updates": args.updates,
+        "lost": args.updates - len(answered),
+        "dropped_by_telegram": api.dropped,
+        "duplicated": sum(1 for times in answered.values() if len(times) > 1),
+        "latency_p50_ms": round(statistics.median(latencies), 1) if latencies else None,
+        "latency_p99_ms": round(latencies[int(len(latencies) * 0.99)], 1) if latencies else None,
+        "latency_max_ms": round(latencies[-1], 1) if latencies else None,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--mode", choices=["drain", "kill"], default="drain")
+    parser.add_argument("--updates", type=int, default=600)
+    parser.add_argument("--rate", type=float, default=20, help="pings per second")
+    parser.add_argument("--users", type=int, default=100)
+    parser.add_argument("--work", type=float, default=0.05, help="seconds each ping is handled")
+    parser.add_argument("--drain-timeout", type=float, default=30)
+    parser.add_argument("--settle", type=float, default=60, help="seconds to wait for late replies")
+    parser.add_argument("--serve", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--api-url", help=argparse.SUPPRESS)
+    parser.add_argument("--data-dir", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.serve:
+        asyncio.run(serve(args.api_url, args.data_dir, args.drain_timeout, args.work))
+    else:
+        print(json.dumps(asyncio.run(run(args)), indent=2))
+
+
+if __name__ == "__main__":
+    main()
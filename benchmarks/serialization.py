@@ -0,0 +1,118 @@
+"""Compare the compact persistence format with pickle on realistic user data.
+
+Each user holds an ArtistProfile with tasks, goals, payment requests and
+streaming stats, which is the shape of the state the bot persists.
+
+Usage:
+    python -m benchmarks.serialization --profiles 10000
+"""
+import argparse
+import json
+import pickle
+import time
+from datetime import datetime, timedelta
+
+from artist_manager_agent.models import (
+    ArtistProfile,
+    DistributionPlatform,
+    Goal,
+    PaymentMethod,
+    PaymentRequest,
+    StreamingStats,
+    Task,
+)
+from artist_manager_agent.persistence import serialization
+
+
+def build_user(user_id: int) -> dict:
+    """Build the persisted state of one onboarded artist."""
+    now = datetime(2024, 1, 1) + timedelta(minutes=user_id)
+    profile = ArtistProfile(
+        name=f"Artist {user_id}",
+        genre="Pop",
+        career_stage="emerging",
+        goals=[f"Goal {i}" for i in range(5)],
+        strengths=["songwriting", "live performance"],
+        achievements=[f"Release {i}" for i in range(3)],
+        social_media={"instagram": f"@artist{user_id}", "tiktok": f"@artist{user_id}"},
+        streaming_profiles={"spotify": f"https://open.spotify.com/artist/{user_id}"},
+    )
+    tasks = [
+        Task(
+            title=f"Task {i}", description="Prepare release assets", deadline=now + timedelta(days=i),
+            assigned_to="manager", status="pending", priority=i % 3
+        )
+        for i in range(5)
+    ]
+    goals = [
+        Goal(
+            title=f"Goal {i}", description="Grow monthly listeners", target_date=now + timedelta(days=30 * i),
+            priority="high", status="in_progress", user_id=user_id, progress=10 * i
+        )
+        for i in range(3)
+    ]
+    payments = [
+        PaymentRequest(
+            collaborator_id=f"collab-{i}", amount=100.0 * i, currency="USD", description="Session fee",
+            due_date=now + timedelta(days=7), payment_method=PaymentMethod.BANK_TRANSFER
+        )
+        for i in range(2)
+    ]
+    stats = [
+        StreamingStats(
+            track_id=f"track-{i}", platform=DistributionPlatform.SPOTIFY, streams=1000 * i,
+            unique_listeners=300 * i, saves=40 * i, playlist_adds=5 * i, revenue=3.2 * i,
+            period_start=now - timedelta(days=30), period_end=now
+        )
+        for i in range(4)
+    ]
+    return {"profile_data": profile, "tasks": tasks, "goals": goals, "payments": payments, "streaming": stats}
+
+
+def measure(name: str, dumps, loads, data, repeat: int) -> dict:
+    """Time encoding and decoding data, keeping the best of repeat runs."""
+    encode, decode = float("inf"), float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        encoded = dumps(data)
+        encode = min(encode, time.perf_counter() - started)
+
+        started = time.perf_counter()
+        decoded = loads(encoded)
+        decode = min(decode, time.perf_counter() - started)
+    assert len(decoded) == len(data)
+
+    megabytes = len(encoded) / 1024 / 1024
+    return {
+        "format": name,
+        "size_mb": round(megabytes, 2),
+        "encode_seconds": round(encode, 3),
+        "decode_seconds": round(decode, 3),
+        "encode_mb_per_s": round(megabytes / encode, 1),
+        "decode_mb_per_s": round(megabytes / decode, 1),
+    }
+
+
+def run(profiles: int, repeat: int) -> dict:
+    data = {user_id: build_user(user_id) for user_id in range(profiles)}
+    results = [
+        measure("pickle", lambda value: pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL), pickle.loads, data, repeat),
+        measure("compact", serialization.dumps, serialization.loads, data, repeat),
+    ]
+    return {
+        "profiles": profiles,
+        "results": results,
+        "size_ratio": round(results[1]["size_mb"] / results[0]["size_mb"], 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--profiles", type=int, default=10000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+    print(json.dumps(run(args.profiles, args.repeat), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""Compare bot import time with lazy and eager feature loading.
+
+Each mode imports the bot in a fresh interpreter with ``python -X
+importtime``, as a restarted container would. The eager mode also imports
+what startup used to import: the AI agent and every feature handler module.
+
+Usage:
+    python -m benchmarks.startup_importtime --repeat 5 --top 10
+"""
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+import time
+from typing import Dict, List, Tuple
+
+FEATURE_MODULES = [
+    "onboarding_handlers",
+    "home_handler",
+    "name_change_handler",
+    "goal_handlers",
+    "task_handlers",
+    "project_handlers",
+    "music_handlers",
+    "team_handlers",
+    "auto_handlers",
+    "blockchain_handlers",
+]
+
+MODES = {
+    "lazy": ["artist_manager_agent.core.bot"],
+    "eager": [
+        "artist_manager_agent.core.bot",
+        "artist_manager_agent.core.agent",
+        *(f"artist_manager_agent.handlers.features.{name}" for name in FEATURE_MODULES),
+    ],
+}
+
+
+def parse_importtime(stderr: str) -> List[Tuple[str, int, int]]:
+    """Return (module, self us, cumulative us) of every line of -X importtime output."""
+    modules = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+        # Names follow "| ", nested imports are indented by two more spaces
+        modules.append((name.rstrip()[1:], int(self_us), int(cumulative_us)))
+    return modules
+
+
+def measure(imports: List[str]) -> Dict:
+    """Import ``imports`` in a fresh interpreter and summarize its import times."""
+    statement = "; ".join(f"import {module}" for module in imports)
+    started = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", statement],
+        capture_output=True,
+        text=True,
+    )
+    wall_seconds = time.perf_counter() - started
+    if result.returncode != 0:
+        raise RuntimeError(f"Importing {imports} failed:\n{result.stderr[-2000:]}")
+    modules = parse_importtime(result.stderr)
+    return {
+        "wall_seconds": wall_seconds,
+        "import_ms": sum(self_us for _, self_us, _ in modules) / 1000,
+        "modules": len(modules),
+        # Top-level imports are not indented, their cumulative time includes their imports
+        "top_level": [(name, cumulative_us) for name, _, cumulative_us in modules if not name.startswith(" ")],
+    }
+
+
+def run(repeat: int, top: int) -> Dict:
+    results = {}
+    for mode, imports in MODES.items():
+        runs = [measure(imports) for _ in range(repeat)]
+        slowest = sorted(runs[-1]["top_level"], key=lambda item: item[1], reverse=True)[:top]
+        results[mode] = {
+            "wall_seconds_median": round(statistics.median(run["wall_seconds"] for run in runs), 3),
+            "import_ms_median": round(statistics.median(run["import_ms"] for run in runs), 1),
+            "modules": runs[-1]["modules"],
+            "slowest_imports_ms": {name.strip(): round(us / 1000, 1) for name, us in slowest},
+        }
+    results["speedup"] = round(
+        results["eager"]["import_ms_median"] / max(results["lazy"]["import_ms_median"], 0.001), 2
+    )
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--top", type=int, default=10)
+    args = parser.parse_args()
+    print(json.dumps(run(args.repeat, args.top), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""Measure how many updates per second the webhook server accepts and handles.
+
+Runs a PTB application against the local fake Bot API, posts updates to the
+WebhookServer from concurrent clients the way Telegram does, and reports
+request latency together with end-to-end handling throughput.
+
+Usage:
+    python -m benchmarks.webhook_throughput --updates 20000 --connections 40
+"""
+import argparse
+import asyncio
+import json
+import statistics
+import time
+
+import aiohttp
+from telegram.ext import ApplicationBuilder, MessageHandler, filters
+
+from artist_manager_agent.core.webhook import SECRET_HEADER, WebhookServer
+from artist_manager_agent.utils.fake_bot_api import FakeBotAPI
+
+
+async def run(updates: int, connections: int, queue_size: int) -> dict:
+    bot_api = FakeBotAPI()
+    await bot_api.start()
+    application = (
+        ApplicationBuilder()
+        .token("123:abc")
+        .base_url(bot_api.base_url)
+        .update_queue(asyncio.Queue(maxsize=queue_size))
+        .concurrent_updates(True)
+        .build()
+    )
+    handled = 0
+    all_handled = asyncio.Event()
+
+    async def count(update, context):
+        nonlocal handled
+        handled += 1
+        if handled == updates:
+            all_handled.set()
+
+    application.add_handler(MessageHandler(filters.TEXT, count))
+    await application.initialize()
+    await application.start()
+    server = WebhookServer(application, listen="127.0.0.1", port=0, secret_token="benchmark")
+    await server.start()
+
+    url = f"http://127.0.0.1:{server.port}/telegram"
+    payloads = [json.dumps(bot_api.message_update(user_id % 1000, "hello")) for user_id in range(updates)]
+    headers = {SECRET_HEADER: "benchmark", "Content-Type": "application/json"}
+    latencies = []
+    statuses = {}
+
+    async def client(session, indexes):
+        for index in indexes:
+            started = time.perf_counter()
+            async with session.post(url, data=payloads[index], headers=headers) as response:
+                await response.read()
+                statuses[response.status] = statuses.get(response.status, 0) + 1
+            latencies.append(time.perf_counter() - started)
+
+    connector = aiohttp.TCPConnector(limit=connections)
+    started = time.perf_counter()
+    async with aiohttp.ClientSession(connector=connector) as session:
+        await asyncio.gather(*(client(session, range(i, updates, connections)) for i in range(connections)))
+        accepted_seconds = time.perf_counter() - started
+        await asyncio.wait_for(all_handled.wait(), 60)
+    handled_seconds = time.perf_counter() - started
+
+    await server.stop()
+    await application.stop()
+    await application.shutdown()
+    await bot_api.stop()
+
+    latencies.sort()
+    return {
+        "updates": updates,
+        "connections": connections,
+        "statuses": statuses,
+        "accepted_per_second": round(updates / accepted_seconds, 1),
+        "handled_per_second": round(handled / handled_seconds, 1),
+        "request_p50_ms": round(statistics.median(latencies) * 1000, 3),
+        "request_p99_ms": round(latencies[int(len(latencies) * 0.99)] * 1000, 3),
+        "server_stats": server.stats,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--updates", type=int, default=20000)
+    parser.add_argument("--connections", type=int, default=40)
+    parser.add_argument("--queue-size", type=int, default=1000)
+    args = parser.parse_args()
+    print(json.dumps(asyncio.run(run(args.updates, args.connections, args.queue_size)), indent=2))
+
+
+if __name__ == "__main__":
+    main()
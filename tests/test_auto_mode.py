@@ -0,0 +1,135 @@
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+import pytest
+
+from artist_manager_agent.integrations.task_manager_integration import TaskManagerIntegration
+from artist_manager_agent.managers.deadline_index import DeadlineIndex
+from artist_manager_agent.managers.task_manager import Goal
+from artist_manager_agent.services.auto_mode import AutoDigest, AutoMode
+
+
+class FakeMessageQueue:
+    def __init__(self):
+        self.sent = []
+
+    async def send(self, chat_id, text, **kwargs):
+        self.sent.append((chat_id, text, kwargs))
+
+
+class FakeAIHandler:
+    async def analyze_goal_progress(self, goal, profile):
+        return 40
+
+    async def suggest_tasks_for_goal(self, goal, profile):
+        return [SimpleNamespace(id=f"{goal.title}-1", title=f"Work on {goal.title}", priority="high")]
+
+    async def analyze_metrics(self, profile):
+        return {
+            "social_growth": 1, "streaming_growth": 2, "project_completion": 3, "goal_progress": 4,
+            "insights": ["Streams are up"],
+            "suggested_actions": [{"id": "a1", "title": "Post a teaser"}]
+        }
+
+    async def generate_insights(self, profile):
+        return {"Audience": ["Most listeners are in Berlin"]}
+
+
+def make_auto_mode():
+    bot = SimpleNamespace(
+        deadlines=DeadlineIndex(),
+        message_queue=FakeMessageQueue(),
+        ai_handler=FakeAIHandler(),
+        task_manager_integration=TaskManagerIntegration(),
+        profiles={}
+    )
+    return AutoMode(bot), bot
+
+
+def item(item_id, title):
+    return SimpleNamespace(id=item_id, title=title)
+
+
+@pytest.mark.asyncio
+async def test_each_deadline_is_reported_once_until_it_moves():
+    auto_mode, bot = make_auto_mode()
+    now = datetime.now()
+    bot.deadlines.update("task", "t1", now + timedelta(days=2), item("t1", "Mix single"), 7)
+    bot.deadlines.update("task", "t2", now + timedelta(days=6), item("t2", "Book studio"), 7)
+    bot.deadlines.update("project", "p1", now + timedelta(days=6), item("p1", "Album"), 7)
+    settings = {"notifications": "important"}
+    state = {}
+
+    digest = AutoDigest()
+    await auto_mode._check_deadlines(digest, settings, 7, state)
+    # Tasks are reported 3 days ahead, projects 7
+    lines = digest.sections[0].splitlines()[1:]
+    assert [line.split(",")[0] for line in lines] == ["• Project: Album", "• Task: Mix single"]
+    assert digest.findings == 2
+
+    digest = AutoDigest()
+    await auto_mode._check_deadlines(digest, settings, 7, state)
+    assert not digest
+
+    bot.deadlines.update("task", "t1", now + timedelta(days=1), item("t1", "Mix single"), 7)
+    digest = AutoDigest()
+    await auto_mode._check_deadlines(digest, settings, 7, state)
+    assert digest.findings == 1
+    assert set(state["deadline_alerts"]) == {"task:t1", "project:p1"}
+
+
+@pytest.mark.asyncio
+async def test_users_are_only_told_about_their_own_deadlines():
+    auto_mode, bot = make_auto_mode()
+    now = datetime.now()
+    bot.deadlines.update("task", "t1", now + timedelta(days=1), item("t1", "Mix single"), 7)
+    bot.deadlines.update("task", "t2", now + timedelta(days=1), item("t2", "Shoot video"), 8)
+    bot.deadlines.update("project", "p1", now + timedelta(days=2), item("p1", "Tour"), 8)
+    settings = {"notifications": "important"}
+
+    seven, eight = {}, {}
+    digest = AutoDigest()
+    await auto_mode._check_deadlines(digest, settings, 7, seven)
+    assert "Mix single" in digest.sections[0] and "Shoot video" not in digest.sections[0]
+    digest = AutoDigest()
+    await auto_mode._check_deadlines(digest, settings, 8, eight)
+    assert "Mix single" not in digest.sections[0] and digest.findings == 2
+    assert set(seven["deadline_alerts"]) == {"task:t1"}
+    assert set(eight["deadline_alerts"]) == {"task:t2", "project:p1"}
+
+    digest = AutoDigest()
+    await auto_mode._check_deadlines(digest, settings, 9, {})
+    assert not digest
+
+
+@pytest.mark.asyncio
+async def test_cycle_sends_one_digest_with_a_compact_keyboard():
+    auto_mode, bot = make_auto_mode()
+    bot.profiles["7"] = SimpleNamespace()
+    for n in range(4):
+        await bot.task_manager_integration.create_goal(Goal(
+            id=f"g{n}", title=f"Goal {n}", description="", target_date=None, priority="high",
+            status="completed" if n == 3 else "in_progress", user_id=7
+        ))
+    bot.deadlines.update("task", "t1", datetime.now() + timedelta(days=1), item("t1", "Mix single"), 7)
+    record = {"user_id": 7, "chat_id": 70, "data": {"settings": {"notifications": "important"}}}
+
+    await auto_mode.run_cycle(record)
+    assert len(bot.message_queue.sent) == 1
+    chat_id, text, kwargs = bot.message_queue.sent[0]
+    assert chat_id == 70
+    for expected in ["Goal 2: 40%", "Task: Mix single", "Weekly Performance Report", "Most listeners are in Berlin"]:
+        assert expected in text
+    assert "Goal 3" not in text
+    # Three unfinished goals, a deadline, the report and the insights
+    assert auto_mode.stats == {"digests": 1, "messages_saved": 5}
+    rows = kwargs["reply_markup"].inline_keyboard
+    assert [len(row) for row in rows] == [2, 2]
+
+    # Minimal notifications leave out goals and insights
+    record["data"]["settings"]["notifications"] = "minimal"
+    record["data"]["last_analytics_time"] = 0
+    await auto_mode.run_cycle(record)
+    _, text, kwargs = bot.message_queue.sent[1]
+    assert "🎯" not in text and "AI Insights" not in text
+    assert sum(len(row) for row in kwargs["reply_markup"].inline_keyboard) == 1
@@ -0,0 +1,169 @@
+import asyncio
+import time
+
+import pytest
+
+from artist_manager_agent.core.background_jobs import BackgroundJobQueue
+
+
+async def run_queue(jobs, until, timeout=2.0):
+    """Run the scheduler and workers until ``until`` is set."""
+    tasks = [asyncio.create_task(jobs.run_scheduler())]
+    tasks += [asyncio.create_task(jobs.run_worker()) for _ in range(jobs.workers)]
+    try:
+        await asyncio.wait_for(until.wait(), timeout)
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+
+@pytest.mark.asyncio
+async def test_due_jobs_run_by_priority_and_delayed_jobs_wait():
+    jobs = BackgroundJobQueue(workers=1)
+    order = []
+    done = asyncio.Event()
+
+    async def record(payload):
+        order.append(payload["name"])
+        if len(order) == 3:
+            done.set()
+
+    jobs.register("record", record)
+    jobs.submit("record", {"name": "delayed"}, delay=0.05)
+    jobs.submit("record", {"name": "low"}, priority=5)
+    jobs.submit("record", {"name": "high"}, priority=0)
+
+    await run_queue(jobs, done)
+    assert order == ["high", "low", "delayed"]
+    assert len(jobs) == 0
+
+
+@pytest.mark.asyncio
+async def test_failed_job_is_retried_with_backoff():
+    jobs = BackgroundJobQueue(workers=1)
+    attempts = []
+    done = asyncio.Event()
+
+    async def flaky(payload):
+        attempts.append(time.time())
+        if len(attempts) < 3:
+            raise RuntimeError("temporary failure")
+        done.set()
+
+    jobs.register("flaky", flaky, max_retries=3, retry_delay=0.02)
+    jobs.submit("flaky")
+
+    await run_queue(jobs, done)
+    assert len(attempts) == 3
+    assert attempts[2] - attempts[1] >= attempts[1] - attempts[0]
+    assert jobs.stats["retried"] == 2
+    assert len(jobs) == 0
+
+
+@pytest.mark.asyncio
+async def test_job_giving_up_after_max_retries_is_dropped():
+    jobs = BackgroundJobQueue(workers=1)
+    calls = []
+
+    async def broken(payload):
+        calls.append(True)
+        raise RuntimeError("permanent failure")
+
+    jobs.register("broken", broken, max_retries=1, retry_delay=0.01)
+    jobs.submit("broken")
+
+    with pytest.raises(asyncio.TimeoutError):
+        await run_queue(jobs, asyncio.Event(), timeout=0.1)
+
+    assert len(calls) == 2
+    assert jobs.stats["failed"] == 1
+    assert len(jobs) == 0
+
+
+@pytest.mark.asyncio
+async def test_pending_jobs_survive_a_restart_through_the_store():
+    store = {}
+    first = BackgroundJobQueue()
+    first.register("notify", lambda payload: asyncio.sleep(0))
+    first.attach(store)
+    first.submit("notify", {"user_id": 7}, delay=3600)
+    first.submit("notify", delay=60, interval=60, job_id="recurring")
+    assert len(store) == 2
+
+    # A new process attaches to the persisted records
+    handled = []
+    done = asyncio.Event()
+
+    async def notify(payload):
+        handled.append(payload)
+        done.set()
+
+    second = BackgroundJobQueue()
+    second.register("notify", notify)
+    assert second.attach(store) == 2
+    # Recurring jobs submitted again on start keep their schedule
+    assert second.submit("notify", delay=0, interval=60, job_id="recurring") == "recurring"
+    assert store["recurring"]["run_at"] > time.time() + 30
+
+    for job in store.values():
+        if job["id"] != "recurring":
+            job["run_at"] = time.time()
+    second.attach(store)
+    await run_queue(second, done)
+    assert handled == [{"user_id": 7}]
+    assert list(store) == ["recurring"]
+
+
+@pytest.mark.asyncio
+async def test_recurring_job_is_rescheduled():
+    jobs = BackgroundJobQueue(workers=1)
+    runs = []
+    done = asyncio.Event()
+
+    async def tick(payload):
+        runs.append(time.time())
+        if len(runs) == 3:
+            done.set()
+
+    jobs.register("tick", tick)
+    jobs.submit("tick", interval=0.02, job_id="tick")
+    await run_queue(jobs, done)
+    assert len(runs) == 3
+    assert len(jobs) == 1
+
+
+@pytest.mark.asyncio
+async def test_drain_finishes_running_jobs_and_hands_off_the_rest():
+    store = {}
+    jobs = BackgroundJobQueue(workers=1)
+    jobs.attach(store)
+    started = asyncio.Event()
+    release = asyncio.Event()
+    finished = []
+
+    async def slow(payload):
+        started.set()
+        await release.wait()
+        finished.append(payload["name"])
+
+    jobs.register("slow", slow)
+    jobs.submit("slow", {"name": "running"})
+    jobs.submit("slow", {"name": "waiting"}, priority=5)
+    jobs.submit("slow", {"name": "later"}, delay=3600)
+
+    tasks = [asyncio.create_task(jobs.run_scheduler()), asyncio.create_task(jobs.run_worker())]
+    try:
+        await asyncio.wait_for(started.wait(), 1)
+        drain = asyncio.create_task(jobs.drain(timeout=1))
+        await asyncio.sleep(0.01)
+        assert not drain.done()
+        release.set()
+        assert await drain == 2
+        await asyncio.sleep(0.01)
+        assert finished == ["running"]
+        assert sorted(job["payload"]["name"] for job in store.values()) == ["later", "waiting"]
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
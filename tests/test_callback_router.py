@@ -0,0 +1,84 @@
+from types import SimpleNamespace
+
+import pytest
+
+from artist_manager_agent.handlers.utils.callback_router import CallbackData, CallbackRouter
+
+
+def callback_update(data):
+    return SimpleNamespace(callback_query=SimpleNamespace(data=data))
+
+
+@pytest.fixture
+def router():
+    router = CallbackRouter()
+    calls = []
+
+    def record(name):
+        async def callback(update, context, *args):
+            calls.append((name, *args))
+            return name
+        return callback
+
+    router.add_route("task", "view", record("details"))
+    router.add_route("task", "view", record("specific"), with_id=True)
+    router.add_route("project", "view_all", record("all"))
+    router.add_route("goal", "add_task", record("add_task"), with_id=True)
+    router.set_fallback("task", record("menu"))
+    router.calls = calls
+    return router
+
+
+def test_parse_resolves_plain_and_id_routes(router):
+    assert router.parse("task_view") == CallbackData("task", "view")
+    assert router.parse("task_view_42") == CallbackData("task", "view", "42")
+    assert router.parse("goal_add_task_a1b2") == CallbackData("goal", "add_task", "a1b2")
+    # Registered multi-word actions are not mistaken for an id
+    assert router.parse("project_view_all") == CallbackData("project", "view_all")
+    assert router.parse("project_view_other") is None
+    assert router.parse("unknown_action") is None
+
+
+@pytest.mark.asyncio
+async def test_dispatch_passes_id_and_returns_result(router):
+    assert await router.dispatch(callback_update("task_view_42"), None) == "specific"
+    assert await router.dispatch(callback_update("task_view"), None) == "details"
+    assert router.calls == [("specific", "42"), ("details",)]
+
+
+@pytest.mark.asyncio
+async def test_dispatch_uses_fallback_or_raises(router):
+    assert await router.dispatch(callback_update("task_unknown"), None) == "menu"
+    with pytest.raises(LookupError):
+        await router.dispatch(callback_update("team_unknown"), None)
+
+
+@pytest.mark.asyncio
+async def test_stats_count_calls_and_errors_per_route():
+    router = CallbackRouter()
+
+    async def fail(update, context):
+        raise RuntimeError("boom")
+
+    async def succeed(update, context, item_id):
+        pass
+
+    router.add_route("music", "upload", fail)
+    router.add_route("music", "track", succeed, with_id=True)
+
+    with pytest.raises(RuntimeError):
+        await router.dispatch(callback_update("music_upload"), None)
+    await router.dispatch(callback_update("music_track_1"), None)
+    await router.dispatch(callback_update("music_track_2"), None)
+
+    stats = router.stats()
+    assert stats["music_upload"]["calls"] == 1
+    assert stats["music_upload"]["errors"] == 1
+    assert stats["music_track_<id>"]["calls"] == 2
+    assert stats["music_track_<id>"]["max_time"] >= stats["music_track_<id>"]["avg_time"]
+
+
+def test_build_round_trips_through_parse(router):
+    data = CallbackRouter.build("goal", "add_task", "a1b2")
+    assert data == "goal_add_task_a1b2"
+    assert router.parse(data) == CallbackData("goal", "add_task", "a1b2")
@@ -0,0 +1,86 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from artist_manager_agent.managers.deadline_index import DeadlineIndex
+from artist_manager_agent.managers.task_manager import Goal, Task, TaskManager
+
+NOW = datetime(2024, 6, 1, 12, 0)
+
+
+def test_range_query_returns_items_due_in_the_period_soonest_first():
+    index = DeadlineIndex()
+    for days, item_id in [(5, "later"), (1, "soon"), (10, "far"), (-2, "overdue")]:
+        index.update("task", item_id, NOW + timedelta(days=days), {"id": item_id})
+    index.update("project", "album", NOW + timedelta(days=3), {"id": "album"})
+
+    due = index.due_between(NOW, NOW + timedelta(days=7))
+    assert [(kind, item_id) for _, kind, item_id, _ in due] == [
+        ("task", "soon"), ("project", "album"), ("task", "later")
+    ]
+    assert [item_id for _, _, item_id, _ in index.due_between(NOW, NOW + timedelta(days=7), "task")] == ["soon", "later"]
+
+
+def test_moving_or_clearing_a_due_date_updates_the_index():
+    index = DeadlineIndex()
+    index.update("task", "a", NOW + timedelta(days=1))
+    index.update("task", "b", NOW + timedelta(days=1))
+    index.update("project", "p", NOW + timedelta(days=1))
+
+    index.update("task", "a", NOW + timedelta(days=20))
+    index.update("task", "b", None)
+    assert [item_id for _, _, item_id, _ in index.due_between(NOW, NOW + timedelta(days=7))] == ["p"]
+    assert len(index) == 2
+
+    index.clear("task")
+    assert len(index) == 1
+    assert not index.remove("task", "a")
+
+
+def test_items_can_be_queried_per_owner():
+    index = DeadlineIndex()
+    index.update("task", "a", NOW + timedelta(days=1), owner=1)
+    index.update("task", "b", NOW + timedelta(days=2), owner=2)
+    index.update("project", "p", NOW + timedelta(days=3))
+
+    assert [item_id for _, _, item_id, _ in index.due_between(NOW, NOW + timedelta(days=7), owner=1)] == ["a"]
+    assert [item_id for _, _, item_id, _ in index.due_between(NOW, NOW + timedelta(days=7))] == ["a", "b", "p"]
+
+    # Moving an item to another owner moves it between lanes
+    index.update("task", "a", NOW + timedelta(days=1), owner=2)
+    assert index.due_between(NOW, NOW + timedelta(days=7), owner=1) == []
+    assert [item_id for _, _, item_id, _ in index.due_between(NOW, NOW + timedelta(days=7), owner=2)] == ["a", "b"]
+
+    index.clear("task")
+    assert index.due_between(NOW, NOW + timedelta(days=7), owner=2) == []
+    assert len(index) == 1
+
+
+@pytest.mark.asyncio
+async def test_task_manager_keeps_the_index_up_to_date():
+    manager = TaskManager()
+    task = Task(id="t1", title="Mix single", description="", priority="high", status="pending", due_date=NOW + timedelta(days=2))
+    await manager.create_task(task)
+    assert len(manager.deadlines.due_between(NOW, NOW + timedelta(days=3))) == 1
+
+    await manager.update_task("t1", {"due_date": NOW + timedelta(days=30)})
+    assert manager.deadlines.due_between(NOW, NOW + timedelta(days=3)) == []
+
+    await manager.update_task("t1", {"due_date": NOW + timedelta(days=1), "status": "completed"})
+    assert len(manager.deadlines) == 0
+
+    manager.tasks = {"t2": Task(id="t2", title="Master", description="", priority="low", status="pending", due_date=NOW)}
+    manager.reindex()
+    assert [item_id for _, _, item_id, _ in manager.deadlines.due_between(NOW, NOW)] == ["t2"]
+
+
+@pytest.mark.asyncio
+async def test_tasks_belong_to_the_owner_of_their_goal():
+    manager = TaskManager()
+    await manager.create_goal(Goal(id="g1", title="Release EP", description="", target_date=None, priority="high", status="in_progress", user_id=7))
+    await manager.create_task(Task(id="t1", title="Mix single", description="", priority="high", status="pending", due_date=NOW, goal_id="g1"))
+    assert [item_id for _, _, item_id, _ in manager.deadlines.due_between(NOW, NOW, owner=7)] == ["t1"]
+
+    await manager.update_goal("g1", {"user_id": 8})
+    assert manager.deadlines.due_between(NOW, NOW, owner=7) == []
+    assert len(manager.deadlines.due_between(NOW, NOW, owner=8)) == 1
@@ -0,0 +1,128 @@
+from types import SimpleNamespace
+
+import pytest
+from telegram.ext import CallbackQueryHandler, CommandHandler
+
+from artist_manager_agent.handlers.utils.callback_router import CallbackRouter
+from artist_manager_agent.handlers.utils.feature_registry import FeatureRegistry, FeatureSpec
+
+created = []
+
+
+class FakeHandler:
+    """Matches updates whose text equals ``text``."""
+
+    def __init__(self, text):
+        self.text = text
+        self.handled = []
+
+    def check_update(self, update):
+        return update.text == self.text or None
+
+    async def handle_update(self, update, application, check, context):
+        self.handled.append(update)
+
+
+class FakeFeature:
+    def __init__(self, bot):
+        self.bot = bot
+        self.handlers = [FakeHandler("/other"), FakeHandler("/fake")]
+        created.append(self)
+
+    def get_handlers(self):
+        return self.handlers
+
+    def register_callbacks(self, router):
+        router.add_route("fake", "menu", self.show_menu)
+
+    async def show_menu(self, update, context):
+        return "menu"
+
+
+class FakeApplication:
+    def __init__(self):
+        self.handlers = {}
+
+    def add_handler(self, handler, group=0):
+        self.handlers.setdefault(group, []).append(handler)
+
+    def remove_handler(self, handler, group=0):
+        self.handlers[group].remove(handler)
+
+
+class FakePersistence:
+    def __init__(self, conversations):
+        self.conversations = conversations
+
+    async def get_conversations(self, name):
+        return self.conversations.get(name, {})
+
+
+def make_registry(lazy=True, spec_lazy=True):
+    created.clear()
+    bot = SimpleNamespace()
+    registry = FeatureRegistry(bot, CallbackRouter(), lazy=lazy)
+    registry.register(FeatureSpec(
+        "fake", __name__, "FakeFeature", 3,
+        commands=("fake",),
+        callback_pattern="^fake_",
+        conversations=("fake_conversation",),
+        lazy=spec_lazy
+    ))
+    return registry, FakeApplication()
+
+
+def test_lazy_feature_is_stubbed_until_first_use():
+    registry, application = make_registry()
+    registry.install(application)
+
+    assert created == []
+    assert not registry.is_loaded("fake")
+    stubs = application.handlers[3]
+    assert [type(stub) for stub in stubs] == [CommandHandler, CallbackQueryHandler]
+    assert stubs[0].commands == frozenset({"fake"})
+
+
+def test_loading_replaces_stubs_with_real_handlers_and_routes():
+    registry, application = make_registry()
+    registry.install(application)
+
+    feature = registry.load("fake")
+    assert registry.load("fake") is feature
+    assert len(created) == 1
+    assert registry.bot.fake is feature
+    assert application.handlers[3] == feature.handlers
+    assert registry.router.parse("fake_menu") is not None
+
+
+@pytest.mark.asyncio
+async def test_update_that_loads_a_feature_reaches_its_matching_handler():
+    registry, application = make_registry()
+    registry.install(application)
+
+    update = SimpleNamespace(text="/fake")
+    await registry._dispatch("fake", update, SimpleNamespace())
+    feature = registry.bot.fake
+    assert feature.handlers[0].handled == []
+    assert feature.handlers[1].handled == [update]
+
+
+@pytest.mark.asyncio
+async def test_features_with_persisted_conversations_load_before_initialize():
+    registry, application = make_registry()
+    registry.install(application)
+
+    await registry.load_pending_conversations(FakePersistence({}))
+    assert not registry.is_loaded("fake")
+
+    await registry.load_pending_conversations(FakePersistence({"fake_conversation": {(1, 1): 2}}))
+    assert registry.is_loaded("fake")
+    assert application.handlers[3] == registry.bot.fake.handlers
+
+
+@pytest.mark.parametrize("lazy, spec_lazy", [(False, True), (True, False)])
+def test_eager_features_load_on_install(lazy, spec_lazy):
+    registry, application = make_registry(lazy=lazy, spec_lazy=spec_lazy)
+    registry.install(application)
+    assert registry.is_loaded("fake")
+    assert application.handlers[3] == registry.bot.fake.handlers
@@ -0,0 +1,122 @@
+import asyncio
+
+import pytest
+
+from artist_manager_agent.managers.task_manager import Goal, Task, TaskManager
+from artist_manager_agent.services.goal_evaluator import GoalEvaluator
+
+
+class BatchingAIHandler:
+    def __init__(self):
+        self.batches = []
+
+    async def evaluate_goals(self, goals, profile):
+        self.batches.append([goal.id for goal in goals])
+        return {goal.id: {"progress": 10, "tasks": []} for goal in goals}
+
+
+class SlowBatchingAIHandler:
+    def __init__(self):
+        self.in_flight = 0
+        self.peak = 0
+
+    async def evaluate_goals(self, goals, profile):
+        self.in_flight += 1
+        self.peak = max(self.peak, self.in_flight)
+        await asyncio.sleep(0.01)
+        self.in_flight -= 1
+        return {goal.id: {"progress": 10, "tasks": []} for goal in goals}
+
+
+class SingleGoalAIHandler:
+    def __init__(self):
+        self.in_flight = 0
+        self.peak = 0
+        self.calls = 0
+
+    async def analyze_goal_progress(self, goal, profile):
+        self.calls += 1
+        self.in_flight += 1
+        self.peak = max(self.peak, self.in_flight)
+        await asyncio.sleep(0.01)
+        self.in_flight -= 1
+        if goal.id == "broken":
+            raise RuntimeError("model unavailable")
+        return 100 if goal.id == "done" else 50
+
+    async def suggest_tasks_for_goal(self, goal, profile):
+        self.calls += 1
+        return [f"Next step for {goal.title}"]
+
+
+def make_goal(goal_id):
+    return Goal(id=goal_id, title=goal_id, description="", target_date=None, priority="high", status="in_progress")
+
+
+@pytest.mark.asyncio
+async def test_all_goals_go_in_one_request_and_stay_cached_until_they_change():
+    manager = TaskManager()
+    for n in range(20):
+        await manager.create_goal(make_goal(f"g{n}"))
+    goals = list(manager.goals.values())
+    ai_handler = BatchingAIHandler()
+    evaluator = GoalEvaluator(ai_handler)
+
+    results = await evaluator.evaluate(goals, None, manager.goal_version)
+    assert len(results) == 20
+    assert len(ai_handler.batches) == 1
+
+    await evaluator.evaluate(goals, None, manager.goal_version)
+    assert len(ai_handler.batches) == 1
+    assert evaluator.stats["cached"] == 20
+
+    # A new task for one goal and an edit of another
+    await manager.create_task(Task(id="t1", title="Demo", description="", priority="high", status="pending", goal_id="g3"))
+    await manager.update_goal("g7", {"title": "Tour"})
+    await evaluator.evaluate(goals, None, manager.goal_version)
+    assert ai_handler.batches[-1] == ["g3", "g7"]
+
+
+@pytest.mark.asyncio
+async def test_without_batching_goals_are_evaluated_concurrently_within_the_limit():
+    ai_handler = SingleGoalAIHandler()
+    evaluator = GoalEvaluator(ai_handler, max_concurrency=3)
+    goals = [make_goal(f"g{n}") for n in range(8)] + [make_goal("done"), make_goal("broken")]
+
+    results = await evaluator.evaluate(goals, None, lambda goal_id: 0)
+    assert ai_handler.peak == 3
+    assert results["g0"] == {"progress": 50, "tasks": ["Next step for g0"]}
+    assert results["done"] == {"progress": 100, "tasks": []}
+    assert "broken" not in results
+    # No suggestions for the finished goal
+    assert ai_handler.calls == 18
+
+    # Only the failed goal is tried again
+    await evaluator.evaluate(goals, None, lambda goal_id: 0)
+    assert ai_handler.calls == 19
+
+
+@pytest.mark.asyncio
+async def test_batches_of_different_users_share_the_concurrency_limit():
+    ai_handler = SlowBatchingAIHandler()
+    evaluator = GoalEvaluator(ai_handler, max_concurrency=2)
+    await asyncio.gather(*(
+        evaluator.evaluate([make_goal(f"u{user}-g{n}") for n in range(3)], None, lambda goal_id: 0)
+        for user in range(6)
+    ))
+    assert ai_handler.peak == 2
+
+
+@pytest.mark.asyncio
+async def test_cache_keeps_only_the_most_recently_used_goals():
+    ai_handler = BatchingAIHandler()
+    evaluator = GoalEvaluator(ai_handler, max_cached=3)
+    goals = [make_goal(f"g{n}") for n in range(5)]
+
+    await evaluator.evaluate(goals[:3], None, lambda goal_id: 0)
+    await evaluator.evaluate(goals[:1], None, lambda goal_id: 0)
+    await evaluator.evaluate(goals[3:], None, lambda goal_id: 0)
+    assert sorted(evaluator._cache) == ["g0", "g3", "g4"]
+
+    await evaluator.evaluate(goals[:2], None, lambda goal_id: 0)
+    assert ai_handler.batches[-1] == ["g1"]
@@ -0,0 +1,171 @@
+import asyncio
+import json
+from datetime import datetime
+
+import pytest
+from telegram import Chat, Message
+from telegram.error import RetryAfter
+from telegram.ext import ExtBot
+from telegram.request import BaseRequest
+
+from artist_manager_agent.core.message_queue import INTERACTIVE, NOTIFICATION, MessageQueue
+
+
+class FakeBot:
+    """Passes Bot API calls through the queue like ExtBot does and records them.
+
+    Calls wait for ``gate`` while it is cleared.
+    """
+
+    def __init__(self):
+        self.rate_limiter = None
+        self.calls = []
+        self.gate = asyncio.Event()
+        self.gate.set()
+        self.failures = []
+
+    async def _post(self, method, kwargs):
+        await self.gate.wait()
+        if self.failures:
+            raise self.failures.pop(0)
+        self.calls.append((method, kwargs, asyncio.get_running_loop().time()))
+        return len(self.calls)
+
+    async def _call(self, endpoint, method, kwargs, rate_limit_args):
+        return await self.rate_limiter.process_request(
+            callback=self._post, args=(method, kwargs), kwargs={},
+            endpoint=endpoint, data=kwargs, rate_limit_args=rate_limit_args
+        )
+
+    async def send_message(self, chat_id, text, rate_limit_args=None, **kwargs):
+        kwargs.update(chat_id=chat_id, text=text)
+        return await self._call("sendMessage", "send_message", kwargs, rate_limit_args)
+
+    async def edit_message_text(self, text, rate_limit_args=None, **kwargs):
+        kwargs.update(text=text)
+        return await self._call("editMessageText", "edit_message_text", kwargs, rate_limit_args)
+
+
+class RecordingRequest(BaseRequest):
+    """Answers every Bot API request with a message and records the method."""
+
+    def __init__(self):
+        self.methods = []
+
+    @property
+    def read_timeout(self):
+        return None
+
+    async def initialize(self):
+        pass
+
+    async def shutdown(self):
+        pass
+
+    async def do_request(self, url, method, request_data=None, **kwargs):
+        self.methods.append(url.rsplit("/", 1)[-1])
+        result = {"message_id": 1, "date": 0, "chat": {"id": 1, "type": "private"}, "text": "ok"}
+        return 200, json.dumps({"ok": True, "result": result}).encode()
+
+
+async def started(bot, **options):
+    queue = MessageQueue(bot, **options)
+    bot.rate_limiter = queue
+    await queue.start()
+    return queue
+
+
+@pytest.mark.asyncio
+async def test_messages_to_one_chat_respect_chat_rate_and_order():
+    bot = FakeBot()
+    queue = await started(bot, chat_rate=20, chat_burst=1)
+    try:
+        await asyncio.gather(*(queue.send(1, f"message {i}") for i in range(3)))
+        texts = [kwargs["text"] for _, kwargs, _ in bot.calls]
+        times = [sent_at for _, _, sent_at in bot.calls]
+        assert texts == ["message 0", "message 1", "message 2"]
+        assert times[2] - times[0] >= 0.09
+    finally:
+        await queue.stop()
+
+
+@pytest.mark.asyncio
+async def test_interactive_messages_go_before_notifications():
+    bot = FakeBot()
+    queue = await started(bot, max_in_flight=1)
+    try:
+        bot.gate.clear()
+        first = asyncio.create_task(queue.send(1, "blocking", priority=NOTIFICATION))
+        await asyncio.sleep(0.01)
+        notification = asyncio.create_task(queue.send(2, "notification", priority=NOTIFICATION))
+        reply = asyncio.create_task(queue.send(3, "reply", priority=INTERACTIVE))
+        await asyncio.sleep(0.01)
+        bot.gate.set()
+        await asyncio.gather(first, notification, reply)
+        assert [kwargs["text"] for _, kwargs, _ in bot.calls] == ["blocking", "reply", "notification"]
+    finally:
+        await queue.stop()
+
+
+@pytest.mark.asyncio
+async def test_waiting_edits_of_a_message_are_coalesced():
+    bot = FakeBot()
+    queue = await started(bot, max_in_flight=1)
+    try:
+        bot.gate.clear()
+        first = asyncio.create_task(queue.send(2, "blocking"))
+        await asyncio.sleep(0.01)
+        edits = [asyncio.create_task(queue.edit(1, 5, text)) for text in ("a", "b", "c")]
+        await asyncio.sleep(0.01)
+        bot.gate.set()
+        await first
+        results = await asyncio.gather(*edits)
+
+        sent_edits = [kwargs for method, kwargs, _ in bot.calls if method == "edit_message_text"]
+        assert [kwargs["text"] for kwargs in sent_edits] == ["c"]
+        assert len(set(results)) == 1
+        assert queue.stats["coalesced"] == 2
+    finally:
+        await queue.stop()
+
+
+@pytest.mark.asyncio
+async def test_flood_limit_pauses_chat_and_retries():
+    bot = FakeBot()
+    bot.failures.append(RetryAfter(0.05))
+    queue = await started(bot)
+    try:
+        start = asyncio.get_running_loop().time()
+        assert await queue.send(1, "hello") == 1
+        assert bot.calls[0][2] - start >= 0.05
+        assert queue.stats["retried"] == 1
+    finally:
+        await queue.stop()
+
+
+@pytest.mark.asyncio
+async def test_calls_go_straight_to_the_api_when_not_running():
+    bot = FakeBot()
+    queue = MessageQueue(bot)
+    bot.rate_limiter = queue
+    assert await queue.send(1, "direct") == 1
+    assert bot.calls[0][1] == {"chat_id": 1, "text": "direct"}
+
+
+@pytest.mark.asyncio
+async def test_replies_sent_through_the_bot_are_queued():
+    """Messages sent with PTB's shortcuts pass the queue; other calls do not."""
+    queue = MessageQueue(chat_rate=20, chat_burst=1)
+    request = RecordingRequest()
+    bot = ExtBot("123:abc", request=request, get_updates_request=request, rate_limiter=queue)
+    queue.bot = bot
+    message = Message(1, datetime.now(), Chat(1, "private"))
+    message.set_bot(bot)
+    await queue.start()
+    try:
+        await asyncio.gather(message.reply_text("one"), message.reply_text("two"))
+        await bot.answer_callback_query("query")
+        assert queue.stats["sent"] == 2
+        assert request.methods == ["sendMessage", "sendMessage", "answerCallbackQuery"]
+    finally:
+        await queue.stop()
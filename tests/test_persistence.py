@@ -0,0 +1,533 @@
+import pickle
+from collections import OrderedDict, defaultdict
+from datetime import datetime
+
+import pytest
+from pydantic import BaseModel
+
+from artist_manager_agent.persistence import RobustPersistence, SQLitePersistence
+from artist_manager_agent.persistence.store import RecordStore, DELETE
+from artist_manager_agent.persistence.backup import BackupStore
+from artist_manager_agent.persistence import serialization
+from artist_manager_agent.models import ArtistProfile, PaymentMethod, PaymentRequest
+
+
+@pytest.fixture
+def persistence_path(tmp_path):
+    """Path for a fresh persistence file."""
+    return tmp_path / "persistence.pickle"
+
+
+@pytest.mark.asyncio
+async def test_wal_replays_changes_without_snapshot(persistence_path):
+    """Changes logged to the WAL survive a crash before any flush."""
+    persistence = RobustPersistence(str(persistence_path), wal_mode=True, flush_threshold=1)
+    await persistence.update_user_data(1, {"name": "Artist"})
+    await persistence.update_chat_data(10, {"lang": "en"})
+    await persistence.update_bot_data({"profiles": {1: "p"}})
+    await persistence.update_conversation("onboarding", (10, 1), "AWAITING_NAME")
+    await persistence.drop_chat_data(10)
+
+    # No snapshot or backup is written per update in WAL mode
+    assert not persistence_path.exists()
+    assert not persistence._backups.list()
+
+    recovered = RobustPersistence(str(persistence_path), wal_mode=True)
+    await recovered.load()
+    assert await recovered.get_user_data() == {1: {"name": "Artist"}}
+    assert await recovered.get_chat_data() == {}
+    assert await recovered.get_bot_data() == {"profiles": {1: "p"}}
+    assert await recovered.get_conversations("onboarding") == {(10, 1): "AWAITING_NAME"}
+
+
+@pytest.mark.asyncio
+async def test_wal_compacts_into_snapshot(persistence_path):
+    """Reaching the compaction interval writes a snapshot and empties the log."""
+    persistence = RobustPersistence(
+        str(persistence_path), wal_mode=True, compact_interval=3, flush_threshold=1
+    )
+    for user_id in range(3):
+        await persistence.update_user_data(user_id, {"step": user_id})
+
+    assert persistence_path.exists()
+    assert persistence._wal.size() == 0
+
+    await persistence.update_user_data(0, {"step": "done"})
+
+    recovered = RobustPersistence(str(persistence_path), wal_mode=True)
+    await recovered.load()
+    assert await recovered.get_user_data() == {0: {"step": "done"}, 1: {"step": 1}, 2: {"step": 2}}
+
+
+@pytest.mark.asyncio
+async def test_wal_ignores_torn_tail(persistence_path):
+    """A partially written last record is skipped on recovery."""
+    persistence = RobustPersistence(str(persistence_path), wal_mode=True, flush_threshold=1)
+    await persistence.update_user_data(1, {"name": "Artist"})
+    await persistence.update_user_data(2, {"name": "Other"})
+    persistence._wal.close()
+
+    wal_path = persistence._wal.path
+    wal_path.write_bytes(wal_path.read_bytes()[:-5])
+
+    recovered = RobustPersistence(str(persistence_path), wal_mode=True)
+    await recovered.load()
+    assert await recovered.get_user_data() == {1: {"name": "Artist"}}
+
+
+@pytest.mark.asyncio
+async def test_wal_keeps_writes_made_after_recovering_from_a_torn_tail(persistence_path):
+    """The torn record is cut off, so later records are replayed too."""
+    persistence = RobustPersistence(str(persistence_path), wal_mode=True, flush_threshold=1)
+    await persistence.update_user_data(1, {"n": 1})
+    await persistence.update_user_data(2, {"n": 2})
+    persistence._wal.close()
+    wal_path = persistence._wal.path
+    wal_path.write_bytes(wal_path.read_bytes()[:-5])
+
+    recovered = RobustPersistence(str(persistence_path), wal_mode=True, flush_threshold=1)
+    await recovered.load()
+    await recovered.update_user_data(3, {"n": 3})
+    recovered._wal.close()
+
+    restarted = RobustPersistence(str(persistence_path), wal_mode=True)
+    await restarted.load()
+    assert await restarted.get_user_data() == {1: {"n": 1}, 3: {"n": 3}}
+
+
+@pytest.mark.asyncio
+async def test_sqlite_round_trip(tmp_path):
+    """SQLite persistence stores and reloads each kind of data."""
+    database = tmp_path / "persistence.db"
+    persistence = SQLitePersistence(str(database))
+    await persistence.load()
+    await persistence.update_user_data(1, {"name": "Artist"})
+    await persistence.update_user_data(2, {"name": "Other"})
+    await persistence.update_chat_data(10, {"lang": "en"})
+    await persistence.update_bot_data({"profiles": {}})
+    await persistence.update_callback_data({"cb": 1})
+    await persistence.update_conversation("onboarding", (10, 1), "AWAITING_NAME")
+    await persistence.update_conversation("onboarding", (10, 2), "AWAITING_GENRE")
+    await persistence.update_conversation("onboarding", (10, 2), None)
+    await persistence.drop_user_data(2)
+    await persistence.close()
+
+    reopened = SQLitePersistence(str(database))
+    await reopened.load()
+    assert await reopened.get_user_data() == {1: {"name": "Artist"}}
+    assert await reopened.get_chat_data() == {10: {"lang": "en"}}
+    assert await reopened.get_bot_data() == {"profiles": {}}
+    assert await reopened.get_callback_data() == {"cb": 1}
+    assert await reopened.get_conversations("onboarding") == {(10, 1): "AWAITING_NAME"}
+    await reopened.close()
+
+
+@pytest.mark.asyncio
+async def test_write_behind_coalesces_bursts(persistence_path):
+    """A burst of updates to the same key results in a single write."""
+    persistence = RobustPersistence(str(persistence_path), wal_mode=True, update_interval=3600)
+    for step in range(20):
+        await persistence.update_user_data(1, {"step": step})
+        await persistence.update_conversation("onboarding", (1, 1), f"STEP_{step}")
+
+    stats = persistence.get_stats()
+    assert stats["updates"] == 40
+    assert stats["coalesced"] == 38
+    assert stats["written"] == 0
+    assert stats["pending"] == 2
+    assert persistence._wal.size() == 0
+
+    await persistence.close()
+    assert persistence.get_stats()["written"] == 2
+
+    recovered = RobustPersistence(str(persistence_path))
+    await recovered.load()
+    assert await recovered.get_user_data() == {1: {"step": 19}}
+    assert await recovered.get_conversations("onboarding") == {(1, 1): "STEP_19"}
+
+
+@pytest.mark.asyncio
+async def test_write_behind_flushes_at_threshold(persistence_path):
+    """Reaching the dirty-set threshold writes immediately."""
+    persistence = RobustPersistence(
+        str(persistence_path), wal_mode=True, update_interval=3600, flush_threshold=5
+    )
+    for user_id in range(5):
+        await persistence.update_user_data(user_id, {"id": user_id})
+
+    assert persistence.get_stats()["written"] == 5
+    assert persistence._wal.entries == 5
+
+    recovered = RobustPersistence(str(persistence_path), wal_mode=True)
+    await recovered.load()
+    assert len(await recovered.get_user_data()) == 5
+
+
+@pytest.mark.asyncio
+async def test_wal_replay_skips_records_covered_by_snapshot(persistence_path):
+    """A crash between snapshot and log truncation does not roll data back."""
+    persistence = RobustPersistence(str(persistence_path), wal_mode=True, update_interval=3600)
+    await persistence.update_user_data(1, {"version": 1})
+    await persistence._scheduler.flush()
+    await persistence.update_user_data(1, {"version": 2})
+
+    # Simulate the log surviving a snapshot that already contains version 2
+    wal_path = persistence._wal.path
+    stale_log = wal_path.read_bytes()
+    await persistence.flush()
+    wal_path.write_bytes(stale_log)
+
+    recovered = RobustPersistence(str(persistence_path), wal_mode=True)
+    await recovered.load()
+    assert await recovered.get_user_data() == {1: {"version": 2}}
+
+
+@pytest.mark.asyncio
+async def test_lazy_load_reads_users_on_refresh(persistence_path):
+    """In lazy mode startup reads only the index; users load on first refresh."""
+    persistence = RobustPersistence(str(persistence_path), lazy_load=True)
+    await persistence.load()
+    for user_id in range(10):
+        await persistence.update_user_data(user_id, {"id": user_id})
+    await persistence.update_conversation("onboarding", (1, 1), "AWAITING_NAME")
+    await persistence.drop_user_data(3)
+    await persistence.close()
+
+    reopened = RobustPersistence(str(persistence_path), lazy_load=True)
+    await reopened.load()
+    assert await reopened.get_user_data() == {}
+    assert len(reopened._shards.keys("user_data")) == 9
+    assert await reopened.get_conversations("onboarding") == {(1, 1): "AWAITING_NAME"}
+
+    user_data = {}
+    assert await reopened.refresh_user_data(5, user_data) == {"id": 5}
+    assert await reopened.refresh_user_data(3, {}) == {}
+
+    # Data already handed to the application is not loaded over again
+    user_data["id"] = "changed"
+    assert await reopened.refresh_user_data(5, user_data) == {"id": "changed"}
+
+
+@pytest.mark.asyncio
+async def test_failed_record_write_is_retried_by_the_next_flush(persistence_path):
+    """A flush whose record write fails keeps the changes pending."""
+    persistence = RobustPersistence(str(persistence_path), lazy_load=True, update_interval=3600)
+    await persistence.load()
+    await persistence.update_user_data(1, {"id": 1})
+
+    write = persistence._shards.write
+    async def fail(changes):
+        raise OSError("disk full")
+    persistence._shards.write = fail
+    with pytest.raises(OSError):
+        await persistence.flush()
+    assert persistence.get_stats()["pending"] == 1
+    assert persistence.get_stats()["written"] == 0
+
+    persistence._shards.write = write
+    await persistence.close()
+    assert persistence.get_stats()["written"] == 1
+
+    reopened = RobustPersistence(str(persistence_path), lazy_load=True)
+    await reopened.load()
+    assert await reopened.refresh_user_data(1, {}) == {"id": 1}
+    await reopened.close()
+
+
+@pytest.mark.asyncio
+async def test_lazy_load_migrates_snapshot(persistence_path):
+    """User data from an eager snapshot moves into the record store."""
+    eager = RobustPersistence(str(persistence_path))
+    await eager.update_user_data(1, {"name": "Artist"})
+    await eager.close()
+
+    lazy = RobustPersistence(str(persistence_path), lazy_load=True)
+    await lazy.load()
+    assert await lazy.get_user_data() == {}
+    assert await lazy.refresh_user_data(1, {}) == {"name": "Artist"}
+    await lazy.close()
+
+    assert serialization.loads(persistence_path.read_bytes())["user_data"] == {}
+
+
+@pytest.mark.asyncio
+async def test_record_store_ignores_unindexed_tail(tmp_path):
+    """Records appended after the last committed write are dropped on open."""
+    store = RecordStore(tmp_path, "user_data", compact_ratio=10)
+    store.open()
+    store.write({1: {"v": 1}, 2: {"v": 2}})
+    journal = store.journal_path.read_bytes()
+    store.write({1: {"v": "new"}})
+    store.close()
+
+    # Crash after the data append, in the middle of the journal append
+    store.journal_path.write_bytes(store.journal_path.read_bytes()[:len(journal) + 3])
+
+    reopened = RecordStore(tmp_path, "user_data")
+    reopened.open()
+    assert reopened.get(1) == {"v": 1}
+    assert dict(reopened.items()) == {1: {"v": 1}, 2: {"v": 2}}
+
+    reopened.write({2: DELETE})
+    reopened.compact()
+    assert dict(reopened.items()) == {1: {"v": 1}}
+
+
+def test_record_store_appends_index_changes_until_compaction(tmp_path):
+    """Writes journal their index changes; compaction folds them into the index."""
+    store = RecordStore(tmp_path, "user_data", compact_ratio=10)
+    store.open()
+    for key in range(50):
+        store.write({key: {"v": key}})
+    assert not store.index_path.exists()
+    journal_size = store.journal_path.stat().st_size
+    store.write({3: {"v": "new"}, 7: DELETE})
+    # One small entry, not a copy of the whole index
+    assert store.journal_path.stat().st_size - journal_size < 100
+    store.close()
+
+    reopened = RecordStore(tmp_path, "user_data")
+    reopened.open()
+    assert len(reopened) == 49
+    assert reopened.get(3) == {"v": "new"} and reopened.get(7) is None
+
+    reopened.compact()
+    assert reopened.journal_path.stat().st_size == 0
+    reopened.write({8: DELETE})
+    reopened.close()
+
+    compacted = RecordStore(tmp_path, "user_data")
+    compacted.open()
+    assert len(compacted) == 48
+    assert compacted.get(3) == {"v": "new"} and compacted.get(49) == {"v": 49}
+
+
+@pytest.mark.asyncio
+async def test_lru_eviction_reloads_transparently(persistence_path):
+    """Users beyond the working set limit are evicted and reloaded on demand."""
+    persistence = RobustPersistence(
+        str(persistence_path), lazy_load=True, max_cached=2, flush_threshold=1
+    )
+    persistence._working_set.grace = 0
+    evicted = []
+    persistence.set_eviction_callback(lambda kind, key: evicted.append((kind, key)) or True)
+    await persistence.load()
+
+    for user_id in (1, 2, 3):
+        await persistence.update_user_data(user_id, {"id": user_id})
+    await persistence.refresh_user_data(3, {"id": 3})
+    assert evicted == [("user_data", 1)]
+    assert persistence._user_data == {}
+
+    assert await persistence.refresh_user_data(1, {}) == {"id": 1}
+    assert evicted == [("user_data", 1), ("user_data", 2)]
+
+    stats = persistence.get_stats()
+    assert (stats["hits"], stats["misses"], stats["evictions"]) == (1, 1, 2)
+    assert stats["cached"] == 2
+
+
+@pytest.mark.asyncio
+async def test_refreshed_records_are_not_evicted_before_their_update(persistence_path):
+    """A record handed out for an update stays until the application passes it back."""
+    persistence = RobustPersistence(
+        str(persistence_path), lazy_load=True, max_cached=1, flush_threshold=1
+    )
+    persistence._working_set.grace = 0
+    evicted = []
+    persistence.set_eviction_callback(lambda kind, key: evicted.append((kind, key)) or True)
+    await persistence.load()
+
+    await persistence.refresh_user_data(1, {})
+    await persistence.refresh_user_data(2, {})
+    assert evicted == []
+
+    await persistence.update_user_data(1, {"id": 1})
+    await persistence.update_user_data(2, {"id": 2})
+    await persistence.refresh_user_data(3, {})
+    # User 3 is over the limit too, but still out with the application
+    assert evicted == [("user_data", 1), ("user_data", 2)]
+
+
+@pytest.mark.asyncio
+async def test_ttl_eviction_keeps_unwritten_changes(persistence_path):
+    """Idle records are evicted by TTL, but never before they are on disk."""
+    persistence = RobustPersistence(
+        str(persistence_path), lazy_load=True, cache_ttl=60, update_interval=3600
+    )
+    now = [0.0]
+    persistence._working_set._clock = lambda: now[0]
+    persistence.set_eviction_callback(lambda kind, key: True)
+    await persistence.load()
+
+    await persistence.update_user_data(1, {"id": 1})
+    now[0] = 120
+    assert persistence.evict_idle() == 0
+
+    await persistence._scheduler.flush()
+    assert persistence.evict_idle() == 1
+    assert await persistence.refresh_user_data(1, {}) == {"id": 1}
+
+
+def test_serialization_round_trips_models():
+    """Models, datetimes and tuple keys survive the compact format."""
+    profile = ArtistProfile(name="Artist", genre="Pop", career_stage="emerging", goals=["Tour"])
+    payment = PaymentRequest(
+        collaborator_id="c1", amount=250.0, currency="USD", description="Mixing",
+        due_date=datetime(2024, 5, 1, 12, 30), payment_method=PaymentMethod.CRYPTO
+    )
+    data = {1: {"profile": profile, "payments": [payment]}, (10, 1): {"tags": {"a"}}}
+
+    encoded = serialization.dumps(data)
+    assert encoded.startswith(serialization.MAGIC)
+    assert len(encoded) < len(pickle.dumps(data))
+
+    decoded = serialization.loads(encoded)
+    assert decoded == data
+    assert decoded[1]["payments"][0].payment_method is PaymentMethod.CRYPTO
+    assert decoded[1]["payments"][0].due_date == datetime(2024, 5, 1, 12, 30)
+
+    # Files written before the format change are still readable
+    assert serialization.loads(pickle.dumps(data)) == data
+
+
+def test_serialization_keeps_enum_and_dict_subclass_types():
+    """Enums and dict subclasses come back as their own types."""
+    counts = defaultdict(int, {"plays": 3})
+    ordered = OrderedDict([("b", 1), ("a", 2)])
+    data = {"method": PaymentMethod.CRYPTO, "counts": counts, "ordered": ordered}
+
+    decoded = serialization.loads(serialization.dumps(data))
+    assert decoded["method"] is PaymentMethod.CRYPTO
+    assert type(decoded["counts"]) is defaultdict
+    decoded["counts"]["skips"] += 1
+    assert decoded["counts"] == {"plays": 3, "skips": 1}
+    assert type(decoded["ordered"]) is OrderedDict
+    assert list(decoded["ordered"]) == ["b", "a"]
+
+
+def test_serialization_upgrades_old_model_versions(monkeypatch):
+    """Data written by an older model version is passed through its upgrade hook."""
+    monkeypatch.setattr(serialization, "_schemas_by_name", {})
+    monkeypatch.setattr(serialization, "_schemas_by_class", {})
+
+    class Release(BaseModel):
+        title: str
+
+    serialization.register_model(Release, "Release")
+    encoded = serialization.dumps(Release(title="Debut"))
+
+    # A later version of the code moves the class and renames the field
+    monkeypatch.setattr(serialization, "_schemas_by_name", {})
+
+    class RenamedRelease(BaseModel):
+        name: str
+
+    serialization.register_model(
+        RenamedRelease, "Release", version=2,
+        upgrade=lambda values, version: {"name": values["title"]}
+    )
+    assert serialization.loads(encoded) == RenamedRelease(name="Debut")
+
+
+def test_backups_share_unchanged_chunks(tmp_path):
+    """Consecutive backups within one second are kept apart and deduplicated."""
+    backups = BackupStore(tmp_path / "backups", keep=2)
+    users = {user_id: {"id": user_id} for user_id in range(10)}
+    first = backups.create({"user_data": dict(users), "bot_data": {}})
+    users[3] = {"id": "changed"}
+    second = backups.create({"user_data": dict(users), "bot_data": {}})
+
+    assert first != second
+    assert backups.stats["chunks_written"] == 12
+    assert backups.restore(first)["user_data"][3] == {"id": 3}
+    assert backups.restore()["user_data"][3] == {"id": "changed"}
+
+    # Pruning the oldest backup removes the chunk only it used
+    users[4] = {"id": "changed again"}
+    backups.create({"user_data": dict(users), "bot_data": {}})
+    assert backups.list()[-1] == second
+    chunks = {path.name for path in backups.chunk_dir.glob("*/*")}
+    assert len(chunks) == 12
+
+
+@pytest.mark.asyncio
+async def test_load_falls_back_to_incremental_backup(persistence_path):
+    """A corrupt main file is recovered from the newest backup."""
+    persistence = RobustPersistence(str(persistence_path))
+    await persistence.update_user_data(1, {"name": "Artist"})
+    await persistence.flush()
+    await persistence.update_user_data(2, {"name": "Other"})
+    await persistence.close()
+
+    persistence_path.write_bytes(b"corrupt")
+    recovered = RobustPersistence(str(persistence_path))
+    await recovered.load()
+    assert await recovered.get_user_data() == {1: {"name": "Artist"}, 2: {"name": "Other"}}
+
+
+@pytest.mark.asyncio
+async def test_sharded_records_reload_and_reshard(persistence_path):
+    """Records are spread over shards and follow a change of the shard count."""
+    persistence = RobustPersistence(str(persistence_path), shards=4, flush_threshold=5)
+    await persistence.load()
+    for user_id in range(20):
+        await persistence.update_user_data(user_id, {"id": user_id})
+    await persistence.close()
+
+    record_dir = persistence_path.parent / "persistence.records"
+    assert len(list(record_dir.glob("4_shards/*/user_data.journal"))) == 4
+
+    reopened = RobustPersistence(str(persistence_path), shards=4)
+    await reopened.load()
+    assert await reopened.get_user_data() == {user_id: {"id": user_id} for user_id in range(20)}
+    await reopened.close()
+
+    resharded = RobustPersistence(str(persistence_path), shards=2)
+    await resharded.load()
+    assert len(await resharded.get_user_data()) == 20
+    assert not (record_dir / "4_shards").exists()
+    await resharded.close()
+
+
+@pytest.mark.asyncio
+async def test_corrupt_shard_does_not_fail_load(persistence_path):
+    """An unreadable shard is reset while the other shards load normally."""
+    persistence = RobustPersistence(str(persistence_path), shards=4)
+    await persistence.load()
+    for user_id in range(20):
+        await persistence.update_user_data(user_id, {"id": user_id})
+    await persistence.close()
+
+    shard = persistence._shards.shards[0]
+    lost = set(shard.stores["user_data"].keys())
+    shard.stores["user_data"].index_path.write_bytes(b"corrupt")
+
+    recovered = RobustPersistence(str(persistence_path), shards=4)
+    await recovered.load()
+    assert set(await recovered.get_user_data()) == set(range(20)) - lost
+    assert list(shard.directory.glob("user_data.index.corrupt-*"))
+
+    # The reset shard accepts new writes
+    await recovered.update_user_data(next(iter(lost)), {"id": "new"})
+    await recovered.close()
+
+
+@pytest.mark.asyncio
+async def test_getters_return_views_and_bot_data_is_copied_on_write(persistence_path):
+    """Getters do not copy; bot_data handed out is copied before it is written."""
+    persistence = RobustPersistence(str(persistence_path), flush_threshold=100)
+    await persistence.update_user_data(1, {"name": "Artist"})
+    await persistence.update_bot_data({"profiles": {}})
+
+    user_data = await persistence.get_user_data()
+    with pytest.raises(TypeError):
+        user_data[2] = {}
+
+    bot_data = await persistence.get_bot_data()
+    snapshot = persistence._snapshot_data()
+    bot_data["profiles"][1] = "p"
+    assert snapshot["bot_data"] == {"profiles": {}}
+
+    await persistence.update_bot_data({"profiles": {1: "p"}})
+    await persistence.close()
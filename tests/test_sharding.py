@@ -0,0 +1,102 @@
+import asyncio
+import json
+import queue
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+
+import pytest
+from telegram import Update
+
+from artist_manager_agent.core.sharding import STOP, ShardedFrontend, ShardReceiver, check_shard_layout, shard_for
+
+
+def update_json(update_id, user_id, text="hi"):
+    return json.dumps({
+        "update_id": update_id,
+        "message": {
+            "message_id": update_id,
+            "date": 0,
+            "chat": {"id": user_id, "type": "private"},
+            "from": {"id": user_id, "is_bot": False, "first_name": "Artist"},
+            "text": text
+        }
+    })
+
+
+def make_update(user_id=None, chat_id=None):
+    update = MagicMock(spec=Update)
+    update.effective_user = SimpleNamespace(id=user_id) if user_id is not None else None
+    update.effective_chat = SimpleNamespace(id=chat_id) if chat_id is not None else None
+    return update
+
+
+def test_users_always_map_to_the_same_shard():
+    assert shard_for(make_update(user_id=7, chat_id=-100), 4) == 3
+    assert shard_for(make_update(user_id=7, chat_id=7), 4) == 3
+    # Updates without a user follow their chat, others go to the first shard
+    assert shard_for(make_update(chat_id=-101), 4) == (-101) % 4
+    assert shard_for(make_update(), 4) == 0
+    assert {shard_for(make_update(user_id=user_id), 3) for user_id in range(30)} == {0, 1, 2}
+
+
+@pytest.mark.asyncio
+async def test_receiver_feeds_updates_in_order_until_stopped():
+    source = queue.Queue()
+    application = SimpleNamespace(bot=None, update_queue=asyncio.Queue(maxsize=1))
+    receiver = ShardReceiver(application, source, shard=1)
+    for update_id in range(3):
+        source.put(update_json(update_id, 7))
+    source.put(STOP)
+
+    receiver.start()
+    received = []
+    for _ in range(3):
+        update = await asyncio.wait_for(application.update_queue.get(), 1)
+        received.append(update.update_id)
+    await asyncio.wait_for(receiver.finished.wait(), 1)
+
+    assert received == [0, 1, 2]
+    assert receiver.received == 3
+
+
+@pytest.mark.asyncio
+async def test_front_routes_updates_to_the_owning_shard():
+    front = ShardedFrontend("123:TEST", "/tmp/unused", shards=2)
+    front._queues = [queue.Queue(), queue.Queue()]
+    router = asyncio.create_task(front._route_updates())
+    try:
+        for update_id, user_id in enumerate([1, 2, 3, 1]):
+            update = Update.de_json(json.loads(update_json(update_id, user_id)), None)
+            await front.application.update_queue.put(update)
+        await asyncio.wait_for(front.application.update_queue.join(), 1)
+    finally:
+        router.cancel()
+
+    routed = [
+        [json.loads(shard_queue.get_nowait())["message"]["from"]["id"] for _ in range(shard_queue.qsize())]
+        for shard_queue in front._queues
+    ]
+    assert routed == [[2], [1, 3, 1]]
+    assert front.stats["routed"] == 4
+
+
+def test_shard_count_must_match_the_stored_data(tmp_path):
+    fresh = tmp_path / "fresh"
+    check_shard_layout(fresh, 4)
+    check_shard_layout(fresh, 4)
+    with pytest.raises(ValueError, match="4 worker shard"):
+        check_shard_layout(fresh, 2)
+
+    # Data of a single process, written before the count was recorded
+    single = tmp_path / "single"
+    single.mkdir()
+    (single / "persistence.pickle").write_bytes(b"")
+    with pytest.raises(ValueError, match="1 worker shard"):
+        check_shard_layout(single, 3)
+
+    sharded = tmp_path / "sharded"
+    for shard in range(3):
+        (sharded / f"shard-{shard}").mkdir(parents=True)
+    with pytest.raises(ValueError, match="Set WORKER_SHARDS to 3"):
+        check_shard_layout(sharded, 1)
+    check_shard_layout(sharded, 3)
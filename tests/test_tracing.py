@@ -0,0 +1,60 @@
+import json
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+
+import pytest
+
+from artist_manager_agent.utils.tracing import UpdateTracer
+
+
+def make_update(user_id, text="hello"):
+    update = MagicMock()
+    update.update_id = user_id
+    update.effective_user.id = user_id
+    update.effective_chat.id = user_id
+    update.effective_message.text = text
+    update.to_dict.return_value = {"update_id": user_id, "message": {"text": text}}
+    return update
+
+
+def make_context(user_data=None):
+    return SimpleNamespace(user_data=user_data or {}, chat_data={})
+
+
+@pytest.mark.asyncio
+async def test_disabled_tracer_does_not_serialize_updates(tmp_path):
+    tracer = UpdateTracer(enabled=False, path=str(tmp_path / "updates.jsonl"))
+    update = make_update(1)
+    await tracer.handle(update, make_context())
+    update.to_dict.assert_not_called()
+    assert tracer.traced == 0
+
+
+@pytest.mark.asyncio
+async def test_sampling_always_traces_selected_users(tmp_path):
+    tracer = UpdateTracer(enabled=True, sample_rate=0.0, user_ids=[7], path=str(tmp_path / "updates.jsonl"))
+    tracer.start()
+    try:
+        other = make_update(8)
+        await tracer.handle(make_update(7), make_context())
+        await tracer.handle(other, make_context())
+        other.to_dict.assert_not_called()
+        assert tracer.traced == 1
+    finally:
+        tracer.stop()
+
+
+@pytest.mark.asyncio
+async def test_traces_are_written_as_json_lines(tmp_path):
+    path = tmp_path / "updates.jsonl"
+    tracer = UpdateTracer(enabled=True, path=str(path))
+    tracer.start()
+    await tracer.handle(make_update(7, "/start now"), make_context({"step": 2}))
+    await tracer.handle(make_update(8), make_context())
+    tracer.stop()
+
+    records = [json.loads(line) for line in path.read_text().splitlines()]
+    assert [record["user_id"] for record in records] == [7, 8]
+    assert records[0]["command"] == "/start"
+    assert records[0]["user_data"] == {"step": 2}
+    assert records[1]["update"]["message"]["text"] == "hello"
@@ -0,0 +1,98 @@
+import asyncio
+from datetime import datetime
+
+import pytest
+from telegram import Chat, Message, Update, User
+
+from artist_manager_agent.core.update_processor import PerUserUpdateProcessor
+
+
+def message_update(update_id, user_id):
+    user = User(id=user_id, first_name=f"User {user_id}", is_bot=False)
+    chat = Chat(id=user_id, type="private")
+    message = Message(message_id=update_id, date=datetime.now(), chat=chat, from_user=user, text="hi")
+    return Update(update_id=update_id, message=message)
+
+
+@pytest.mark.asyncio
+async def test_updates_of_one_user_run_in_arrival_order():
+    """A later update of the same user waits until the earlier one is handled."""
+    processor = PerUserUpdateProcessor(max_concurrent_updates=8)
+    log = []
+
+    async def handle(name, delay):
+        log.append(f"{name} start")
+        await asyncio.sleep(delay)
+        log.append(f"{name} end")
+
+    await asyncio.gather(
+        processor.process_update(message_update(1, 7), handle("first", 0.05)),
+        processor.process_update(message_update(2, 7), handle("second", 0)),
+        processor.process_update(message_update(3, 7), handle("third", 0))
+    )
+    assert log == ["first start", "first end", "second start", "second end", "third start", "third end"]
+    assert processor.pending_keys == 0
+
+
+@pytest.mark.asyncio
+async def test_different_users_run_concurrently_up_to_the_cap():
+    processor = PerUserUpdateProcessor(max_concurrent_updates=2)
+    running = 0
+    peak = 0
+
+    async def handle():
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        await asyncio.sleep(0.02)
+        running -= 1
+
+    await asyncio.gather(*(
+        processor.process_update(message_update(user_id, user_id), handle())
+        for user_id in range(6)
+    ))
+    assert peak == 2
+
+
+@pytest.mark.asyncio
+async def test_waiting_updates_do_not_hold_slots_of_other_users():
+    """A busy user's backlog does not block other users."""
+    processor = PerUserUpdateProcessor(max_concurrent_updates=2)
+    release = asyncio.Event()
+    other_handled = asyncio.Event()
+
+    async def blocked():
+        await release.wait()
+
+    async def other():
+        other_handled.set()
+
+    tasks = [
+        asyncio.create_task(processor.process_update(message_update(i, 7), blocked()))
+        for i in range(5)
+    ]
+    tasks.append(asyncio.create_task(processor.process_update(message_update(9, 8), other())))
+    await asyncio.wait_for(other_handled.wait(), 1)
+
+    release.set()
+    await asyncio.gather(*tasks)
+
+
+@pytest.mark.asyncio
+async def test_failed_update_does_not_stall_the_user():
+    processor = PerUserUpdateProcessor(max_concurrent_updates=4)
+    handled = []
+
+    async def fail():
+        raise RuntimeError("boom")
+
+    async def succeed():
+        handled.append(True)
+
+    results = await asyncio.gather(
+        processor.process_update(message_update(1, 7), fail()),
+        processor.process_update(message_update(2, 7), succeed()),
+        return_exceptions=True
+    )
+    assert isinstance(results[0], RuntimeError)
+    assert handled == [True]
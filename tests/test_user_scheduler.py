@@ -0,0 +1,128 @@
+import asyncio
+import time
+
+import pytest
+
+from artist_manager_agent.core.user_scheduler import UserScheduler
+
+
+async def run_scheduler(scheduler, until, timeout=2.0):
+    """Run the scheduler and workers until ``until`` is set."""
+    tasks = [asyncio.create_task(scheduler.run_scheduler())]
+    tasks += [asyncio.create_task(scheduler.run_worker()) for _ in range(scheduler.workers)]
+    try:
+        await asyncio.wait_for(until.wait(), timeout)
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+
+@pytest.mark.asyncio
+async def test_each_user_runs_at_their_own_interval():
+    runs = {1: [], 2: []}
+    done = asyncio.Event()
+
+    async def cycle(record):
+        runs[record["user_id"]].append(time.time())
+        if len(runs[1]) >= 2 and len(runs[2]) >= 4:
+            done.set()
+
+    scheduler = UserScheduler(cycle, workers=2)
+    scheduler.enable(1, 100, interval=0.15)
+    scheduler.enable(2, 200, interval=0.05)
+
+    await run_scheduler(scheduler, done)
+    # Enabling user 2 did not replace user 1's schedule
+    assert len(runs[1]) >= 2
+    assert runs[1][1] - runs[1][0] >= 0.14
+    assert runs[2][1] - runs[2][0] < 0.14
+    assert scheduler.get(1)["last_run"] == pytest.approx(runs[1][-1], abs=0.01)
+
+
+@pytest.mark.asyncio
+async def test_disabled_and_rescheduled_users():
+    runs = []
+    done = asyncio.Event()
+
+    async def cycle(record):
+        runs.append(record["user_id"])
+        if record["user_id"] == 3:
+            done.set()
+
+    scheduler = UserScheduler(cycle, workers=1)
+    scheduler.enable(1, 1, interval=60, delay=0.01)
+    scheduler.enable(2, 2, interval=60, delay=0.02)
+    scheduler.enable(3, 3, interval=60, delay=0.05)
+    assert scheduler.disable(2)
+    assert not scheduler.disable(2)
+
+    await run_scheduler(scheduler, done)
+    assert runs == [1, 3]
+    assert len(scheduler) == 2
+
+    # A shorter interval is counted from the last run
+    scheduler.set_interval(1, 0.5)
+    assert scheduler.get(1)["next_run"] == pytest.approx(scheduler.get(1)["last_run"] + 0.5)
+
+
+@pytest.mark.asyncio
+async def test_workers_bound_concurrent_runs_and_drain_waits():
+    running = 0
+    peak = 0
+    finished = []
+    done = asyncio.Event()
+
+    async def cycle(record):
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        await asyncio.sleep(0.02)
+        running -= 1
+        finished.append(record["user_id"])
+        if len(finished) == 20:
+            done.set()
+
+    scheduler = UserScheduler(cycle, workers=3)
+    for user_id in range(20):
+        scheduler.enable(user_id, user_id, interval=60)
+
+    await run_scheduler(scheduler, done)
+    assert peak == 3
+    assert sorted(finished) == list(range(20))
+    assert await scheduler.drain(timeout=0.1) == 20
+
+
+@pytest.mark.asyncio
+async def test_attach_restores_users_and_spreads_missed_runs():
+    now = time.time()
+    store = {
+        user_id: {
+            "user_id": user_id,
+            "chat_id": user_id,
+            "interval": 3600,
+            "next_run": now - 600 + user_id,
+            "last_run": now - 4200 + user_id,
+            "data": {"last_analytics_time": now - 86400}
+        }
+        for user_id in range(5)
+    }
+    store[9] = {**store[0], "user_id": 9, "next_run": now + 60}
+    started = []
+    done = asyncio.Event()
+
+    async def cycle(record):
+        started.append((record["user_id"], time.time()))
+        if len(started) == 3:
+            done.set()
+
+    scheduler = UserScheduler(cycle, workers=4)
+    assert scheduler.attach(store, catch_up_rate=20) == 6
+    assert 9 in scheduler
+
+    await run_scheduler(scheduler, done)
+    # Overdue users run once each, in the order they were due, 1/20s apart
+    assert [user_id for user_id, _ in started] == [0, 1, 2]
+    assert started[2][1] - started[0][1] >= 0.09
+    assert store[0]["next_run"] >= now + 3000
+    assert store[9]["next_run"] == now + 60
@@ -0,0 +1,116 @@
+import asyncio
+
+import pytest
+import pytest_asyncio
+from telegram.ext import ApplicationBuilder, CommandHandler
+
+from artist_manager_agent.core.webhook import WebhookServer
+from artist_manager_agent.utils.fake_bot_api import FakeBotAPI
+
+
+@pytest_asyncio.fixture
+async def bot_api():
+    """Fake Bot API server."""
+    fake = FakeBotAPI()
+    await fake.start()
+    yield fake
+    await fake.stop()
+
+
+def build_application(bot_api, queue_size=0):
+    return (
+        ApplicationBuilder()
+        .token("123:abc")
+        .base_url(bot_api.base_url)
+        .update_queue(asyncio.Queue(maxsize=queue_size))
+        .build()
+    )
+
+
+@pytest.mark.asyncio
+async def test_webhook_registers_and_dispatches_updates(bot_api):
+    """Updates posted by Telegram reach the application's handlers."""
+    application = build_application(bot_api)
+    handled = asyncio.Event()
+
+    async def start(update, context):
+        await context.bot.send_message(update.effective_chat.id, "Welcome")
+        handled.set()
+
+    application.add_handler(CommandHandler("start", start))
+    await application.initialize()
+    await application.start()
+    server = WebhookServer(application, webhook_url="https://example.com", listen="127.0.0.1", port=0)
+    await server.start()
+    try:
+        assert bot_api.webhook["url"] == "https://example.com/telegram"
+        # The public URL is not reachable here; deliver to the local server
+        bot_api.webhook["url"] = f"http://127.0.0.1:{server.port}/telegram"
+
+        assert await bot_api.deliver(bot_api.message_update(7, "/start")) == 200
+        await asyncio.wait_for(handled.wait(), 5)
+        sent = [call for call in bot_api.calls if call["method"] == "sendMessage"]
+        assert sent[0]["params"]["text"] == "Welcome"
+    finally:
+        await server.stop()
+        await application.stop()
+        await application.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_webhook_rejects_wrong_secret_and_bad_payloads(bot_api):
+    application = build_application(bot_api)
+    server = WebhookServer(application, listen="127.0.0.1", port=0, secret_token="right")
+    await server.start()
+    bot_api.webhook = {"url": f"http://127.0.0.1:{server.port}/telegram", "secret_token": "right"}
+    try:
+        assert await bot_api.deliver(bot_api.message_update(7, "hi"), secret_token="wrong") == 403
+        assert await bot_api.deliver({"update_id": "not an update", "message": 5}) == 400
+        assert application.update_queue.empty()
+        assert server.stats["rejected"] == 1
+        assert server.stats["invalid"] == 1
+    finally:
+        await server.stop()
+
+
+@pytest.mark.asyncio
+async def test_webhook_applies_backpressure_when_queue_is_full(bot_api):
+    """A full update queue makes Telegram retry instead of dropping updates."""
+    application = build_application(bot_api, queue_size=1)
+    server = WebhookServer(application, listen="127.0.0.1", port=0, secret_token="s", enqueue_timeout=0.05)
+    await server.start()
+    bot_api.webhook = {"url": f"http://127.0.0.1:{server.port}/telegram", "secret_token": "s"}
+    try:
+        assert await bot_api.deliver(bot_api.message_update(7, "one")) == 200
+        assert await bot_api.deliver(bot_api.message_update(7, "two")) == 503
+        assert application.update_queue.qsize() == 1
+
+        # A request waiting for room succeeds once the application catches up
+        server.enqueue_timeout = 5
+        delivery = asyncio.create_task(bot_api.deliver(bot_api.message_update(7, "three")))
+        await asyncio.sleep(0.1)
+        assert not delivery.done()
+        application.update_queue.get_nowait()
+        assert await delivery == 200
+        assert server.stats["overloaded"] == 1
+    finally:
+        await server.stop()
+
+
+@pytest.mark.asyncio
+async def test_updates_left_by_a_previous_instance_are_only_kept_without_dropping(bot_api):
+    """A polling bot taking over gets what Telegram still holds, unless it drops it."""
+    for drop_pending_updates, expected in ((True, []), (False, ["hi"])):
+        bot_api.push_update(bot_api.message_update(7, "hi"))
+        application = build_application(bot_api)
+        await application.initialize()
+        await application.updater.start_polling(drop_pending_updates=drop_pending_updates, poll_interval=0.01, timeout=0)
+        try:
+            await asyncio.sleep(0.2)
+            received = []
+            while not application.update_queue.empty():
+                received.append(application.update_queue.get_nowait().message.text)
+            assert received == expected
+        finally:
+            await application.updater.stop()
+            await application.shutdown()